@@ -1,7 +1,9 @@
 from .api import BitcioAPI
+from .orderbook import OrderBook
 from .trader import Scalper
 from .risk_manager import RiskManager
-from .indicators import calculate_rsi, calculate_sma, calculate_ema
+from .backtest import Backtester, SimulatedExchange
+from .indicators import calculate_rsi, calculate_sma, calculate_ema, RSI, SMA, EMA, StdDev
 
 __version__ = "0.1.0"
-__all__ = ["BitcioAPI", "Scalper", "RiskManager", "calculate_rsi", "calculate_sma", "calculate_ema"]
\ No newline at end of file
+__all__ = ["BitcioAPI", "OrderBook", "Scalper", "RiskManager", "Backtester", "SimulatedExchange", "calculate_rsi", "calculate_sma", "calculate_ema", "RSI", "SMA", "EMA", "StdDev"]
\ No newline at end of file
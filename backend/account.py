@@ -0,0 +1,94 @@
+"""Локальная таблица открытых ордеров по событиям приватного потока счёта."""
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set
+import threading
+
+OPEN_STATUSES = {"new", "open", "partially_filled"}
+
+class OpenOrders:
+    """Открытые ордера по id и по паре: события потока счёта + снимок из REST после разрыва.
+
+    Пара считается синхронизированной, пока поток идёт без пропусков; после
+    пропуска или переподключения invalidate() требует нового снимка. Снимок
+    не затирает более поздние события: ордера, изменённые после начала
+    загрузки (номер версии больше since), он не удаляет, а устаревшее
+    состояние ордера (меньше исполнено) не применяется.
+    """
+
+    def __init__(self, closed_history: int = 10000):
+        self.by_id: Dict[str, Dict] = {}
+        self.by_symbol: Dict[str, Dict[str, Dict]] = {}
+        self.versions: Dict[str, int] = {}  # id -> версия таблицы при последнем изменении
+        self.closed: 'OrderedDict[str, None]' = OrderedDict()  # Недавно закрытые: не воскрешаются снимком
+        self.closed_history = closed_history
+        self.synced: Set[str] = set()
+        self.known: Set[str] = set()  # Пары, по которым уже были ордера или снимки
+        self.version = 0
+        self.lock = threading.Lock()
+
+    def apply(self, order: Dict) -> bool:
+        """Применение состояния ордера; False, если оно устарело."""
+        with self.lock:
+            return self._apply(order)
+
+    def _apply(self, order: Dict) -> bool:
+        order_id = str(order["order_id"])
+        if order_id in self.closed:
+            return False
+        current = self.by_id.get(order_id)
+        if current is not None and float(order.get("filled", 0) or 0) < float(current.get("filled", 0) or 0):
+            return False
+        self.version += 1
+        symbol = order["symbol"]
+        self.known.add(symbol)
+        if order.get("status") in OPEN_STATUSES:
+            self.by_id[order_id] = order
+            self.by_symbol.setdefault(symbol, {})[order_id] = order
+            self.versions[order_id] = self.version
+        else:
+            self._remove(order_id, symbol)
+            self.closed[order_id] = None
+            if len(self.closed) > self.closed_history:
+                self.closed.popitem(last=False)
+        return True
+
+    def _remove(self, order_id: str, symbol: str) -> None:
+        self.by_id.pop(order_id, None)
+        self.versions.pop(order_id, None)
+        orders = self.by_symbol.get(symbol)
+        if orders is not None:
+            orders.pop(order_id, None)
+
+    def replace(self, symbol: str, orders: Iterable[Dict], since: int) -> None:
+        """Снимок открытых ордеров пары из REST, загрузка которого началась при версии since."""
+        with self.lock:
+            orders = [order for order in orders if order.get("status") in OPEN_STATUSES]
+            present = {str(order["order_id"]) for order in orders}
+            for order_id in list(self.by_symbol.get(symbol, ())):
+                if order_id not in present and self.versions.get(order_id, 0) <= since:
+                    self._remove(order_id, symbol)  # Закрыт за время разрыва
+            for order in orders:
+                self._apply(order)
+            self.synced.add(symbol)
+            self.known.add(symbol)
+
+    def invalidate(self) -> None:
+        """Пропуск событий: все пары требуют нового снимка."""
+        with self.lock:
+            self.synced.clear()
+
+    def is_synced(self, symbol: str) -> bool:
+        return symbol in self.synced
+
+    def symbols(self) -> List[str]:
+        """Пары, по которым ведётся таблица."""
+        with self.lock:
+            return list(self.known)
+
+    def get(self, order_id: str) -> Optional[Dict]:
+        return self.by_id.get(str(order_id))
+
+    def for_symbol(self, symbol: str) -> List[Dict]:
+        """Открытые ордера пары (копия списка)."""
+        with self.lock:
+            return list(self.by_symbol.get(symbol, {}).values())
@@ -1,30 +1,179 @@
 import requests
-import json
-import websocket
+from requests.adapters import HTTPAdapter
+import math
 import threading
 import time
-from typing import Dict, List, Optional
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from .account import OpenOrders
+from .orderbook import OrderBook
+from .stream import StreamManager
+from .latency import LatencyRecorder
+from .scheduler import ACCOUNT, HISTORY, ORDER, RequestScheduler
+from .dispatcher import CONFLATE, DROP_OLDEST, EventConsumer, loads, sniff_type
+
+# Таймауты (подключение, чтение) в секундах по эндпоинтам
+DEFAULT_TIMEOUTS: Dict[str, Tuple[float, float]] = {
+    "default": (3.05, 5.0),
+    "/order": (3.05, 3.0),
+    "/trades": (3.05, 10.0),
+}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# (метод, эндпоинт) -> (класс веса, вес, приоритет); вес GET с limit растёт на каждые 100 записей
+REQUEST_CLASSES: Dict[Tuple[str, str], Tuple[str, float, int]] = {
+    ("POST", "/order"): ("order", 1.0, ORDER),
+    ("DELETE", "/order"): ("order", 1.0, ORDER),
+    ("GET", "/balance"): ("read", 1.0, ACCOUNT),
+    ("GET", "/orderbook"): ("read", 2.0, ACCOUNT),
+    ("GET", "/orders"): ("read", 1.0, ACCOUNT),
+    ("GET", "/trades"): ("read", 1.0, HISTORY),
+}
+BASE_URL = "https://api.bitcio.com"
+WS_URL = "wss://ws.bitcio.com"
 
 class BitcioAPI:
-    def __init__(self, api_key: str, api_secret: str):
+    def __init__(self, api_key: str, api_secret: str, pool_size: int = 10,
+                 timeouts: Optional[Dict[str, Tuple[float, float]]] = None,
+                 max_retries: int = 3, backoff: float = 0.1, base_url: Optional[str] = None,
+                 ws_url: Optional[str] = None, rate_limits: Optional[Dict[str, Optional[Tuple[float, float]]]] = None):
         self.api_key = api_key
         self.api_secret = api_secret
-        self.base_url = "https://api.bitcio.com"
-        self.ws_url = "wss://ws.bitcio.com"
-        self.ws = None
+        self.base_url = base_url or BASE_URL  # Можно направить на локальный симулятор (python -m simulator)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.max_retries = max_retries  # Повторы только для идемпотентных GET
+        self.backoff = backoff
+        self.latency: Dict[str, Dict[str, float]] = {}
+        self.latency_lock = threading.Lock()
+        self.metrics = LatencyRecorder()  # Гистограммы задержек по этапам и эндпоинтам
+        self.executor = ThreadPoolExecutor(max_workers=pool_size)  # Параллельность не больше пула соединений
+        # Все HTTP-запросы идут через планировщик: бюджеты по классам веса, ордера вне очереди чтений
+        self.scheduler = RequestScheduler(pool_size, rate_limits, metrics=self.metrics)
+        self.ws_url = ws_url or WS_URL
+        self.stream = None  # StreamManager, создаётся при первой подписке
         self.price_callback = None
-        self.orderbook_cache: Dict[str, Dict] = {}
+        self.orderbooks: Dict[str, OrderBook] = {}
         self.trade_history_callback = None
+        self.account_callback = None
+        self.order_callback = None  # Состояние ордера (поток счёта и снимки после разрыва)
+        self.fill_callback = None   # Исполнение ордера из потока счёта
+        self.order_known = None     # order_id -> уже учитывается ли ордер (догрузка исполнений после разрыва)
+        self.open_orders = OpenOrders()
+        self.account_stream = None  # Приватный поток счёта, start_account_stream()
+        self.account_seq: Optional[int] = None
+        self.resync_lock = threading.Lock()
+        self.recorder = None  # TickRecorder для сохранения рыночных данных
+        self.accepted_types = {'ticker', 'trade', 'balance', 'depth'}  # Остальные сообщения не разбираются
+        # Обработчики работают в своих потоках: тикеры сливаются до последнего по паре,
+        # сделки и балансы идут без слияния, при переполнении теряются самые старые
+        self.consumers = {
+            'ticker': EventConsumer('ticker', lambda e: self.price_callback and self.price_callback(e), CONFLATE,
+                                    metrics=self.metrics),
+            'trade': EventConsumer('trade', lambda e: self.trade_history_callback and self.trade_history_callback(e),
+                                   DROP_OLDEST, maxsize=100000, metrics=self.metrics),
+            'balance': EventConsumer('balance', lambda e: self.account_callback and self.account_callback(e),
+                                     DROP_OLDEST, metrics=self.metrics),
+            # Исполнения и ордера не сливаются: каждое событие меняет позицию
+            'order': EventConsumer('order', lambda e: self.order_callback and self.order_callback(e['order']),
+                                   DROP_OLDEST, maxsize=100000, metrics=self.metrics),
+            'fill': EventConsumer('fill', lambda e: self.fill_callback and self.fill_callback(e),
+                                  DROP_OLDEST, maxsize=100000, metrics=self.metrics),
+        }
+
+    def _request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+        """HTTP-запрос через планировщик с таймаутом и повторами для GET.
+
+        Одинаковые GET, уже отправленные другими потоками, не повторяются:
+        вызывающие получают общий ответ.
+        """
+        bucket, weight, priority = REQUEST_CLASSES.get((method, endpoint), ("read", 1.0, ACCOUNT))
+        params = kwargs.get("params") or {}
+        if "limit" in params:
+            weight *= max(1, math.ceil(int(params["limit"]) / 100))
+        key = (endpoint, tuple(sorted(params.items()))) if method == "GET" else None
+        attempts = self.max_retries + 1 if method == "GET" else 1
+        for attempt in range(attempts):
+            try:
+                r = self.scheduler.call(lambda: self._send(method, endpoint, bucket, **kwargs),
+                                        bucket, weight, priority, key)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == attempts - 1:
+                    raise
+            else:
+                if r.status_code not in RETRY_STATUSES or attempt == attempts - 1:
+                    return r
+            # Экспоненциальная задержка с полным джиттером
+            time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    def _send(self, method: str, endpoint: str, bucket: str, **kwargs) -> requests.Response:
+        """Одна попытка запроса (в потоке планировщика) с учётом задержки и заголовков лимитов."""
+        timeout = self.timeouts.get(endpoint, self.timeouts["default"])
+        start = time.perf_counter()
+        try:
+            r = self.session.request(method, f"{self.base_url}{endpoint}", timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            self._record_latency(endpoint, time.perf_counter() - start, error=True)
+            raise
+        self._record_latency(endpoint, time.perf_counter() - start, error=r.status_code >= 400)
+        self.scheduler.feedback(bucket, r.status_code, r.headers)
+        return r
+
+    def _record_latency(self, endpoint: str, elapsed: float, error: bool = False) -> None:
+        """Учёт задержки запроса по эндпоинту."""
+        with self.latency_lock:
+            stats = self.latency.setdefault(endpoint, {"count": 0, "errors": 0, "total": 0.0, "max": 0.0})
+            stats["count"] += 1
+            stats["errors"] += int(error)
+            stats["total"] += elapsed
+            stats["max"] = max(stats["max"], elapsed)
+        self.metrics.record(f"http {endpoint}", int(elapsed * 1e9))
+
+    def get_latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """Счётчики задержек по эндпоинтам (секунды)."""
+        with self.latency_lock:
+            return {endpoint: {**stats, "avg": stats["total"] / stats["count"]}
+                    for endpoint, stats in self.latency.items()}
 
     def get_orderbook(self, symbol: str) -> Dict:
         """Получение стакана ордеров."""
-        r = requests.get(f"{self.base_url}/orderbook?symbol={symbol}")
+        r = self._request("GET", "/orderbook", params={"symbol": symbol})
         return r.json()
 
+    def get_local_orderbook(self, symbol: str) -> OrderBook:
+        """Локальный стакан; снимок из REST запрашивается только при (пере)синхронизации.
+
+        При первом обращении к паре подписывается её канал depth, и дальше
+        стакан ведут дельты. После отписки от depth дельты не приходят,
+        поэтому снимок берётся при каждом обращении и сразу считается
+        устаревшим.
+        """
+        book = self.orderbooks.get(symbol)
+        if book is None:
+            book = self.orderbooks.setdefault(symbol, OrderBook(symbol))
+            self.subscribe(symbol, ("depth",))
+        live = self.stream is not None and self.stream.is_subscribed(symbol, 'depth')
+        if not book.synced or not live:
+            book.apply_snapshot(self.get_orderbook(symbol))
+            if not live:
+                book.synced = False
+        return book
+
+    def get_best_price(self, symbol: str, side: str) -> float:
+        """Лучшая цена для стороны сделки: аск для покупки, бид для продажи."""
+        book = self.get_local_orderbook(symbol)
+        level = book.best_ask() if side == "buy" else book.best_bid()
+        if level is None:
+            raise ValueError(f"Стакан {symbol} пуст")
+        return level[0]
+
     def get_balance(self, asset: str) -> float:
         """Получение баланса по активу."""
         headers = {"X-API-KEY": self.api_key}
-        r = requests.get(f"{self.base_url}/balance?asset={asset}", headers=headers)
+        r = self._request("GET", "/balance", params={"asset": asset}, headers=headers)
         return float(r.json().get("balance", 0))
 
     def place_order(self, symbol: str, side: str, quantity: float, price: Optional[float] = None) -> Dict:
@@ -37,62 +186,207 @@ class BitcioAPI:
             "type": "limit" if price else "market"
         }
         headers = {"X-API-KEY": self.api_key}
-        r = requests.post(f"{self.base_url}/order", json=payload, headers=headers)
-        return r.json()
+        r = self._request("POST", "/order", json=payload, headers=headers)
+        order = r.json()
+        if "order_id" in order and "symbol" in order:
+            self.open_orders.apply(order)  # Ордер отслеживается, даже если его событие в потоке счёта потеряно
+        return order
 
     def cancel_order(self, order_id: str, symbol: str) -> Dict:
         """Отмена ордера."""
         headers = {"X-API-KEY": self.api_key}
         payload = {"order_id": order_id, "symbol": symbol}
-        r = requests.delete(f"{self.base_url}/order", json=payload, headers=headers)
+        r = self._request("DELETE", "/order", json=payload, headers=headers)
         return r.json()
 
-    def get_order_history(self, symbol: str, limit: int = 100) -> List[Dict]:
-        """Получение истории ордеров."""
+    def place_orders(self, orders: List[Dict]) -> List[Dict]:
+        """Параллельное размещение нескольких ордеров (аргументы place_order в словарях).
+
+        Возвращает отчёт по каждому ордеру в том же порядке.
+        """
+        def place(order: Dict) -> Dict:
+            try:
+                return self.place_order(**order)
+            except (requests.RequestException, ValueError) as e:  # ValueError - ответ не JSON
+                return {"symbol": order.get("symbol"), "status": "error", "reason": str(e)}
+        return list(self.executor.map(place, orders))
+
+    def cancel_orders(self, orders: List[Dict]) -> List[Dict]:
+        """Параллельная отмена ордеров (словари с order_id и symbol).
+
+        Пакетной отмены в API Bitcio нет, поэтому запросы идут параллельно
+        с ограничением по размеру пула. Отчёт - по каждому ордеру.
+        """
+        def cancel(order: Dict) -> Dict:
+            try:
+                res = self.cancel_order(order["order_id"], order["symbol"])
+            except (requests.RequestException, ValueError) as e:  # ValueError - ответ не JSON
+                return {"order_id": order["order_id"], "status": "error", "reason": str(e)}
+            return {"order_id": order["order_id"], **res}
+        return list(self.executor.map(cancel, orders))
+
+    def get_order_history(self, symbol: str, limit: int = 100, status: Optional[str] = None) -> List[Dict]:
+        """Получение истории ордеров (при необходимости только с заданным статусом)."""
         headers = {"X-API-KEY": self.api_key}
-        r = requests.get(f"{self.base_url}/orders?symbol={symbol}&limit={limit}", headers=headers)
+        params = {"symbol": symbol, "limit": limit}
+        if status:
+            params["status"] = status
+        r = self._request("GET", "/orders", params=params, headers=headers)
         return r.json()
 
+    def get_open_orders(self, symbol: str) -> List[Dict]:
+        """Открытые ордера пары из локальной таблицы; REST - без потока счёта или после пропуска в нём."""
+        if self.account_stream is None or not self.open_orders.is_synced(symbol):
+            self.resync_orders(symbol)
+        return self.open_orders.for_symbol(symbol)
+
+    def resync_orders(self, symbol: str) -> None:
+        """Снимок ордеров пары из REST: таблица открытых ордеров и исполнения, пропущенные за разрыв.
+
+        Исполнения догружаются только по ордерам, которые уже отслеживались
+        (в таблице до снимка или известны order_known): остальная история
+        пары - старые или чужие ордера, их нельзя учитывать как новые.
+        """
+        since = self.open_orders.version
+        tracked = {str(order["order_id"]) for order in self.open_orders.for_symbol(symbol)}
+        orders = self.get_order_history(symbol, limit=1000)
+        self.open_orders.replace(symbol, orders, since)
+        if self.order_callback is None:
+            return
+        for order in orders:
+            order_id = str(order["order_id"])
+            if order_id in tracked or (self.order_known is not None and self.order_known(order_id)):
+                self.order_callback(order)
+
     def get_historical_trades(self, symbol: str, limit: int = 1000) -> List[Dict]:
         """Получение исторических сделок для индикаторов."""
         headers = {"X-API-KEY": self.api_key}
-        r = requests.get(f"{self.base_url}/trades?symbol={symbol}&limit={limit}", headers=headers)
+        r = self._request("GET", "/trades", params={"symbol": symbol, "limit": limit}, headers=headers)
         return r.json()
 
     def start_websocket(self, symbol: str, price_callback=None, trade_history_callback=None):
-        """Запуск WebSocket для цен и сделок."""
-        self.price_callback = price_callback
-        self.trade_history_callback = trade_history_callback
-        self.ws = websocket.WebSocketApp(
-            f"{self.ws_url}/ticker/{symbol}",
-            on_message=self.on_ws_message,
-            on_error=self.on_ws_error,
-            on_close=self.on_ws_close
-        )
-        threading.Thread(target=self.ws.run_forever, daemon=True).start()
+        """Запуск WebSocket для цен и сделок (незаданные обработчики не сбрасываются)."""
+        if price_callback is not None:
+            self.price_callback = price_callback
+        if trade_history_callback is not None:
+            self.trade_history_callback = trade_history_callback
+        self.subscribe(symbol)
+
+    def subscribe(self, symbol: str, channels: Iterable[str] = ("ticker", "trade", "depth")) -> None:
+        """Подписка на каналы тикера через общий менеджер соединений."""
+        if self.stream is None:
+            self.stream = StreamManager(f"{self.ws_url}/stream", self.on_ws_message,
+                                        on_error=self.on_ws_error, on_disconnect=self.on_ws_disconnect)
+        self.stream.subscribe(symbol, channels)
+
+    def unsubscribe(self, symbol: str, channels: Iterable[str] = ("ticker", "trade", "depth")) -> None:
+        """Отписка от каналов тикера; без дельт локальный стакан пары больше не актуален."""
+        if self.stream is not None:
+            self.stream.unsubscribe(symbol, channels)
+        book = self.orderbooks.get(symbol)
+        if 'depth' in channels and book is not None:
+            book.synced = False
+
+    def start_account_stream(self) -> None:
+        """Подключение к приватному потоку счёта: ордера, исполнения и балансы без опроса REST."""
+        if self.account_stream is None:
+            self.account_stream = StreamManager(f"{self.ws_url}/account", self.on_account_message,
+                                                on_error=self.on_ws_error, on_connect=self.on_account_connect,
+                                                header=[f"X-API-KEY: {self.api_key}"])
+            self.account_stream.connect()
+
+    def on_account_connect(self, connection) -> None:
+        """(Пере)подключение потока счёта: события за время разрыва потеряны."""
+        self.account_seq = None
+        self._account_gap()
+
+    def on_account_message(self, ws, message):
+        """События счёта: таблица ордеров обновляется сразу, исполнения и балансы - в очереди обработчиков."""
+        received = time.perf_counter_ns()
+        data = loads(message)
+        data['recv_ns'] = received
+        seq = data.get('seq')
+        if seq is not None:
+            if self.account_seq is not None and seq > self.account_seq + 1:
+                print(f"Поток счёта: пропущено событий {seq - self.account_seq - 1}, сверка с REST")
+                self._account_gap()
+            self.account_seq = max(seq, self.account_seq or 0)
+        kind = data.get('type')
+        if kind == 'order':
+            self.open_orders.apply(data['order'])
+        if kind in ('order', 'fill', 'balance'):
+            self.consumers[kind].put(data)
+        self.metrics.record_since("ws.account", received)
+
+    def _account_gap(self) -> None:
+        """Пропуск в потоке счёта: таблица недостоверна, сверка известных пар в фоне (одна за раз)."""
+        self.open_orders.invalidate()
+        symbols = self.open_orders.symbols()
+        if not symbols or not self.resync_lock.acquire(blocking=False):
+            return
+
+        def resync():
+            try:
+                for symbol in symbols:
+                    self.resync_orders(symbol)
+            except Exception as e:
+                print(f"Ошибка сверки ордеров: {e}")  # Следующий get_open_orders повторит сверку
+            finally:
+                self.resync_lock.release()
+        try:
+            self.executor.submit(resync)
+        except RuntimeError:  # Клиент уже закрыт
+            self.resync_lock.release()
 
     def on_ws_message(self, ws, message):
-        """Обработка сообщений WebSocket."""
-        data = json.loads(message)
-        if data.get('type') == 'ticker':
-            self.orderbook_cache[data['symbol']] = data
-            if self.price_callback:
-                self.price_callback(data)
-        elif data.get('type') == 'trade':
-            if self.trade_history_callback:
-                self.trade_history_callback(data)
+        """Обработка сообщений WebSocket: разбор и передача в очереди обработчиков."""
+        received = time.perf_counter_ns()
+        kind = sniff_type(message)
+        if kind is not None and kind not in self.accepted_types:
+            return  # Пульс, подтверждения подписок и прочее - без разбора
+        data = loads(message)
+        data['recv_ns'] = received  # Момент приёма для замера задержки до ордера
+        if self.recorder is not None:
+            self.recorder.record(data)
+        kind = data.get('type')
+        if kind == 'depth':
+            # Дельты стакана дешёвые и должны применяться по порядку, поэтому применяются
+            # здесь, в потоке приёма, без очереди обработчика
+            book = self.orderbooks.get(data['symbol'])
+            if book is not None:
+                book.apply_delta(data)
+        elif kind in self.consumers:
+            self.consumers[kind].put(data)
+        self.metrics.record_since("ws.decode", received)
+
+    def get_dispatch_stats(self) -> Dict[str, int]:
+        """Число событий, потерянных при переполнении очередей обработчиков."""
+        return {kind: consumer.dropped for kind, consumer in self.consumers.items()}
 
     def on_ws_error(self, ws, error):
         """Обработка ошибок WebSocket."""
         print(f"WebSocket error: {error}")
 
-    def on_ws_close(self, ws, close_status_code, close_msg):
-        """Обработка закрытия WebSocket."""
-        print("WebSocket closed. Reconnecting...")
-        time.sleep(5)
-        self.start_websocket()
+    def on_ws_disconnect(self, connection):
+        """Разрыв соединения: стаканы его тикеров требуют нового снимка (переподключается менеджер)."""
+        for channel, symbol in list(connection.streams):
+            book = self.orderbooks.get(symbol)
+            if channel == 'depth' and book is not None:
+                book.synced = False  # Дельты за время разрыва потеряны
 
     def stop_websocket(self):
-        """Остановка WebSocket."""
-        if self.ws:
-            self.ws.close()
\ No newline at end of file
+        """Остановка WebSocket (рыночные данные и поток счёта)."""
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        if self.account_stream is not None:
+            self.account_stream.close()
+            self.account_stream = None
+        for consumer in self.consumers.values():
+            consumer.stop()
+
+    def close(self):
+        """Остановка планировщика запросов и закрытие пула HTTP-соединений."""
+        self.scheduler.shutdown()
+        self.executor.shutdown(wait=False)
+        self.session.close()
\ No newline at end of file
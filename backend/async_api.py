@@ -0,0 +1,189 @@
+import aiohttp
+import asyncio
+import json
+import random
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from .api import BASE_URL, DEFAULT_TIMEOUTS, RETRY_STATUSES, WS_URL
+from .orderbook import OrderBook
+
+class AsyncBitcioAPI:
+    """Асинхронный клиент Bitcio (aiohttp) с тем же набором методов, что и BitcioAPI."""
+
+    def __init__(self, api_key: str, api_secret: str, pool_size: int = 10,
+                 timeouts: Optional[Dict[str, Tuple[float, float]]] = None,
+                 max_retries: int = 3, backoff: float = 0.1, base_url: Optional[str] = None,
+                 ws_url: Optional[str] = None):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.base_url = base_url or BASE_URL
+        self.ws_url = ws_url or WS_URL
+        self.pool_size = pool_size
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.orderbooks: Dict[str, OrderBook] = {}
+        self.live: Dict[str, int] = {}  # Тикер -> число открытых потоков stream() с его дельтами
+        self.latency: Dict[str, Dict[str, float]] = {}
+
+    async def open(self) -> None:
+        """Создание пула соединений (вызывается автоматически при первом запросе)."""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self.session = aiohttp.ClientSession(connector=connector)
+
+    async def close(self) -> None:
+        """Закрытие пула соединений."""
+        if self.session is not None:
+            await self.session.close()
+
+    async def __aenter__(self) -> "AsyncBitcioAPI":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _request(self, method: str, endpoint: str, **kwargs):
+        """HTTP-запрос с таймаутом и повторами для GET; возвращает разобранный JSON."""
+        await self.open()
+        connect, read = self.timeouts.get(endpoint, self.timeouts["default"])
+        timeout = aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+        attempts = self.max_retries + 1 if method == "GET" else 1
+        for attempt in range(attempts):
+            start = time.perf_counter()
+            try:
+                async with self.session.request(method, f"{self.base_url}{endpoint}",
+                                                timeout=timeout, **kwargs) as r:
+                    data = await r.json(content_type=None)
+                    status = r.status
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                self._record_latency(endpoint, time.perf_counter() - start, error=True)
+                if attempt == attempts - 1:
+                    raise
+            else:
+                self._record_latency(endpoint, time.perf_counter() - start, error=status >= 400)
+                if status not in RETRY_STATUSES or attempt == attempts - 1:
+                    return data
+            await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    def _record_latency(self, endpoint: str, elapsed: float, error: bool = False) -> None:
+        """Учёт задержки запроса по эндпоинту."""
+        stats = self.latency.setdefault(endpoint, {"count": 0, "errors": 0, "total": 0.0, "max": 0.0})
+        stats["count"] += 1
+        stats["errors"] += int(error)
+        stats["total"] += elapsed
+        stats["max"] = max(stats["max"], elapsed)
+
+    async def get_orderbook(self, symbol: str) -> Dict:
+        """Получение стакана ордеров."""
+        return await self._request("GET", "/orderbook", params={"symbol": symbol})
+
+    async def get_local_orderbook(self, symbol: str) -> OrderBook:
+        """Локальный стакан; снимок из REST запрашивается только при (пере)синхронизации.
+
+        Без открытого stream() по паре дельты не приходят, поэтому снимок
+        берётся при каждом обращении и сразу считается устаревшим.
+        """
+        book = self.orderbooks.get(symbol)
+        if book is None:
+            book = self.orderbooks.setdefault(symbol, OrderBook(symbol))
+        live = symbol in self.live
+        if not book.synced or not live:
+            book.apply_snapshot(await self.get_orderbook(symbol))
+            if not live:
+                book.synced = False
+        return book
+
+    async def get_best_price(self, symbol: str, side: str) -> float:
+        """Лучшая цена для стороны сделки: аск для покупки, бид для продажи."""
+        book = await self.get_local_orderbook(symbol)
+        level = book.best_ask() if side == "buy" else book.best_bid()
+        if level is None:
+            raise ValueError(f"Стакан {symbol} пуст")
+        return level[0]
+
+    async def get_balance(self, asset: str) -> float:
+        """Получение баланса по активу."""
+        headers = {"X-API-KEY": self.api_key}
+        data = await self._request("GET", "/balance", params={"asset": asset}, headers=headers)
+        return float(data.get("balance", 0))
+
+    async def get_balances(self, assets: List[str]) -> Dict[str, float]:
+        """Параллельное получение балансов по нескольким активам."""
+        balances = await asyncio.gather(*(self.get_balance(asset) for asset in assets))
+        return dict(zip(assets, balances))
+
+    async def place_order(self, symbol: str, side: str, quantity: float, price: Optional[float] = None) -> Dict:
+        """Размещение ордера."""
+        payload = {
+            "symbol": symbol,
+            "side": side,
+            "quantity": quantity,
+            "price": price,
+            "type": "limit" if price else "market"
+        }
+        headers = {"X-API-KEY": self.api_key}
+        return await self._request("POST", "/order", json=payload, headers=headers)
+
+    async def cancel_order(self, order_id: str, symbol: str) -> Dict:
+        """Отмена ордера."""
+        headers = {"X-API-KEY": self.api_key}
+        payload = {"order_id": order_id, "symbol": symbol}
+        return await self._request("DELETE", "/order", json=payload, headers=headers)
+
+    async def get_order_history(self, symbol: str, limit: int = 100) -> List[Dict]:
+        """Получение истории ордеров."""
+        headers = {"X-API-KEY": self.api_key}
+        return await self._request("GET", "/orders", params={"symbol": symbol, "limit": limit}, headers=headers)
+
+    async def get_historical_trades(self, symbol: str, limit: int = 1000) -> List[Dict]:
+        """Получение исторических сделок для индикаторов."""
+        headers = {"X-API-KEY": self.api_key}
+        return await self._request("GET", "/trades", params={"symbol": symbol, "limit": limit}, headers=headers)
+
+    async def stream(self, symbol: str, reconnect_delay: float = 1.0,
+                     max_reconnect_delay: float = 30.0) -> AsyncIterator[Dict]:
+        """Поток событий WebSocket (ticker, trade, depth) с переподключением.
+
+        Дельты стакана применяются к локальному стакану до выдачи события.
+        """
+        await self.open()
+        delay = reconnect_delay
+        while True:
+            try:
+                async with self.session.ws_connect(f"{self.ws_url}/ticker/{symbol}", heartbeat=15) as ws:
+                    delay = reconnect_delay
+                    self.live[symbol] = self.live.get(symbol, 0) + 1
+                    try:
+                        async for msg in ws:
+                            if msg.type != aiohttp.WSMsgType.TEXT:
+                                continue
+                            try:
+                                data = json.loads(msg.data)
+                            except ValueError as e:
+                                print(f"WebSocket: некорректное сообщение пропущено: {e}")
+                                continue
+                            if not isinstance(data, dict):
+                                continue
+                            if data.get('type') == 'depth':
+                                book = self.orderbooks.get(data['symbol'])
+                                if book is not None:
+                                    book.apply_delta(data)
+                            yield data
+                    finally:
+                        self._stream_closed(symbol)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"WebSocket error: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_reconnect_delay)
+
+    def _stream_closed(self, symbol: str) -> None:
+        """Поток пары закрыт (разрыв или выход из stream()): дельты больше не приходят."""
+        self.live[symbol] -= 1
+        if not self.live[symbol]:
+            del self.live[symbol]
+        book = self.orderbooks.get(symbol)
+        if book is not None:
+            book.synced = False  # Дельты за время разрыва потеряны
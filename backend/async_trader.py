@@ -0,0 +1,140 @@
+import asyncio
+import time
+from typing import Dict, Tuple
+from .async_api import AsyncBitcioAPI
+from .indicators import RSI, SMA, StdDev
+from .ledger import Ledger
+from .risk_manager import VOLATILITY_PERIOD, RiskManager
+from .trader import Scalper
+
+class AsyncScalper:
+    """Асинхронный скальпер: стратегия оценивается на каждом событии WebSocket."""
+
+    def __init__(self, api: AsyncBitcioAPI, max_position: float = 0.1, min_spread: float = 0.001,
+                 max_loss: float = 0.05, assets: Tuple[str, ...] = ("BTC", "ETH", "USDT"),
+                 cooldown: float = 5.0, balance_ttl: float = 2.0, rsi_buy: float = 30, rsi_sell: float = 70,
+                 rsi_period: int = 14, sma_period: int = 20):
+        self.api = api
+        self.max_position = max_position  # Макс. доля баланса на сделку
+        self.min_spread = min_spread      # Мин. спред
+        self.max_loss = max_loss          # Макс. допустимый убыток (% от баланса)
+        self.assets = assets
+        self.rsi_buy = rsi_buy            # Порог перепроданности
+        self.rsi_sell = rsi_sell          # Порог перекупленности
+        self.rsi_period = rsi_period
+        self.sma_period = sma_period
+        self.cooldown = cooldown          # Пауза после ордера, сек
+        self.balance_ttl = balance_ttl    # Время жизни кэша балансов, сек
+        self.balances: Dict[str, Tuple[float, float]] = {}  # Актив -> (баланс, время получения)
+        self.initial_balance = None
+        self.ledger = Ledger(books=api.orderbooks)  # Позиции и PnL по исполнениям
+        self.indicators: Dict[str, Dict] = {}
+
+    async def get_total_balance(self) -> float:
+        """Общий баланс; запросы по активам выполняются параллельно."""
+        balances = await self.api.get_balances(list(self.assets))
+        return sum(balances.values())
+
+    async def get_balance(self, asset: str) -> float:
+        """Баланс по активу из кэша; REST-запрос только после истечения TTL."""
+        balance = RiskManager.cached_balance(self.balances, asset, self.balance_ttl)
+        if balance is None:
+            balance = await self.api.get_balance(asset)
+            self.balances[asset] = (balance, time.monotonic())
+        return balance
+
+    async def can_trade(self, symbol: str, quantity: float, side: str) -> bool:
+        """Проверка рисков теми же правилами, что и RiskManager.can_trade."""
+        balance, price = await asyncio.gather(
+            self.get_balance(symbol.split("USDT")[0]),
+            self.api.get_best_price(symbol, side),
+        )
+        if not RiskManager.position_allowed(quantity, price, balance, self.max_position):
+            return False
+        if RiskManager.loss_exceeded(self.ledger.total()["net"], self.initial_balance, self.max_loss):
+            return False
+        return not self.is_high_volatility(symbol)
+
+    def is_high_volatility(self, symbol: str) -> bool:
+        """Волатильность по скользящему окну из потока сделок, без запросов к REST."""
+        indicators = self.indicators.get(symbol)
+        if indicators is None:
+            return False
+        return RiskManager.volatility_exceeded(indicators['stdev'], indicators['sma100'])
+
+    async def get_indicators(self, symbol: str) -> Dict:
+        """Потоковые индикаторы по паре; прогрев из истории сделок выполняется один раз."""
+        indicators = self.indicators.get(symbol)
+        if indicators is None:
+            indicators = {'rsi': RSI(period=self.rsi_period), 'sma': SMA(period=self.sma_period),
+                          'stdev': StdDev(period=VOLATILITY_PERIOD), 'sma100': SMA(period=VOLATILITY_PERIOD)}
+            for trade in await self.api.get_historical_trades(symbol):
+                self._update_indicators(indicators, float(trade['price']))
+            self.indicators[symbol] = indicators
+        return indicators
+
+    @staticmethod
+    def _update_indicators(indicators: Dict, price: float) -> None:
+        for indicator in indicators.values():
+            indicator.update(price)
+
+    async def buy(self, symbol: str, quantity: float) -> Dict:
+        """Покупка по лучшей цене."""
+        if not await self.can_trade(symbol, quantity, "buy"):
+            return {"status": "rejected", "reason": "Risk limits exceeded"}
+        best_ask = await self.api.get_best_price(symbol, "buy")
+        order = await self.api.place_order(symbol, "buy", quantity, price=best_ask)
+        self.ledger.on_order(order)
+        return order
+
+    async def sell(self, symbol: str, quantity: float) -> Dict:
+        """Продажа по лучшей цене."""
+        if not await self.can_trade(symbol, quantity, "sell"):
+            return {"status": "rejected", "reason": "Risk limits exceeded"}
+        best_bid = await self.api.get_best_price(symbol, "sell")
+        order = await self.api.place_order(symbol, "sell", quantity, price=best_bid)
+        self.ledger.on_order(order)
+        return order
+
+    async def evaluate(self, symbol: str, base_quantity: float) -> bool:
+        """Оценка стратегии по текущему состоянию; True, если был отправлен ордер."""
+        best_bid = await self.api.get_best_price(symbol, "sell")
+        best_ask = await self.api.get_best_price(symbol, "buy")
+        decision = Scalper.signal(best_bid, best_ask, self.indicators[symbol], self.min_spread,
+                                  self.rsi_buy, self.rsi_sell)
+        if decision is None:
+            return False
+        side, price = decision
+        balance = await self.get_balance(symbol.split("USDT")[0])
+        quantity = min(base_quantity, balance * self.max_position / price)
+        if quantity <= 0:
+            return False
+        order = await (self.buy(symbol, quantity) if side == "buy" else self.sell(symbol, quantity))
+        return order.get("status") != "rejected"
+
+    async def auto_scalp(self, symbol: str, base_quantity: float, duration: int = 3600) -> None:
+        """Автоматический скальпинг: реакция на каждое событие ticker/trade."""
+        if self.initial_balance is None:
+            self.initial_balance = await self.get_total_balance()
+        indicators = await self.get_indicators(symbol)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration
+        next_allowed = 0.0
+
+        async def run() -> None:
+            nonlocal next_allowed
+            async for event in self.api.stream(symbol):
+                if event.get('symbol', symbol) != symbol:
+                    continue
+                if event.get('type') == 'trade':
+                    self._update_indicators(indicators, float(event['price']))
+                    self.ledger.on_trade(event)
+                elif event.get('type') != 'ticker':
+                    continue
+                if loop.time() >= next_allowed and await self.evaluate(symbol, base_quantity):
+                    next_allowed = loop.time() + self.cooldown
+
+        try:
+            await asyncio.wait_for(run(), timeout=max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            pass
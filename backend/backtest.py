@@ -0,0 +1,332 @@
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+import heapq
+import itertools
+import time
+from .candles import CandleAggregator
+from .latency import LatencyRecorder
+from .orderbook import OrderBook
+from .risk_manager import RiskManager
+from .trader import Scalper
+
+class SimulatedExchange:
+    """Симулятор биржи с интерфейсом BitcioAPI для бэктеста на виртуальных часах.
+
+    Время задаётся событиями записи (поле 'time'), а не системными часами.
+    Рыночные и пересекающие стакан лимитные ордера исполняются по уровням
+    стакана, остальные лимитные ждут встречной сделки. При latency > 0 ордер
+    доходит до биржи с задержкой и исполняется по стакану на момент прихода.
+    """
+
+    def __init__(self, balances: Dict[str, float], fee_rate: float = 0.001, latency: float = 0.0,
+                 half_spread: float = 0.0005, synthetic_qty: float = 1e9, history: int = 1000):
+        self.now = 0.0
+        self.balances = dict(balances)
+        self.fee_rate = fee_rate
+        self.latency = latency            # Задержка доставки ордера, сек
+        self.half_spread = half_spread    # Полуспред синтетического стакана, если нет данных depth
+        self.synthetic_qty = synthetic_qty
+        self.orderbooks: Dict[str, OrderBook] = {}
+        self.depth_symbols = set()        # Пары, для которых в записи есть стакан
+        self.trade_history: Dict[str, Deque[float]] = {}
+        self.history = history
+        self.last_price: Dict[str, float] = {}
+        self.pending: List[Tuple[float, int, Dict]] = []  # Куча ордеров в пути: (время прихода, №, ордер)
+        self.open_orders: Dict[str, Dict] = {}
+        self.orders: List[Dict] = []
+        self.fills: List[Dict] = []
+        self.ids = itertools.count(1)
+        self.price_callback = None
+        self.trade_history_callback = None
+        self.account_callback = None
+        self.order_callback = None
+        self.fill_callback = None  # Исполнения, в том числе стоявших лимитных ордеров, как в потоке счёта
+        self.metrics = LatencyRecorder()
+
+    # --- Поток рыночных данных ---
+
+    def process(self, event: Dict) -> None:
+        """Применение одного события записи (ticker, trade, depth)."""
+        self.advance(event['time'])
+        kind = event['type']
+        symbol = event['symbol']
+        if kind == 'trade':
+            price = float(event['price'])
+            self.last_price[symbol] = price
+            history = self.trade_history.get(symbol)
+            if history is None:
+                history = self.trade_history[symbol] = deque(maxlen=self.history)
+            history.append(price)
+            if symbol not in self.depth_symbols:
+                self._synthetic_book(symbol, price)
+            if self.open_orders:
+                self._match_resting(symbol, price)
+            if self.trade_history_callback:
+                self.trade_history_callback(event)
+        elif kind == 'depth':
+            self.depth_symbols.add(symbol)
+            book = self.get_local_orderbook(symbol)
+            if event.get('snapshot') or not book.synced:
+                book.apply_snapshot(event)
+            else:
+                book.apply_delta({'bids': event.get('bids', []), 'asks': event.get('asks', [])})
+        elif kind == 'ticker':
+            if 'bid' in event and 'ask' in event and symbol not in self.depth_symbols:
+                self.get_local_orderbook(symbol).apply_snapshot({
+                    'bids': [[event['bid'], self.synthetic_qty]],
+                    'asks': [[event['ask'], self.synthetic_qty]]})
+            if self.price_callback:
+                self.price_callback(event)
+
+    def advance(self, now: float) -> None:
+        """Перевод виртуальных часов; исполнение ордеров, дошедших до биржи."""
+        self.now = now
+        while self.pending and self.pending[0][0] <= now:
+            _, _, order = heapq.heappop(self.pending)
+            self._execute(order)
+
+    def _synthetic_book(self, symbol: str, price: float) -> None:
+        """Стакан из одного уровня вокруг цены сделки (когда в записи нет depth)."""
+        self.get_local_orderbook(symbol).apply_snapshot({
+            'bids': [[price * (1 - self.half_spread), self.synthetic_qty]],
+            'asks': [[price * (1 + self.half_spread), self.synthetic_qty]]})
+
+    def ready(self, symbol: str) -> bool:
+        """Есть ли в стакане обе стороны."""
+        book = self.orderbooks.get(symbol)
+        return book is not None and book.best_bid() is not None and book.best_ask() is not None
+
+    # --- Интерфейс BitcioAPI ---
+
+    def get_orderbook(self, symbol: str) -> Dict:
+        """Снимок стакана."""
+        return self.get_local_orderbook(symbol).top(depth=100)
+
+    def get_local_orderbook(self, symbol: str) -> OrderBook:
+        """Локальный стакан симулятора."""
+        book = self.orderbooks.get(symbol)
+        if book is None:
+            book = self.orderbooks[symbol] = OrderBook(symbol)
+        return book
+
+    def get_best_price(self, symbol: str, side: str) -> float:
+        """Лучшая цена для стороны сделки: аск для покупки, бид для продажи."""
+        book = self.get_local_orderbook(symbol)
+        level = book.best_ask() if side == "buy" else book.best_bid()
+        if level is None:
+            raise ValueError(f"Стакан {symbol} пуст")
+        return level[0]
+
+    def get_balance(self, asset: str) -> float:
+        """Баланс по активу."""
+        return self.balances.get(asset, 0.0)
+
+    def place_order(self, symbol: str, side: str, quantity: float, price: Optional[float] = None) -> Dict:
+        """Размещение ордера (с учётом задержки доставки)."""
+        order = {
+            "order_id": str(next(self.ids)),
+            "symbol": symbol,
+            "side": side,
+            "quantity": quantity,
+            "filled": 0.0,
+            "price": price,
+            "type": "limit" if price else "market",
+            "status": "new",
+            "time": self.now,
+        }
+        self.orders.append(order)
+        if self.latency > 0:
+            heapq.heappush(self.pending, (self.now + self.latency, int(order["order_id"]), order))
+            return dict(order)
+        self._execute(order)
+        return dict(order)
+
+    def cancel_order(self, order_id: str, symbol: str) -> Dict:
+        """Отмена ордера."""
+        order = self.open_orders.pop(order_id, None)
+        if order is None:
+            return {"order_id": order_id, "status": "rejected", "reason": "Order not found"}
+        order["status"] = "cancelled"
+        return dict(order)
+
+    def place_orders(self, orders: List[Dict]) -> List[Dict]:
+        """Размещение нескольких ордеров."""
+        return [self.place_order(**order) for order in orders]
+
+    def cancel_orders(self, orders: List[Dict]) -> List[Dict]:
+        """Отмена нескольких ордеров."""
+        return [self.cancel_order(order["order_id"], order["symbol"]) for order in orders]
+
+    def get_order_history(self, symbol: str, limit: int = 100, status: Optional[str] = None) -> List[Dict]:
+        """История ордеров."""
+        orders = [o for o in self.orders if o["symbol"] == symbol and (status is None or o["status"] == status)]
+        return [dict(o) for o in orders[-limit:]]
+
+    def get_open_orders(self, symbol: str) -> List[Dict]:
+        """Открытые ордера пары."""
+        return [dict(o) for o in self.open_orders.values() if o["symbol"] == symbol]
+
+    def get_historical_trades(self, symbol: str, limit: int = 1000) -> List[Dict]:
+        """Последние сделки до текущего виртуального времени."""
+        history = list(self.trade_history.get(symbol, ()))[-limit:]
+        return [{"price": price} for price in history]
+
+    def start_websocket(self, symbol: str, price_callback=None, trade_history_callback=None):
+        """Поток данных задаётся записью; сохраняются только обработчики."""
+        if price_callback is not None:
+            self.price_callback = price_callback
+        if trade_history_callback is not None:
+            self.trade_history_callback = trade_history_callback
+
+    def stop_websocket(self):
+        pass
+
+    def close(self):
+        pass
+
+    # --- Исполнение ---
+
+    def _execute(self, order: Dict) -> None:
+        """Исполнение ордера, дошедшего до биржи."""
+        symbol, side = order["symbol"], order["side"]
+        book = self.get_local_orderbook(symbol)
+        levels = book.top(depth=50)["asks" if side == "buy" else "bids"]
+        limit = order["price"]
+        remaining = order["quantity"]
+        for price, qty in levels:
+            if limit is not None and (price > limit if side == "buy" else price < limit):
+                break
+            take = min(qty, remaining)
+            if not self._fill(order, take, price):
+                break
+            remaining -= take
+            if remaining <= 0:
+                break
+        if order["status"] == "rejected":
+            return
+        if remaining <= 1e-12:
+            order["status"] = "filled"
+        elif order["type"] == "limit":
+            order["status"] = "open" if order["filled"] == 0 else "partially_filled"
+            self.open_orders[order["order_id"]] = order
+        else:
+            order["status"] = "cancelled" if order["filled"] == 0 else "partially_filled"
+
+    def _match_resting(self, symbol: str, trade_price: float) -> None:
+        """Исполнение лимитных ордеров, через цену которых прошла сделка."""
+        for order_id, order in list(self.open_orders.items()):
+            if order["symbol"] != symbol:
+                continue
+            crossed = trade_price <= order["price"] if order["side"] == "buy" else trade_price >= order["price"]
+            if crossed and self._fill(order, order["quantity"] - order["filled"], order["price"]):
+                order["status"] = "filled"
+                del self.open_orders[order_id]
+
+    def _fill(self, order: Dict, quantity: float, price: float) -> bool:
+        """Исполнение части ордера с комиссией; False при нехватке средств."""
+        base = order["symbol"].split("USDT")[0]
+        notional = quantity * price
+        fee = notional * self.fee_rate
+        if order["side"] == "buy":
+            if self.balances.get("USDT", 0.0) < notional + fee:
+                if order["filled"] == 0:
+                    order["status"] = "rejected"
+                    order["reason"] = "Insufficient balance"
+                return False
+            self.balances["USDT"] = self.balances.get("USDT", 0.0) - notional - fee
+            self.balances[base] = self.balances.get(base, 0.0) + quantity
+        else:
+            if self.balances.get(base, 0.0) < quantity:
+                if order["filled"] == 0:
+                    order["status"] = "rejected"
+                    order["reason"] = "Insufficient balance"
+                return False
+            self.balances[base] -= quantity
+            self.balances["USDT"] = self.balances.get("USDT", 0.0) + notional - fee
+        order["filled"] += quantity
+        fills = order.setdefault("fills", [])
+        fills.append({"price": price, "quantity": quantity, "fee": fee, "time": self.now})
+        fill = {"order_id": order["order_id"], "symbol": order["symbol"], "side": order["side"],
+                "price": price, "quantity": quantity, "fee": fee, "time": self.now}
+        self.fills.append(fill)
+        if self.fill_callback:
+            self.fill_callback({"type": "fill", **fill, "filled": order["filled"], "fill": len(fills)})
+        if self.account_callback:
+            for asset in (base, "USDT"):
+                self.account_callback({"type": "balance", "asset": asset, "balance": self.balances[asset]})
+        return True
+
+    def equity(self, symbol: str) -> float:
+        """Стоимость портфеля по паре в USDT по последней цене."""
+        base = symbol.split("USDT")[0]
+        return self.balances.get("USDT", 0.0) + self.balances.get(base, 0.0) * self.last_price.get(symbol, 0.0)
+
+class Backtester:
+    """Прогон стратегии Scalper по записанным событиям на виртуальных часах."""
+
+    def __init__(self, symbol: str, balances: Dict[str, float], base_quantity: float = 0.001,
+                 decision_interval: float = 5.0, fee_rate: float = 0.001, latency: float = 0.0,
+                 half_spread: float = 0.0005, risk_params: Optional[Dict] = None,
+                 strategy_params: Optional[Dict] = None):
+        self.symbol = symbol
+        self.base_quantity = base_quantity
+        self.decision_interval = decision_interval  # Период цикла auto_scalp в виртуальном времени
+        self.exchange = SimulatedExchange(balances, fee_rate=fee_rate, latency=latency, half_spread=half_spread)
+        self.risk_manager = RiskManager(self.exchange, **(risk_params or {}))
+        strategy_params = dict(strategy_params or {})
+        if strategy_params.get('timeframe'):  # Индикаторы по свечам на виртуальных часах
+            strategy_params['candles'] = CandleAggregator((strategy_params['timeframe'],))
+        self.scalper = Scalper(self.exchange, self.risk_manager, **strategy_params)
+
+    def run(self, events: Iterable[Dict]) -> Dict:
+        """Прогон; возвращает PnL стратегии, исполнения и максимальную просадку.
+
+        pnl - чистый PnL по исполнениям из журнала позиций (реализованный,
+        нереализованный по открытой позиции, за вычетом комиссий); переоценка
+        начальных балансов в него не входит и возвращается отдельно (drift).
+        Просадка считается по той же кривой PnL стратегии.
+        """
+        exchange, scalper, symbol = self.exchange, self.scalper, self.symbol
+        ledger = self.risk_manager.ledger
+        started = time.perf_counter()
+        next_decision = None
+        start_equity = None
+        peak = 0.0
+        max_drawdown = 0.0
+        equity_curve = []
+        count = 0
+        for event in events:
+            exchange.process(event)
+            count += 1
+            now = exchange.now
+            if next_decision is None:
+                next_decision = now
+            if now < next_decision or not exchange.ready(symbol) or symbol not in exchange.last_price:
+                continue
+            next_decision = now + self.decision_interval
+            scalper.step(symbol, self.base_quantity)
+            equity = exchange.equity(symbol)
+            if start_equity is None:
+                start_equity = equity
+            strategy_equity = start_equity + ledger.pnl(symbol)["net"]
+            peak = max(peak, strategy_equity)
+            if peak > 0:
+                max_drawdown = max(max_drawdown, (peak - strategy_equity) / peak)
+            equity_curve.append((now, equity))
+        end_equity = exchange.equity(symbol)
+        start_equity = end_equity if start_equity is None else start_equity
+        pnl = ledger.pnl(symbol)["net"]
+        return {
+            "pnl": pnl,
+            "return": pnl / start_equity if start_equity else 0.0,
+            "equity_pnl": end_equity - start_equity,        # Изменение стоимости портфеля целиком
+            "drift": end_equity - start_equity - pnl,       # Переоценка начальных балансов
+            "max_drawdown": max_drawdown,
+            "fills": exchange.fills,
+            "trades": len(exchange.fills),
+            "fees": sum(fill["fee"] for fill in exchange.fills),
+            "equity": equity_curve,
+            "balances": dict(exchange.balances),
+            "events": count,
+            "elapsed": time.perf_counter() - started,
+        }
@@ -0,0 +1,104 @@
+"""Векторизованные (NumPy) индикаторы для целых ценовых рядов.
+
+Элемент i каждого ряда совпадает со значением скалярной функции из
+indicators.py, вычисленной по prices[:i + 1].
+"""
+from typing import Sequence
+import math
+import numpy as np
+
+def _as_array(prices: Sequence[float]) -> np.ndarray:
+    return np.ascontiguousarray(prices, dtype=np.float64)
+
+def _expanding_mean(prices: np.ndarray) -> np.ndarray:
+    """Среднее по всем ценам от начала ряда до текущей."""
+    return np.cumsum(prices) / np.arange(1, len(prices) + 1)
+
+def sma_series(prices: Sequence[float], period: int = 20) -> np.ndarray:
+    """Ряд простой скользящей средней (SMA)."""
+    prices = _as_array(prices)
+    out = np.empty(len(prices))
+    head = min(period - 1, len(prices))
+    out[:head] = _expanding_mean(prices[:head])  # Данных меньше периода: среднее всех
+    if len(prices) >= period:
+        # Прямая свёртка точнее разности кумулятивных сумм на длинных рядах
+        out[head:] = np.convolve(prices, np.full(period, 1.0 / period), mode='valid')
+    return out
+
+def ema_series(prices: Sequence[float], period: int = 20) -> np.ndarray:
+    """Ряд экспоненциальной скользящей средней (EMA)."""
+    prices = _as_array(prices)
+    n = len(prices)
+    out = np.empty(n)
+    if n == 0:
+        return out
+    k = 2 / (period + 1)
+    a = 1 - k
+    # Рекурсия e[t] = k*x[t] + a*e[t-1] решается блоками: внутри блока через
+    # кумулятивную сумму x[j] * a**-j. Длина блока ограничена так, чтобы
+    # a**-block не превышал 1e6 и потеря точности оставалась на уровне 1e-10.
+    block = max(1, int(math.log(1e6) / -math.log(a))) if a > 0 else 1
+    powers = a ** np.arange(block + 1)
+    inv_powers = 1.0 / powers[:block]
+    prev = prices[0]
+    out[0] = prev
+    for start in range(1, n, block):
+        chunk = prices[start:start + block]
+        m = len(chunk)
+        acc = np.cumsum(chunk * inv_powers[:m])
+        out[start:start + m] = powers[1:m + 1] * prev + k * powers[:m] * acc
+        prev = out[start + m - 1]
+    head = min(period - 1, n)
+    out[:head] = _expanding_mean(prices[:head])
+    return out
+
+def rsi_series(prices: Sequence[float], period: int = 14) -> np.ndarray:
+    """Ряд индекса относительной силы (RSI)."""
+    prices = _as_array(prices)
+    out = np.full(len(prices), 50.0)  # Нейтральное значение, если данных мало
+    if len(prices) < period + 1:
+        return out
+    diff = np.diff(prices)
+    window = np.full(period, 1.0 / period)
+    avg_gain = np.convolve(np.where(diff > 0, diff, 0.0), window, mode='valid')
+    avg_loss = np.convolve(np.where(diff > 0, 0.0, -diff), window, mode='valid')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+    flat = avg_loss == 0
+    rsi[flat] = np.where(avg_gain[flat] > 0, 100.0, 50.0)
+    out[period:] = rsi
+    return out
+
+def stdev_series(prices: Sequence[float], period: int = 100, chunk: int = 1024) -> np.ndarray:
+    """Ряд выборочного стандартного отклонения в скользящем окне (0 для одной цены, как у StdDev).
+
+    Суммы x и x² по окну берутся разностью кумулятивных сумм, O(n) при любом
+    периоде. Суммы перезапускаются каждые chunk окон и считаются от первой
+    цены части, чтобы на больших ценах и длинных рядах не терялась точность
+    (погрешность растёт с chunk).
+    """
+    prices = _as_array(prices)
+    n = len(prices)
+    out = np.zeros(n)
+    if period < 2:
+        return out  # В окне одна цена
+    head = min(period - 1, n)
+    if head > 1:  # Окно ещё не заполнено: отклонение всех цен от начала ряда
+        x = prices[:head] - prices[0]
+        count = np.arange(1, head + 1)
+        s1, s2 = np.cumsum(x), np.cumsum(x * x)
+        out[1:head] = np.sqrt(np.maximum((s2[1:] - s1[1:] * s1[1:] / count[1:]) / (count[1:] - 1), 0.0))
+    for start in range(0, n - period + 1, chunk):
+        part = prices[start:start + chunk + period - 1]
+        x = part - part[0]
+        s1 = np.concatenate(([0.0], np.cumsum(x)))
+        s2 = np.concatenate(([0.0], np.cumsum(x * x)))
+        w1 = s1[period:] - s1[:-period]
+        w2 = s2[period:] - s2[:-period]
+        var = (w2 - w1 * w1 / period) / (period - 1)
+        out[start + head:start + head + len(var)] = np.sqrt(np.maximum(var, 0.0))
+    return out
+
+def volatility_series(prices: Sequence[float], period: int = 100) -> np.ndarray:
+    """Ряд относительной волатильности stdev / mean, как в RiskManager.is_high_volatility."""
+    return stdev_series(prices, period) / sma_series(prices, period)
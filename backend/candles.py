@@ -0,0 +1,154 @@
+"""Свечи OHLCV по потоку сделок на нескольких таймфреймах одновременно."""
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+import threading
+import time
+
+if TYPE_CHECKING:  # NumPy загружается вместе с RingBuffer при первой серии свечей, не при импорте
+    import numpy as np
+
+TIMEFRAMES = {"1s": 1, "5s": 5, "1m": 60, "5m": 300}
+FIELDS = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+class CandleSeries:
+    """Текущая свеча и закрытые свечи одной пары на одном таймфрейме."""
+    __slots__ = ('symbol', 'timeframe', 'seconds', 'start', 'open', 'high', 'low', 'close', 'volume',
+                 'trades', 'history', 'subscribers')
+
+    def __init__(self, symbol: str, timeframe: str, history: int):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.seconds = TIMEFRAMES[timeframe]
+        self.start = None  # Начало текущей свечи; None - сделок ещё не было
+        self.open = self.high = self.low = self.close = 0.0
+        self.volume = 0.0
+        self.trades = 0
+        from .ring_buffer import RingBuffer
+        self.history = RingBuffer(history, FIELDS)  # Закрытые свечи, старые вытесняются
+        self.subscribers: List[Callable[[Dict], None]] = []
+
+    def bar(self) -> Dict:
+        return {"symbol": self.symbol, "timeframe": self.timeframe, "time": self.start, "open": self.open,
+                "high": self.high, "low": self.low, "close": self.close, "volume": self.volume,
+                "trades": self.trades}
+
+    def add(self, ts: float, price: float, qty: float) -> Optional[Dict]:
+        """Учёт сделки; возвращает закрытую свечу, если сделка начала новую."""
+        start = ts - ts % self.seconds
+        closed = None
+        if self.start is not None and start > self.start:
+            closed = self.finish()
+        elif self.start is not None and start < self.start:
+            start = self.start  # Опоздавшая сделка учитывается в текущей свече
+        if self.start is None:
+            self.start = start
+            self.open = self.high = self.low = price
+            self.volume = 0.0
+            self.trades = 0
+        elif price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += qty
+        self.trades += 1
+        return closed
+
+    def finish(self) -> Dict:
+        """Закрытие текущей свечи (пустые интервалы без сделок не создаются)."""
+        bar = self.bar()
+        self.history.append(self.start, self.open, self.high, self.low, self.close, self.volume)
+        self.start = None
+        return bar
+
+class CandleAggregator:
+    """Построение свечей по сделкам WebSocket для многих пар и таймфреймов.
+
+    Свеча закрывается первой сделкой следующего интервала или вызовом
+    close_due() по часам; подписчики получают закрытую свечу. История
+    закрытых свечей ограничена history штуками на ряд.
+    """
+
+    def __init__(self, timeframes: Iterable[str] = tuple(TIMEFRAMES), history: int = 1000):
+        unknown = [tf for tf in timeframes if tf not in TIMEFRAMES]
+        if unknown:
+            raise ValueError(f"Неизвестные таймфреймы: {', '.join(unknown)}")
+        self.timeframes = tuple(timeframes)
+        self.history = history
+        self.series: Dict[str, Tuple[CandleSeries, ...]] = {}
+        self.lock = threading.Lock()
+
+    def _series(self, symbol: str) -> Tuple[CandleSeries, ...]:
+        series = self.series.get(symbol)
+        if series is None:
+            series = self.series[symbol] = tuple(CandleSeries(symbol, tf, self.history) for tf in self.timeframes)
+        return series
+
+    def get(self, symbol: str, timeframe: str) -> CandleSeries:
+        """Ряд свечей пары на таймфрейме."""
+        if timeframe not in self.timeframes:
+            raise ValueError(f"Таймфрейм {timeframe} не строится")
+        with self.lock:
+            return self._series(symbol)[self.timeframes.index(timeframe)]
+
+    def on_trade(self, data: Dict) -> None:
+        """Обработчик сделки из WebSocket (время из поля 'time', иначе время приёма)."""
+        ts = data.get('time')
+        ts = float(ts) if ts is not None else time.time()
+        if ts > 1e11:
+            ts /= 1000  # Время в миллисекундах
+        price = float(data['price'])
+        qty = float(data.get('qty', data.get('volume', 0)) or 0)
+        closed = []
+        with self.lock:
+            for series in self._series(data['symbol']):
+                bar = series.add(ts, price, qty)
+                if bar is not None:
+                    closed.append((series, bar))
+        self._notify(closed)
+
+    def close_due(self, now: Optional[float] = None) -> None:
+        """Закрытие свечей, интервал которых уже истёк (для пар без новых сделок)."""
+        now = time.time() if now is None else now
+        closed = []
+        with self.lock:
+            for series_list in self.series.values():
+                for series in series_list:
+                    if series.start is not None and now >= series.start + series.seconds:
+                        closed.append((series, series.finish()))
+        self._notify(closed)
+
+    def _notify(self, closed: List) -> None:
+        for series, bar in closed:
+            for callback in series.subscribers:
+                try:
+                    callback(bar)
+                except Exception as e:
+                    print(f"Ошибка подписчика свечей {series.symbol} {series.timeframe}: {e}")
+
+    def subscribe(self, symbol: str, timeframe: str, callback: Callable[[Dict], None]) -> None:
+        """Вызов callback(свеча) при закрытии каждой свечи пары на таймфрейме."""
+        self.get(symbol, timeframe).subscribers.append(callback)
+
+    def unsubscribe(self, symbol: str, timeframe: str, callback: Callable[[Dict], None]) -> None:
+        subscribers = self.get(symbol, timeframe).subscribers
+        if callback in subscribers:
+            subscribers.remove(callback)
+
+    def bars(self, symbol: str, timeframe: str, n: Optional[int] = None) -> Dict[str, 'np.ndarray']:
+        """Согласованная копия последних n закрытых свечей (колонки time, open, high, low, close, volume)."""
+        return self.get(symbol, timeframe).history.snapshot(n)
+
+    def closes(self, symbol: str, timeframe: str, n: Optional[int] = None) -> 'np.ndarray':
+        """Цены закрытия последних n свечей без копирования."""
+        return self.get(symbol, timeframe).history.view('close', n)
+
+    def current(self, symbol: str, timeframe: str) -> Optional[Dict]:
+        """Незакрытая свеча (None, если в текущем интервале сделок нет)."""
+        with self.lock:
+            series = self._series(symbol)[self.timeframes.index(timeframe)]
+            return series.bar() if series.start is not None else None
+
+    def load_trades(self, symbol: str, trades: Iterable[Dict]) -> None:
+        """Построение истории из прошлых сделок с полем 'time' (например, из REST при запуске)."""
+        for trade in sorted((t for t in trades if t.get('time') is not None), key=lambda t: float(t['time'])):
+            self.on_trade({**trade, 'symbol': symbol})
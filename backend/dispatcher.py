@@ -0,0 +1,104 @@
+"""Быстрый разбор сообщений WebSocket и доставка событий обработчикам в их потоках."""
+from collections import deque
+from typing import Callable, Dict, Optional
+import json
+import re
+import threading
+import time
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:  # orjson не обязателен
+    loads = json.loads
+
+# Поле type верхнего уровня, если оно первое в объекте: вложенное "type" (например,
+# "type": "limit" у ордера) так не найдётся
+_TYPE_RE = re.compile(r'\s*\{\s*"type"\s*:\s*"([^"]*)"')
+_TYPE_RE_BYTES = re.compile(rb'\s*\{\s*"type"\s*:\s*"([^"]*)"')
+
+CONFLATE = "conflate"        # Хранить только последнее событие по (type, symbol)
+DROP_OLDEST = "drop_oldest"  # При переполнении выбрасывать самые старые
+DROP_NEWEST = "drop_newest"  # При переполнении не принимать новые
+
+def sniff_type(message) -> Optional[str]:
+    """Тип сообщения по первому ключу верхнего уровня без полного разбора JSON.
+
+    None, если сообщение не начинается с поля type: тогда его нужно
+    разобрать целиком.
+    """
+    if isinstance(message, bytes):
+        match = _TYPE_RE_BYTES.match(message)  # Без декодирования всего кадра
+        return match.group(1).decode('utf-8', 'replace') if match else None
+    match = _TYPE_RE.match(message)
+    return match.group(1) if match else None
+
+class EventConsumer:
+    """Обработчик событий в собственном потоке с ограниченной очередью.
+
+    Поток приёма WebSocket только кладёт событие в очередь и никогда не
+    ждёт обработчик; при переполнении действует политика policy.
+    """
+
+    def __init__(self, name: str, callback: Callable[[Dict], None], policy: str = DROP_OLDEST,
+                 maxsize: int = 10000, metrics=None):
+        self.name = name
+        self.callback = callback
+        self.policy = policy
+        self.maxsize = maxsize
+        self.queue = deque()
+        self.conflated: Dict = {}
+        self.dropped = 0
+        self.metrics = metrics  # LatencyRecorder: время ожидания в очереди
+        self.condition = threading.Condition()
+        self.running = True
+        self.thread = None
+
+    def put(self, event: Dict) -> None:
+        """Постановка события в очередь."""
+        with self.condition:
+            if self.policy == CONFLATE:
+                self.conflated[(event.get('type'), event.get('symbol'))] = event
+            else:
+                if len(self.queue) >= self.maxsize:
+                    self.dropped += 1
+                    if self.policy == DROP_NEWEST:
+                        return
+                    self.queue.popleft()
+                self.queue.append(event)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name=f"consumer-{self.name}", daemon=True)
+                self.thread.start()
+            self.condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                while self.running and not self.queue and not self.conflated:
+                    self.condition.wait()
+                if not self.running and not self.queue and not self.conflated:
+                    return
+                batch = list(self.queue)
+                self.queue.clear()
+                if self.conflated:
+                    batch.extend(self.conflated.values())
+                    self.conflated = {}
+            for event in batch:
+                if self.metrics is not None and 'recv_ns' in event:
+                    self.metrics.record(f"queue.{self.name}", time.perf_counter_ns() - event['recv_ns'])
+                try:
+                    self.callback(event)
+                except Exception as e:
+                    print(f"Ошибка обработчика {self.name}: {e}")
+
+    def stop(self) -> None:
+        """Остановка потока после обработки оставшихся событий (следующий put запустит его снова)."""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+            thread = self.thread
+        if thread is not None:
+            thread.join()
+        with self.condition:
+            self.thread = None
+            self.running = True
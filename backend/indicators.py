@@ -1,44 +1,161 @@
+from collections import deque
 from typing import List
-import statistics
+import math
 
-def calculate_rsi(prices: List[float], period: int = 14) -> float:
-    """Расчёт индекса относительной силы (RSI)."""
-    if len(prices) < period + 1:
-        return 50.0  # Нейтральное значение, если данных мало
-
-    gains = []
-    losses = []
-    for i in range(1, len(prices)):
-        diff = prices[i] - prices[i-1]
-        if diff > 0:
-            gains.append(diff)
-            losses.append(0)
+class SMA:
+    """Потоковая простая скользящая средняя (O(1) на тик)."""
+
+    def __init__(self, period: int = 20):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.updates = 0
+
+    def update(self, price: float) -> float:
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(price)
+        self.total += price
+        self.updates += 1
+        if self.updates % self.period == 0:
+            self.total = math.fsum(self.window)  # Сброс накопленной ошибки округления
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self.total / len(self.window) if self.window else 0.0
+
+class EMA:
+    """Потоковая экспоненциальная скользящая средняя (O(1) на тик)."""
+
+    def __init__(self, period: int = 20):
+        self.period = period
+        self.k = 2 / (period + 1)
+        self.ema = None
+        self.count = 0
+        self.total = 0.0
+
+    def update(self, price: float) -> float:
+        self.ema = price if self.ema is None else price * self.k + self.ema * (1 - self.k)
+        if self.count < self.period:
+            self.total += price
+        self.count += 1
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if self.count < self.period:
+            return self.total / self.count if self.count else 0.0
+        return self.ema
+
+class RSI:
+    """Потоковый индекс относительной силы (O(1) на тик).
+
+    По умолчанию усредняет последние period изменений, как calculate_rsi;
+    при wilder=True использует сглаживание Уайлдера.
+    """
+
+    def __init__(self, period: int = 14, wilder: bool = False):
+        self.period = period
+        self.wilder = wilder
+        self.prev = None
+        self.gains = deque(maxlen=period)
+        self.losses = deque(maxlen=period)
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.diffs = 0
+
+    def update(self, price: float) -> float:
+        if self.prev is not None:
+            diff = price - self.prev
+            gain = diff if diff > 0 else 0.0
+            loss = -diff if diff <= 0 else 0.0
+            self.diffs += 1
+            if self.wilder and self.diffs > self.period:
+                self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+                self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+            else:
+                if len(self.gains) == self.period:
+                    self.gain_sum -= self.gains[0]
+                    self.loss_sum -= self.losses[0]
+                self.gains.append(gain)
+                self.losses.append(loss)
+                self.gain_sum += gain
+                self.loss_sum += loss
+                if self.diffs % self.period == 0:
+                    self.gain_sum = math.fsum(self.gains)
+                    self.loss_sum = math.fsum(self.losses)
+                self.avg_gain = self.gain_sum / len(self.gains)
+                self.avg_loss = self.loss_sum / len(self.losses)
+        self.prev = price
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if self.diffs < self.period:
+            return 50.0  # Нейтральное значение, если данных мало
+        if self.avg_loss == 0:
+            return 100.0 if self.avg_gain > 0 else 50.0
+        rs = self.avg_gain / self.avg_loss
+        return 100 - (100 / (1 + rs))
+
+class StdDev:
+    """Потоковое выборочное стандартное отклонение в скользящем окне."""
+
+    def __init__(self, period: int = 100):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.updates = 0
+
+    def update(self, price: float) -> float:
+        n = len(self.window)
+        if n < self.period:
+            # Алгоритм Уэлфорда, пока окно не заполнено
+            delta = price - self.mean
+            self.mean += delta / (n + 1)
+            self.m2 += delta * (price - self.mean)
         else:
-            losses.append(-diff)
-            gains.append(0)
+            old = self.window[0]
+            old_mean = self.mean
+            self.mean += (price - old) / n
+            self.m2 += (price - old) * (price - self.mean + old - old_mean)
+        self.window.append(price)
+        self.updates += 1
+        if self.updates % self.period == 0:
+            self._recompute()
+        return self.value
 
-    avg_gain = statistics.mean(gains[-period:]) if gains else 0
-    avg_loss = statistics.mean(losses[-period:]) if losses else 0
+    def _recompute(self) -> None:
+        """Точный пересчёт по окну, чтобы ошибка округления не накапливалась."""
+        self.mean = math.fsum(self.window) / len(self.window)
+        self.m2 = math.fsum((p - self.mean) ** 2 for p in self.window)
 
-    if avg_loss == 0:
-        return 100.0 if avg_gain > 0 else 50.0
+    @property
+    def value(self) -> float:
+        n = len(self.window)
+        return math.sqrt(max(self.m2, 0.0) / (n - 1)) if n > 1 else 0.0
 
-    rs = avg_gain / avg_loss
-    return 100 - (100 / (1 + rs))
+def calculate_rsi(prices: List[float], period: int = 14) -> float:
+    """Расчёт индекса относительной силы (RSI)."""
+    rsi = RSI(period)
+    for price in prices[-(period + 1):]:
+        rsi.update(price)
+    return rsi.value
 
 def calculate_sma(prices: List[float], period: int = 20) -> float:
     """Расчёт простой скользящей средней (SMA)."""
-    if len(prices) < period:
-        return statistics.mean(prices) if prices else 0.0
-    return statistics.mean(prices[-period:])
+    sma = SMA(period)
+    for price in prices[-period:]:
+        sma.update(price)
+    return sma.value
 
 def calculate_ema(prices: List[float], period: int = 20) -> float:
     """Расчёт экспоненциальной скользящей средней (EMA)."""
-    if len(prices) < period:
-        return statistics.mean(prices) if prices else 0.0
-
-    k = 2 / (period + 1)
-    ema = prices[0]
-    for price in prices[1:]:
-        ema = price * k + ema * (1 - k)
-    return ema
\ No newline at end of file
+    ema = EMA(period)
+    for price in prices:
+        ema.update(price)
+    return ema.value
@@ -0,0 +1,137 @@
+"""Гистограммы задержек по этапам: от приёма тика до подтверждения ордера."""
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+import json
+import threading
+import time
+
+SUB_BITS = 7  # Точность корзин ~1% (как у HDR-гистограмм с 2 значащими цифрами)
+HALF = 1 << (SUB_BITS - 1)
+
+class Histogram:
+    """Лог-линейная гистограмма значений в наносекундах с O(1) записью."""
+
+    def __init__(self):
+        self.counts: List[int] = []
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    @staticmethod
+    def _index(value: int) -> int:
+        shift = value.bit_length() - SUB_BITS
+        if shift <= 0:
+            return value
+        return shift * HALF + (value >> shift)
+
+    @staticmethod
+    def _value(index: int) -> int:
+        """Середина корзины."""
+        if index < (1 << SUB_BITS):
+            return index
+        shift = index // HALF - 1
+        top = index - shift * HALF
+        return (top << shift) + (1 << shift) // 2
+
+    def record(self, value: int) -> None:
+        value = max(int(value), 0)
+        index = self._index(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def percentile(self, q: float) -> int:
+        """Значение q-го процентиля (0-100)."""
+        if self.count == 0:
+            return 0
+        target = max(1, int(round(self.count * q / 100)))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(self._value(index), self.max)
+        return self.max
+
+class LatencyRecorder:
+    """Набор гистограмм по этапам и эндпоинтам со снимками и периодическим сбросом в файл."""
+
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = {}
+        self.lock = threading.Lock()
+        self.dump_thread = None
+        self.dump_path = None
+        self.dump_stop = threading.Event()
+
+    def record(self, stage: str, ns: int) -> None:
+        """Запись длительности этапа в наносекундах."""
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.record(ns)
+
+    def record_since(self, stage: str, start_ns: int) -> None:
+        """Запись времени от start_ns (time.perf_counter_ns) до текущего момента."""
+        self.record(stage, time.perf_counter_ns() - start_ns)
+
+    @contextmanager
+    def measure(self, stage: str):
+        """Замер длительности блока кода."""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter_ns() - start)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Статистика по этапам в микросекундах: count, mean, p50, p99, p999, max."""
+        with self.lock:
+            return {
+                stage: {
+                    "count": h.count,
+                    "mean": h.total / h.count / 1000 if h.count else 0.0,
+                    "p50": h.percentile(50) / 1000,
+                    "p99": h.percentile(99) / 1000,
+                    "p999": h.percentile(99.9) / 1000,
+                    "max": h.max / 1000,
+                }
+                for stage, h in self.histograms.items()
+            }
+
+    def reset(self) -> None:
+        with self.lock:
+            self.histograms.clear()
+
+    def start_dump(self, path: str, interval: float = 60.0, reset: bool = False) -> None:
+        """Периодическая дозапись снимков в файл (JSON по строке на снимок)."""
+        if self.dump_thread is not None:
+            return
+        self.dump_path = path
+        self.dump_stop.clear()
+
+        def run():
+            while not self.dump_stop.wait(interval):
+                self.dump(path)
+                if reset:
+                    self.reset()
+
+        self.dump_thread = threading.Thread(target=run, name="latency-dump", daemon=True)
+        self.dump_thread.start()
+
+    def stop_dump(self) -> None:
+        """Остановка периодической записи с финальным снимком."""
+        if self.dump_thread is not None:
+            self.dump_stop.set()
+            self.dump_thread.join()
+            self.dump_thread = None
+            self.dump(self.dump_path)
+
+    def dump(self, path: str) -> None:
+        """Дозапись текущего снимка в файл."""
+        with open(path, 'a') as f:
+            f.write(json.dumps({"time": time.time(), "stages": self.snapshot()}) + "\n")
@@ -0,0 +1,358 @@
+"""Учёт позиций и PnL по фактическим исполнениям ордеров.
+
+Позиция хранит открытые лоты и накопленные суммы, поэтому реализованный
+и нереализованный PnL считаются за O(1) без запросов к бирже. Исполнения
+дописываются в журнал, а периодический снимок состояния заменяет журнал
+целиком: файл не растёт за время работы, и после перезапуска читаются
+только снимок и исполнения после него.
+"""
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+import json
+import os
+import threading
+import time
+from .orderbook import OrderBook
+
+FIFO = "fifo"  # Закрытие начиная с самых старых лотов
+AVERAGE = "average"  # Закрытие по средней цене позиции
+EPSILON = 1e-12
+
+class Lot:
+    """Открытая часть позиции: количество со знаком (< 0 - короткая), цена и время входа."""
+    __slots__ = ('quantity', 'price', 'time')
+
+    def __init__(self, quantity: float, price: float, time: float):
+        self.quantity = quantity
+        self.price = price
+        self.time = time
+
+class Position:
+    """Позиция по паре: лоты, объём со знаком, стоимость входа, реализованный PnL и комиссии."""
+    __slots__ = ('symbol', 'method', 'lots', 'quantity', 'cost', 'realized', 'fees', 'fills')
+
+    def __init__(self, symbol: str, method: str = FIFO):
+        self.symbol = symbol
+        self.method = method
+        self.lots: Deque[Lot] = deque()
+        self.quantity = 0.0  # Сумма количеств лотов
+        self.cost = 0.0      # Сумма количество * цена по лотам
+        self.realized = 0.0  # Без учёта комиссий
+        self.fees = 0.0
+        self.fills = 0
+
+    @property
+    def avg_price(self) -> float:
+        return self.cost / self.quantity if abs(self.quantity) > EPSILON else 0.0
+
+    def apply(self, side: str, quantity: float, price: float, fee: float = 0.0, ts: float = 0.0) -> float:
+        """Учёт исполнения; возвращает реализованный им PnL."""
+        signed = quantity if side == "buy" else -quantity
+        self.fees += fee
+        self.fills += 1
+        realized = 0.0
+        lots = self.lots
+        # Встречное исполнение сначала закрывает лоты, остаток открывает позицию в другую сторону
+        while lots and abs(signed) > EPSILON and (signed > 0) != (self.quantity > 0):
+            lot = lots[0]
+            if self.method == AVERAGE:
+                lot.price = self.avg_price
+            close = min(abs(signed), abs(lot.quantity))
+            direction = 1.0 if lot.quantity > 0 else -1.0
+            realized += (price - lot.price) * close * direction
+            lot.quantity -= close * direction
+            self.quantity -= close * direction
+            self.cost -= lot.price * close * direction
+            signed += close * direction
+            if abs(lot.quantity) <= EPSILON:
+                lots.popleft()
+        if not lots:
+            self.quantity = self.cost = 0.0  # Без накопления ошибок округления
+        if abs(signed) > EPSILON:
+            if self.method == AVERAGE and lots:
+                lot = lots[0]
+                lot.quantity += signed
+                lot.price = (self.cost + signed * price) / lot.quantity
+            else:
+                lots.append(Lot(signed, price, ts))
+            self.quantity += signed
+            self.cost += signed * price
+        self.realized += realized
+        return realized
+
+    def unrealized(self, mark: Optional[float]) -> float:
+        """PnL открытой части по цене mark."""
+        if mark is None or abs(self.quantity) <= EPSILON:
+            return 0.0
+        return mark * self.quantity - self.cost
+
+    def state(self) -> Dict:
+        return {"method": self.method, "lots": [[lot.quantity, lot.price, lot.time] for lot in self.lots],
+                "realized": self.realized, "fees": self.fees, "fills": self.fills}
+
+    @classmethod
+    def from_state(cls, symbol: str, state: Dict) -> 'Position':
+        position = cls(symbol, state.get("method", FIFO))
+        for quantity, price, ts in state["lots"]:
+            position.lots.append(Lot(quantity, price, ts))
+            position.quantity += quantity
+            position.cost += quantity * price
+        position.realized = state["realized"]
+        position.fees = state["fees"]
+        position.fills = state.get("fills", 0)
+        return position
+
+class Ledger:
+    """Позиции и PnL счёта по исполнениям ордеров всех стратегий.
+
+    Нереализованный PnL длинной позиции оценивается по лучшему биду
+    локального стакана, короткой - по лучшему аску; без стакана - по
+    последней сделке из потока. Повторно полученный ордер или исполнение
+    (ответ REST, события потока счёта, сверка после разрыва) не учитывается
+    дважды: по каждому ордеру хранится уже учтённый исполненный объём, и
+    любой источник добавляет только объём сверх него. События ордеров и
+    исполнений обрабатываются в разных потоках, поэтому порядок их прихода
+    на результат не влияет.
+    """
+
+    def __init__(self, method: str = FIFO, books: Optional[Dict[str, OrderBook]] = None, max_orders: int = 10000):
+        if method not in (FIFO, AVERAGE):
+            raise ValueError(f"Неизвестный метод учёта: {method}")
+        self.method = method
+        self.books = books if books is not None else {}  # Локальные стаканы клиента API
+        self.max_orders = max_orders
+        self.positions: Dict[str, Position] = {}
+        self.marks: Dict[str, float] = {}  # Последняя цена сделки по паре
+        self.orders: 'OrderedDict[str, Tuple[int, float, float]]' = OrderedDict()  # id -> (исполнений, объём, комиссия)
+        self.lock = threading.RLock()
+        self.journal = None
+        self.journal_path: Optional[str] = None
+        self.snapshot_thread = None
+        self.snapshot_stop = threading.Event()
+
+    def position(self, symbol: str) -> Position:
+        position = self.positions.get(symbol)
+        if position is None:
+            position = self.positions[symbol] = Position(symbol, self.method)
+        return position
+
+    def on_fill(self, symbol: str, side: str, quantity: float, price: float, fee: float = 0.0,
+                order_id: Optional[str] = None, ts: Optional[float] = None) -> float:
+        """Учёт одного исполнения; возвращает реализованный PnL."""
+        ts = time.time() if ts is None else ts
+        with self.lock:
+            realized = self.position(symbol).apply(side, quantity, price, fee, ts)
+            if order_id is not None:
+                order_id = str(order_id)
+                count, filled, fees = self.orders.pop(order_id, (0, 0.0, 0.0))
+                self.orders[order_id] = (count + 1, filled + quantity, fees + fee)
+                if len(self.orders) > self.max_orders:
+                    self.orders.popitem(last=False)
+            if self.journal is not None:
+                self.journal.write(json.dumps({"type": "fill", "symbol": symbol, "side": side, "quantity": quantity,
+                                               "price": price, "fee": fee, "order_id": order_id,
+                                               "time": ts}) + "\n")
+                self.journal.flush()
+        return realized
+
+    def on_order(self, order: Dict) -> int:
+        """Учёт новых исполнений ордера из ответа биржи; возвращает их число.
+
+        Берётся список 'fills' (цена, количество, комиссия): учитывается часть
+        списка сверх уже учтённого объёма. Если списка нет - прирост поля
+        'filled' по средней цене ('avg_price' или 'price').
+        """
+        order_id = order.get("order_id")
+        symbol, side = order.get("symbol"), order.get("side")
+        if order_id is None or symbol is None or side is None:
+            return 0
+        order_id = str(order_id)
+        with self.lock:
+            _, filled, fees = self.orders.get(order_id, (0, 0.0, 0.0))
+            fills = order.get("fills")
+            if fills is not None:
+                booked = 0
+                cumulative = 0.0
+                for fill in fills:
+                    quantity = float(fill["quantity"])
+                    if self._book_part(symbol, side, order_id, fill, cumulative + quantity, filled) is not None:
+                        booked += 1
+                    cumulative += quantity
+                return booked
+            quantity = float(order.get("filled", 0.0) or 0.0) - filled
+            price = order.get("avg_price") or order.get("price")
+            if quantity <= EPSILON or not price:
+                return 0
+            fee = max(float(order.get("fee", 0.0) or 0.0) - fees, 0.0)
+            self.on_fill(symbol, side, quantity, float(price), fee, order_id)
+            return 1
+
+    def on_fill_event(self, fill: Dict) -> float:
+        """Исполнение из потока счёта; 'filled' - исполненный объём ордера с учётом этого исполнения.
+
+        Учитывается только часть исполнения сверх уже учтённого объёма
+        (например, из ответа REST на ордер). Событие без 'filled' нельзя
+        сверить с другими источниками: оно ждёт состояния ордера целиком
+        (on_order по событию order или сверке после разрыва).
+        """
+        order_id = fill.get("order_id")
+        if order_id is None:
+            return self.on_fill(fill["symbol"], fill["side"], float(fill["quantity"]), float(fill["price"]),
+                                float(fill.get("fee", 0.0)), None, fill.get("time"))
+        if fill.get("filled") is None:
+            return 0.0
+        order_id = str(order_id)
+        with self.lock:
+            filled = self.orders.get(order_id, (0, 0.0, 0.0))[1]
+            realized = self._book_part(fill["symbol"], fill["side"], order_id, fill, float(fill["filled"]), filled)
+            return realized or 0.0
+
+    def _book_part(self, symbol: str, side: str, order_id: str, fill: Dict, upto: float,
+                   filled: float) -> Optional[float]:
+        """Учёт части исполнения, которая заканчивается на объёме ордера upto, сверх учтённого filled.
+
+        Возвращает реализованный PnL или None, если всё исполнение уже учтено.
+        """
+        quantity = float(fill["quantity"])
+        part = upto - max(filled, upto - quantity)
+        if part <= EPSILON or quantity <= 0:
+            return None
+        return self.on_fill(symbol, side, part, float(fill["price"]), float(fill.get("fee", 0.0)) * part / quantity,
+                            order_id, fill.get("time"))
+
+    def knows(self, order_id: str) -> bool:
+        """Учитывались ли уже исполнения ордера."""
+        with self.lock:
+            return str(order_id) in self.orders
+
+    def on_trade(self, data: Dict) -> None:
+        """Последняя цена сделки из WebSocket (оценка, пока локального стакана нет)."""
+        self.marks[data['symbol']] = float(data['price'])
+
+    def mark(self, symbol: str) -> Optional[float]:
+        """Цена закрытия позиции: бид для длинной, аск для короткой, иначе последняя сделка."""
+        position = self.positions.get(symbol)
+        book = self.books.get(symbol)
+        if book is not None and book.synced and position is not None:
+            level = book.best_bid() if position.quantity >= 0 else book.best_ask()
+            if level is not None:
+                return level[0]
+        return self.marks.get(symbol)
+
+    def pnl(self, symbol: str) -> Dict:
+        """Позиция и PnL по паре без обращения к сети."""
+        with self.lock:
+            position = self.positions.get(symbol)
+            if position is None:
+                return {"symbol": symbol, "quantity": 0.0, "avg_price": 0.0, "realized": 0.0, "unrealized": 0.0,
+                        "fees": 0.0, "net": 0.0, "mark": self.marks.get(symbol)}
+            mark = self.mark(symbol)
+            unrealized = position.unrealized(mark)
+            return {"symbol": symbol, "quantity": position.quantity, "avg_price": position.avg_price,
+                    "realized": position.realized, "unrealized": unrealized, "fees": position.fees,
+                    "net": position.realized + unrealized - position.fees, "mark": mark}
+
+    def total(self) -> Dict[str, float]:
+        """Суммарный PnL по всем парам."""
+        total = {"realized": 0.0, "unrealized": 0.0, "fees": 0.0, "net": 0.0}
+        for symbol in list(self.positions):
+            pnl = self.pnl(symbol)
+            for key in total:
+                total[key] += pnl[key]
+        return total
+
+    def lots(self, symbol: str) -> List[Dict]:
+        """Открытые лоты пары."""
+        with self.lock:
+            position = self.positions.get(symbol)
+            lots = list(position.lots) if position is not None else []
+            return [{"symbol": symbol, "quantity": lot.quantity, "price": lot.price, "time": lot.time}
+                    for lot in lots]
+
+    # --- Журнал и снимки ---
+
+    def open(self, path: str, snapshot_interval: Optional[float] = 60.0) -> None:
+        """Восстановление из журнала (последний снимок и исполнения после него) и продолжение записи."""
+        self.restore(path)
+        with self.lock:
+            self.journal = open(path, 'a')
+            self.journal_path = path
+        self.snapshot()
+        if snapshot_interval:
+            self.start_snapshots(snapshot_interval)
+
+    def restore(self, path: str) -> None:
+        """Состояние по журналу (до open()); недописанная последняя строка пропускается."""
+        try:
+            with open(path) as f:
+                records = []
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get("type") == "snapshot":
+                        records = [record]
+                    elif record.get("type") == "fill":
+                        records.append(record)
+        except FileNotFoundError:
+            return
+        with self.lock:
+            self.positions.clear()
+            self.orders.clear()
+            for record in records:
+                if record["type"] == "snapshot":
+                    for symbol, state in record["positions"].items():
+                        self.positions[symbol] = Position.from_state(symbol, state)
+                    for order_id, (count, filled, fees) in record.get("orders", {}).items():
+                        self.orders[order_id] = (count, filled, fees)
+                else:
+                    self.on_fill(record["symbol"], record["side"], record["quantity"], record["price"],
+                                 record["fee"], record.get("order_id"), record.get("time"))
+
+    def snapshot(self) -> None:
+        """Снимок позиций вместо журнала: исполнения до него в снимке уже учтены.
+
+        Снимок пишется во временный файл и атомарно подменяет журнал, так что
+        при аварийной остановке остаётся либо старый журнал, либо новый.
+        """
+        with self.lock:
+            if self.journal is None:
+                return
+            record = {"type": "snapshot", "time": time.time(),
+                      "positions": {symbol: p.state() for symbol, p in self.positions.items()},
+                      "orders": {order_id: list(state) for order_id, state in self.orders.items()}}
+            path = self.journal_path
+            with open(path + ".tmp", 'w') as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.journal.close()
+            os.replace(path + ".tmp", path)
+            self.journal = open(path, 'a')
+
+    def start_snapshots(self, interval: float = 60.0) -> None:
+        """Периодические снимки в фоновом потоке."""
+        if self.snapshot_thread is not None:
+            return
+        self.snapshot_stop.clear()
+
+        def run():
+            while not self.snapshot_stop.wait(interval):
+                self.snapshot()
+
+        self.snapshot_thread = threading.Thread(target=run, name="ledger-snapshot", daemon=True)
+        self.snapshot_thread.start()
+
+    def close(self) -> None:
+        """Остановка снимков, финальный снимок и закрытие журнала."""
+        if self.snapshot_thread is not None:
+            self.snapshot_stop.set()
+            self.snapshot_thread.join()
+            self.snapshot_thread = None
+        self.snapshot()
+        with self.lock:
+            if self.journal is not None:
+                self.journal.close()
+                self.journal = None
+                self.journal_path = None
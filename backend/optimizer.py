@@ -0,0 +1,120 @@
+"""Параллельный подбор параметров стратегии по бэктестам.
+
+Тики хранятся в файле .npy (колонки time, price) или берутся прямо из
+файла сделок TickRecorder (.bin) и открываются в каждом процессе через
+mmap, поэтому набор данных не копируется и не сериализуется между
+процессами. Результаты дописываются в CSV по мере готовности.
+"""
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Optional, Sequence
+import csv
+import itertools
+import random
+import numpy as np
+from .backtest import Backtester
+from .recorder import open_records
+
+TICK_DTYPE = np.dtype([('time', '<f8'), ('price', '<f8')])
+RISK_PARAMS = ('max_position', 'min_spread', 'max_loss')
+STRATEGY_PARAMS = ('rsi_buy', 'rsi_sell', 'rsi_period', 'sma_period', 'timeframe')
+METRICS = ('pnl', 'return', 'max_drawdown', 'trades', 'fees', 'drift')
+CHUNK = 65536  # Тиков за один перевод колонок mmap в списки Python
+
+def save_ticks(path: str, times: Sequence[float], prices: Sequence[float]) -> None:
+    """Сохранение тиков в формате, пригодном для mmap."""
+    ticks = np.empty(len(times), dtype=TICK_DTYPE)
+    ticks['time'] = times
+    ticks['price'] = prices
+    np.save(path, ticks)
+
+def load_ticks(path: str) -> np.ndarray:
+    """Открытие тиков через mmap (без чтения файла в память): .npy из save_ticks или .bin записи сделок."""
+    if path.endswith('.bin'):
+        return open_records(path)
+    return np.load(path, mmap_mode='r')
+
+def tick_events(ticks: np.ndarray, symbol: str, chunk: int = CHUNK) -> Iterator[Dict]:
+    """События сделок для Backtester из массива тиков.
+
+    Колонки переводятся в списки Python кусками по chunk тиков, а не
+    целиком: иначе каждый процесс держал бы свою копию всего набора.
+    """
+    for start in range(0, len(ticks), chunk):
+        part = ticks[start:start + chunk]
+        for t, price in zip(part['time'].tolist(), part['price'].tolist()):
+            yield {'type': 'trade', 'symbol': symbol, 'time': t, 'price': price}
+
+def grid_search(space: Dict[str, Sequence]) -> List[Dict]:
+    """Все сочетания значений параметров."""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+def random_search(space: Dict, n: int, seed: Optional[int] = None) -> List[Dict]:
+    """Случайные сочетания: список - выбор значения, кортеж (min, max) - равномерно в диапазоне."""
+    rng = random.Random(seed)
+    combos = []
+    for _ in range(n):
+        params = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                params[name] = rng.randint(low, high) if isinstance(low, int) and isinstance(high, int) \
+                    else rng.uniform(low, high)
+            else:
+                params[name] = rng.choice(list(values))
+        combos.append(params)
+    return combos
+
+_worker: Dict = {}
+
+def _init_worker(path: str, symbol: str, balances: Dict[str, float], settings: Dict) -> None:
+    """Инициализация процесса: общий набор тиков открывается через mmap один раз."""
+    _worker['ticks'] = load_ticks(path)
+    _worker['symbol'] = symbol
+    _worker['balances'] = balances
+    _worker['settings'] = settings
+
+def run_backtest(params: Dict) -> Dict:
+    """Бэктест одного сочетания параметров в процессе-исполнителе."""
+    risk = {k: v for k, v in params.items() if k in RISK_PARAMS}
+    strategy = {k: v for k, v in params.items() if k in STRATEGY_PARAMS}
+    other = {k: v for k, v in params.items() if k not in RISK_PARAMS and k not in STRATEGY_PARAMS}
+    symbol = _worker['symbol']
+    backtester = Backtester(symbol, _worker['balances'], risk_params=risk, strategy_params=strategy,
+                            **{**_worker['settings'], **other})
+    result = backtester.run(tick_events(_worker['ticks'], symbol))
+    return {**params, **{metric: result[metric] for metric in METRICS}}
+
+def rank(results: List[Dict], rank_by: Sequence[str] = ('pnl',)) -> List[Dict]:
+    """Сортировка по метрикам: по убыванию, с префиксом '-' - по возрастанию."""
+    def key(row: Dict):
+        return tuple(row[m[1:]] if m.startswith('-') else -row[m] for m in rank_by)
+    return sorted(results, key=key)
+
+def optimize(path: str, symbol: str, combos: List[Dict], balances: Dict[str, float],
+             rank_by: Sequence[str] = ('pnl', '-max_drawdown'), processes: Optional[int] = None,
+             results_path: Optional[str] = None, **settings) -> List[Dict]:
+    """Прогон бэктестов для всех сочетаний на всех ядрах.
+
+    settings - общие аргументы Backtester (base_quantity, latency, fee_rate...).
+    Каждый результат дописывается в results_path сразу после завершения.
+    """
+    if not combos:
+        return []
+    results = []
+    columns = list(dict.fromkeys(itertools.chain.from_iterable(combos))) + list(METRICS)
+    out = open(results_path, 'w', newline='') if results_path else None
+    try:
+        writer = csv.DictWriter(out, fieldnames=columns) if out else None
+        if writer:
+            writer.writeheader()
+        with Pool(processes, initializer=_init_worker, initargs=(path, symbol, balances, settings)) as pool:
+            for row in pool.imap_unordered(run_backtest, combos):
+                results.append(row)
+                if writer:
+                    writer.writerow(row)
+                    out.flush()
+    finally:
+        if out:
+            out.close()
+    return rank(results, rank_by)
@@ -0,0 +1,82 @@
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+import threading
+
+class OrderBook:
+    """Локальная копия стакана: снимок из REST + дельты из WebSocket."""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+        self._bid_prices: List[float] = []  # По возрастанию, лучший бид в конце
+        self._ask_prices: List[float] = []  # По возрастанию, лучший аск в начале
+        self.last_seq: Optional[int] = None
+        self.synced = False
+        self.lock = threading.Lock()
+
+    def apply_snapshot(self, snapshot: Dict) -> None:
+        """Загрузка полного снимка стакана."""
+        with self.lock:
+            self.bids = {float(p): float(q) for p, q in snapshot.get('bids', []) if float(q) > 0}
+            self.asks = {float(p): float(q) for p, q in snapshot.get('asks', []) if float(q) > 0}
+            self._bid_prices = sorted(self.bids)
+            self._ask_prices = sorted(self.asks)
+            seq = snapshot.get('seq')
+            self.last_seq = int(seq) if seq is not None else None
+            self.synced = True
+
+    def apply_delta(self, data: Dict) -> bool:
+        """Применение дельты. Возвращает False при разрыве последовательности."""
+        with self.lock:
+            if not self.synced:
+                return False
+            seq = data.get('seq')
+            if seq is not None and self.last_seq is not None:
+                seq = int(seq)
+                if seq <= self.last_seq:
+                    return True  # Устаревшая дельта, уже учтена в снимке
+                if seq != self.last_seq + 1:
+                    self.synced = False  # Пропущены сообщения, нужен новый снимок
+                    return False
+            for price, qty in data.get('bids', []):
+                self._set_level(self.bids, self._bid_prices, float(price), float(qty))
+            for price, qty in data.get('asks', []):
+                self._set_level(self.asks, self._ask_prices, float(price), float(qty))
+            if seq is not None:
+                self.last_seq = int(seq)
+            return True
+
+    @staticmethod
+    def _set_level(levels: Dict[float, float], prices: List[float], price: float, qty: float) -> None:
+        """Обновление одного ценового уровня (qty == 0 удаляет уровень)."""
+        if qty > 0:
+            if price not in levels:
+                insort(prices, price)
+            levels[price] = qty
+        elif price in levels:
+            del levels[price]
+            del prices[bisect_left(prices, price)]
+
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        """Лучшая цена покупки и объём."""
+        with self.lock:
+            if not self._bid_prices:
+                return None
+            price = self._bid_prices[-1]
+            return price, self.bids[price]
+
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        """Лучшая цена продажи и объём."""
+        with self.lock:
+            if not self._ask_prices:
+                return None
+            price = self._ask_prices[0]
+            return price, self.asks[price]
+
+    def top(self, depth: int = 10) -> Dict[str, List[List[float]]]:
+        """Верхние уровни стакана в формате REST-ответа."""
+        with self.lock:
+            bids = [[p, self.bids[p]] for p in reversed(self._bid_prices[max(len(self._bid_prices) - depth, 0):])]
+            asks = [[p, self.asks[p]] for p in self._ask_prices[:depth]]
+        return {'bids': bids, 'asks': asks}
@@ -0,0 +1,149 @@
+"""Запись рыночных данных WebSocket на диск и чтение через mmap.
+
+Каждое событие сохраняется записью фиксированной ширины (время, цена,
+объём, сторона) в файл {root}/{symbol}/{kind}/{YYYY-MM-DD}.bin, новый
+файл начинается каждые сутки (UTC). Событие depth даёт по записи на
+каждый изменённый уровень: side 1 - бид, -1 - аск.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from collections import deque
+import os
+import struct
+import threading
+import time
+import numpy as np
+
+RECORD = struct.Struct('<dddb')
+RECORD_DTYPE = np.dtype([('time', '<f8'), ('price', '<f8'), ('qty', '<f8'), ('side', 'i1')])  # Без выравнивания, 25 байт
+SIDES = {'buy': 1, 'bid': 1, 'sell': -1, 'ask': -1}
+
+class TickRecorder:
+    """Буферизованная запись событий в фоновом потоке.
+
+    record() только кладёт событие в очередь, поэтому поток приёма
+    WebSocket не ждёт диска. Событие, которое не удалось упаковать
+    (нет цены, битый уровень стакана), пропускается и учитывается в errors.
+    """
+
+    def __init__(self, root: str, flush_interval: float = 1.0, max_queue: int = 1000000):
+        self.root = root
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.queue = deque()  # append/popleft потокобезопасны и не берут блокировку Python
+        self.dropped = 0
+        self.errors = 0
+        self.files: Dict[Tuple[str, str, str], object] = {}
+        self.day = None
+        self.day_end = 0.0
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def record(self, data: Dict) -> None:
+        """Постановка события в очередь записи (вызывается из потока WebSocket)."""
+        if len(self.queue) < self.max_queue:
+            self.queue.append((time.time(), data))
+        else:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while self.running or self.queue:
+            if self.running:
+                time.sleep(self.flush_interval)
+            buffers: Dict[Tuple[str, str, str], bytearray] = {}
+            failed, error = 0, None
+            for _ in range(len(self.queue)):
+                ts, data = self.queue.popleft()
+                try:
+                    self._pack(buffers, ts, data)
+                except Exception as e:  # Одно битое событие не должно останавливать запись
+                    failed += 1
+                    error = e
+            if failed:
+                self.errors += failed
+                print(f"Запись тиков: пропущено событий {failed}: {error}")
+            try:
+                for key, buffer in buffers.items():
+                    self._file(key).write(buffer)
+                for f in self.files.values():
+                    f.flush()
+            except OSError as e:
+                print(f"Ошибка записи тиков: {e}")
+
+    def _pack(self, buffers: Dict, ts: float, data: Dict) -> None:
+        """Упаковка события в записи (при ошибке в буфер не попадает ничего из события)."""
+        kind = data.get('type')
+        symbol = data.get('symbol')
+        if kind not in ('ticker', 'trade', 'depth') or not symbol:
+            return
+        if ts >= self.day_end:
+            self.day = datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d')
+            self.day_end = (ts // 86400 + 1) * 86400  # Полночь UTC следующих суток
+        records = bytearray()
+        if kind == 'depth':
+            for side, levels in ((1, data.get('bids', [])), (-1, data.get('asks', []))):
+                for price, qty in levels:
+                    records += RECORD.pack(ts, float(price), float(qty), side)
+        else:
+            records += RECORD.pack(ts, float(data.get('price', 0)), float(data.get('qty', data.get('volume', 0)) or 0),
+                                   SIDES.get(data.get('side'), 0))
+        buffers.setdefault((symbol, kind, self.day), bytearray()).extend(records)
+
+    def _file(self, key: Tuple[str, str, str]):
+        """Файл для (пара, тип, день); файлы прошлых дней закрываются."""
+        f = self.files.get(key)
+        if f is None:
+            symbol, kind, day = key
+            for old in [k for k in self.files if k[:2] == key[:2]]:
+                self.files.pop(old).close()  # Ротация: наступил новый день
+            directory = os.path.join(self.root, symbol, kind)
+            os.makedirs(directory, exist_ok=True)
+            f = self.files[key] = open(os.path.join(directory, f"{day}.bin"), 'ab')
+        return f
+
+    def close(self) -> None:
+        """Запись оставшихся событий и закрытие файлов."""
+        self.running = False
+        self.thread.join()
+        for f in self.files.values():
+            f.close()
+        self.files.clear()
+
+def open_records(path: str) -> np.ndarray:
+    """Записи одного файла .bin (memmap, только чтение); колонки time и price как у тиков оптимизатора."""
+    count = os.path.getsize(path) // RECORD_DTYPE.itemsize  # Недописанная запись в конце отбрасывается
+    if count == 0:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', shape=(count,))
+
+class TickReader:
+    """Чтение записанных тиков через mmap: колонки доступны как представления NumPy без копирования."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def days(self, symbol: str, kind: str) -> List[str]:
+        """Дни, за которые есть записи."""
+        directory = os.path.join(self.root, symbol, kind)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-4] for name in os.listdir(directory) if name.endswith('.bin'))
+
+    def load(self, symbol: str, kind: str, day: str) -> np.ndarray:
+        """Записи за день (memmap, только чтение)."""
+        return open_records(os.path.join(self.root, symbol, kind, f"{day}.bin"))
+
+    def load_range(self, symbol: str, kind: str, start: Optional[str] = None,
+                   end: Optional[str] = None) -> List[np.ndarray]:
+        """Записи по дням в диапазоне [start, end] (даты YYYY-MM-DD)."""
+        return [self.load(symbol, kind, day) for day in self.days(symbol, kind)
+                if (start is None or day >= start) and (end is None or day <= end)]
+
+    def prices(self, symbol: str, kind: str = 'trade', days: int = 1) -> np.ndarray:
+        """Цены за последние days дней, например для прогрева индикаторов."""
+        arrays = [arr['price'] for arr in
+                  (self.load(symbol, kind, day) for day in self.days(symbol, kind)[-days:])]
+        if not arrays:
+            return np.empty(0)
+        return arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
@@ -0,0 +1,91 @@
+from typing import Callable, Dict, Optional, Sequence
+import threading
+import numpy as np
+
+class RingBuffer:
+    """Кольцевой буфер фиксированной ёмкости с типизированными колонками (NumPy).
+
+    Данные хранятся дважды (зеркально), поэтому последние n значений всегда
+    лежат в памяти подряд и view() отдаёт срез без копирования. Рассчитан на
+    одного писателя (поток WebSocket) и многих читателей (поток Qt): читатели
+    не берут блокировку, а согласованный снимок дают через snapshot().
+    """
+
+    def __init__(self, capacity: int, fields: Sequence[str] = ('time', 'value'), dtype=np.float64):
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self.data: Dict[str, np.ndarray] = {name: np.zeros(2 * capacity, dtype=dtype) for name in self.fields}
+        self.count = 0    # Всего записей с момента создания
+        self.version = 0  # Нечётное значение - идёт запись
+        self.write_lock = threading.Lock()
+
+    def append(self, *values: float) -> None:
+        """Добавление одной записи (значения в порядке fields)."""
+        with self.write_lock:
+            i = self.count % self.capacity
+            self.version += 1
+            for name, value in zip(self.fields, values):
+                column = self.data[name]
+                column[i] = value
+                column[i + self.capacity] = value
+            self.count += 1
+            self.version += 1
+
+    def clear(self) -> None:
+        """Очистка буфера."""
+        with self.write_lock:
+            self.version += 1
+            self.count = 0
+            self.version += 1
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def _bounds(self, count: int, n: Optional[int]):
+        size = min(count, self.capacity)
+        if n is not None:
+            size = min(size, n)
+        end = count % self.capacity
+        if count >= self.capacity:
+            end += self.capacity  # Окно заканчивается в зеркальной половине
+        return end - size, end
+
+    def view(self, field: str, n: Optional[int] = None) -> np.ndarray:
+        """Последние n значений колонки (по умолчанию все) без копирования, от старых к новым."""
+        start, end = self._bounds(self.count, n)
+        return self.data[field][start:end]
+
+    def snapshot(self, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Согласованная копия последних n записей всех колонок."""
+        while True:
+            version = self.version
+            if version % 2:
+                continue  # Писатель в процессе записи
+            start, end = self._bounds(self.count, n)
+            result = {name: column[start:end].copy() for name, column in self.data.items()}
+            if self.version == version:
+                return result
+
+    def read(self, consume: Callable[[Dict[str, np.ndarray]], None], n: Optional[int] = None) -> int:
+        """Передача consume представлений последних n записей без копии; возвращает count окна.
+
+        Представления действительны только внутри consume: если писатель
+        успел изменить буфер, consume вызывается снова с новым окном.
+        """
+        while True:
+            version = self.version
+            if version % 2:
+                continue  # Писатель в процессе записи
+            count = self.count
+            start, end = self._bounds(count, n)
+            consume({name: column[start:end] for name, column in self.data.items()})
+            if self.version == version:
+                return count
+
+    def last(self, field: str) -> Optional[float]:
+        """Последнее значение колонки."""
+        count = self.count
+        if count == 0:
+            return None
+        i = (count - 1) % self.capacity
+        return float(self.data[field][i])
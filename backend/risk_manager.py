@@ -1,36 +1,116 @@
-from typing import List
-import statistics
+from typing import Dict, Optional, Tuple
+import time
 from .api import BitcioAPI
+from .indicators import SMA, StdDev
+from .ledger import Ledger
+
+VOLATILITY_PERIOD = 100     # Окно волатильности, сделок
+VOLATILITY_THRESHOLD = 0.05  # Порог волатильности 5%
 
 class RiskManager:
-    def __init__(self, api: BitcioAPI, max_position: float = 0.1, min_spread: float = 0.001, max_loss: float = 0.05):
+    def __init__(self, api: BitcioAPI, max_position: float = 0.1, min_spread: float = 0.001, max_loss: float = 0.05,
+                 balance_ttl: float = 2.0, ledger: Optional[Ledger] = None):
         self.api = api
         self.max_position = max_position  # Макс. доля баланса на сделку
         self.min_spread = min_spread      # Мин. спред
         self.max_loss = max_loss          # Макс. допустимый убыток (% от баланса)
+        self.balance_ttl = balance_ttl    # Время жизни кэша балансов, сек
+        self.balances: Dict[str, Tuple[float, float]] = {}  # Актив -> (баланс, время получения)
+        self.volatility: Dict[str, Tuple[StdDev, SMA]] = {}  # Скользящие окна цен из потока сделок
+        # Позиции и PnL по исполнениям, общие для всех стратегий счёта
+        self.ledger = ledger if ledger is not None else Ledger(books=getattr(api, 'orderbooks', None))
+        if self.api.account_callback is None:
+            self.api.account_callback = self.on_account_update
+        # Исполнения из потока счёта, в том числе лимитных ордеров, исполненных позже ответа REST
+        if self.api.fill_callback is None:
+            self.api.fill_callback = self.ledger.on_fill_event
+        if self.api.order_callback is None:
+            self.api.order_callback = self.ledger.on_order
+            self.api.order_known = self.ledger.knows  # Сверка после разрыва догружает только свои ордера
         self.initial_balance = self.get_total_balance()
+        # Исходный баланс уже отражает PnL прошлых запусков из журнала: убыток считается от начала сессии
+        self.session_base: Dict[str, float] = {}
+        self.unmarked = set()  # Пары с позицией, которую на старте ещё нечем оценить
+        for symbol in list(self.ledger.positions):
+            pnl = self.ledger.pnl(symbol)
+            if pnl["quantity"] and pnl["mark"] is None:
+                self.unmarked.add(symbol)
+            else:
+                self.session_base[symbol] = pnl["net"]
+
+    # Чистые проверки без запросов к бирже; их же использует AsyncScalper
+
+    @staticmethod
+    def cached_balance(balances: Dict[str, Tuple[float, float]], asset: str, ttl: float) -> Optional[float]:
+        """Баланс из кэша, если он моложе ttl секунд, иначе None."""
+        cached = balances.get(asset)
+        if cached is not None and time.monotonic() - cached[1] < ttl:
+            return cached[0]
+        return None
+
+    @staticmethod
+    def position_allowed(quantity: float, price: float, balance: float, max_position: float) -> bool:
+        """Стоимость сделки не больше доли max_position от баланса."""
+        return quantity * price <= balance * max_position
+
+    @staticmethod
+    def loss_exceeded(pnl: float, initial_balance: float, max_loss: float) -> bool:
+        """Убыток pnl больше доли max_loss от исходного баланса."""
+        return bool(initial_balance) and -pnl / initial_balance > max_loss
+
+    @staticmethod
+    def volatility_exceeded(stdev: StdDev, mean: SMA, threshold: float = VOLATILITY_THRESHOLD) -> bool:
+        """Относительная волатильность stdev / mean окна выше порога."""
+        if not mean.window or mean.value == 0:
+            return False
+        return stdev.value / mean.value > threshold
+
+    def get_balance(self, asset: str) -> float:
+        """Баланс по активу из кэша; REST-запрос только после истечения TTL."""
+        balance = self.cached_balance(self.balances, asset, self.balance_ttl)
+        if balance is None:
+            balance = self.api.get_balance(asset)
+            self.balances[asset] = (balance, time.monotonic())
+        return balance
+
+    def invalidate_balances(self, asset: Optional[str] = None) -> None:
+        """Сброс кэша балансов (после собственных исполнений)."""
+        if asset is None:
+            self.balances.clear()
+        else:
+            self.balances.pop(asset, None)
+
+    def on_account_update(self, data: Dict) -> None:
+        """Обновление кэша по событию баланса из WebSocket."""
+        self.balances[data['asset']] = (float(data['balance']), time.monotonic())
+
+    def on_trade(self, data: Dict) -> None:
+        """Обновление окна волатильности и оценки позиции по сделке из WebSocket."""
+        self.ledger.on_trade(data)
+        window = self.volatility.get(data.get('symbol'))
+        if window is not None:
+            price = float(data['price'])
+            window[0].update(price)
+            window[1].update(price)
 
     def get_total_balance(self) -> float:
         """Получение общего баланса в USDT."""
         assets = ["BTC", "ETH", "USDT"]  # Пример активов
         total = 0.0
         for asset in assets:
-            total += self.api.get_balance(asset)
+            total += self.get_balance(asset)
         return total
 
     def can_trade(self, symbol: str, quantity: float, side: str) -> bool:
         """Проверка, можно ли открыть сделку."""
         # Проверка баланса
-        balance = self.api.get_balance(symbol.split("USDT")[0])
-        orderbook = self.api.get_orderbook(symbol)
-        price = float(orderbook['asks'][0][0]) if side == "buy" else float(orderbook['bids'][0][0])
-        position_value = quantity * price
-        if position_value > balance * self.max_position:
+        balance = self.get_balance(symbol.split("USDT")[0])
+        price = self.api.get_best_price(symbol, side)
+        if not self.position_allowed(quantity, price, balance, self.max_position):
             return False
 
-        # Проверка убытков
-        current_balance = self.get_total_balance()
-        if (self.initial_balance - current_balance) / self.initial_balance > self.max_loss:
+        # Проверка убытков: PnL сессии по исполнениям из журнала позиций, без запросов к бирже
+        if self.loss_exceeded(self.session_pnl(), self.initial_balance, self.max_loss):
             return False
 
         # Проверка волатильности
@@ -39,11 +119,31 @@ class RiskManager:
 
         return True
 
-    def is_high_volatility(self, symbol: str, period: int = 100) -> bool:
-        """Проверка высокой волатильности."""
-        trades = self.api.get_historical_trades(symbol, limit=period)
-        prices = [float(trade['price']) for trade in trades]
-        if not prices:
-            return False
-        volatility = statistics.stdev(prices) / statistics.mean(prices)
-        return volatility > 0.05  # Порог волатильности 5%
\ No newline at end of file
+    def session_pnl(self) -> float:
+        """Чистый PnL с запуска: изменение PnL журнала по парам от значения на старте.
+
+        Позиция из прошлого запуска без цены на старте получает базу при
+        первой оценке, иначе её старый убыток попал бы в убыток сессии.
+        """
+        net = 0.0
+        for symbol in list(self.ledger.positions):
+            pnl = self.ledger.pnl(symbol)
+            if symbol in self.unmarked:
+                if pnl["mark"] is None:
+                    continue
+                self.session_base[symbol] = pnl["net"]
+                self.unmarked.discard(symbol)
+            net += pnl["net"] - self.session_base.get(symbol, 0.0)
+        return net
+
+    def is_high_volatility(self, symbol: str, period: int = VOLATILITY_PERIOD) -> bool:
+        """Проверка высокой волатильности по скользящему окну (из REST только при первом обращении)."""
+        window = self.volatility.get(symbol)
+        if window is None:
+            window = (StdDev(period), SMA(period))
+            for trade in self.api.get_historical_trades(symbol, limit=period):
+                price = float(trade['price'])
+                window[0].update(price)
+                window[1].update(price)
+            self.volatility[symbol] = window
+        return self.volatility_exceeded(*window)
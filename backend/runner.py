@@ -0,0 +1,171 @@
+"""Запуск нескольких стратегий без графического интерфейса.
+
+Все экземпляры Scalper (по паре и набору параметров) работают в одном
+потоке-планировщике и делят один клиент API, один поток рыночных данных
+и один риск-менеджер. PyQt и matplotlib здесь не импортируются.
+"""
+from typing import Dict, List, Optional
+import heapq
+import json
+import threading
+import time
+from .api import BitcioAPI
+from .candles import CandleAggregator
+from .ledger import FIFO, Ledger
+from .risk_manager import RiskManager
+from .trader import Scalper
+
+STRATEGY_PARAMS = ('rsi_buy', 'rsi_sell', 'rsi_period', 'sma_period', 'timeframe')
+
+class StrategyInstance:
+    """Экземпляр стратегии: пара, объём, период решения и свой Scalper."""
+    __slots__ = ('name', 'symbol', 'quantity', 'interval', 'scalper', 'steps', 'orders', 'errors')
+
+    def __init__(self, name: str, symbol: str, quantity: float, interval: float, scalper: Scalper):
+        self.name = name
+        self.symbol = symbol
+        self.quantity = quantity
+        self.interval = interval
+        self.scalper = scalper
+        self.steps = 0
+        self.orders = 0
+        self.errors = 0
+
+class StrategyRunner:
+    """Планировщик стратегий с общей лентой сделок и корректной остановкой."""
+
+    def __init__(self, api: BitcioAPI, risk_manager: RiskManager, cancel_on_exit: bool = True):
+        self.api = api
+        self.risk_manager = risk_manager
+        self.cancel_on_exit = cancel_on_exit  # Отменять открытые ордера при остановке
+        self.instances: List[StrategyInstance] = []
+        self.by_symbol: Dict[str, List[StrategyInstance]] = {}
+        self.stop_event = threading.Event()
+        self.candles: Optional[CandleAggregator] = None  # Создаётся для первой стратегии по свечам
+        # Одна лента сделок на все стратегии: окно волатильности обновляется один раз,
+        # индикаторы - у каждой стратегии своей пары
+        self.api.trade_history_callback = self.on_trade
+
+    def add(self, symbol: str, quantity: float, interval: float = 5.0, name: Optional[str] = None,
+            **params) -> StrategyInstance:
+        """Добавление экземпляра стратегии (params - аргументы Scalper)."""
+        name = name or f"{symbol}#{len(self.instances) + 1}"
+        if params.get('timeframe') and self.candles is None:
+            self.candles = CandleAggregator()
+        instance = StrategyInstance(name, symbol, quantity, interval,
+                                    Scalper(self.api, self.risk_manager, candles=self.candles, **params))
+        self.instances.append(instance)
+        self.by_symbol.setdefault(symbol, []).append(instance)
+        return instance
+
+    def on_trade(self, data: Dict) -> None:
+        """Сделка из WebSocket: окно волатильности и индикаторы стратегий этой пары."""
+        self.risk_manager.on_trade(data)
+        if self.candles is not None:
+            self.candles.on_trade(data)  # Свечи строятся один раз для всех стратегий
+        for instance in self.by_symbol.get(data.get('symbol'), ()):
+            instance.scalper.update_indicators(data)
+
+    def start(self) -> None:
+        """Прогрев индикаторов (история сделок - один запрос на пару), поток счёта и подписка на рыночные данные."""
+        self.api.start_account_stream()
+        for symbol, instances in self.by_symbol.items():
+            history = self.api.get_historical_trades(symbol)
+            for instance in instances:
+                instance.scalper.get_indicators(symbol, history)
+            self.api.start_websocket(symbol)
+
+    def run(self, duration: Optional[float] = None) -> None:
+        """Цикл планировщика до stop() или истечения duration секунд."""
+        deadline = time.monotonic() + duration if duration else None
+        now = time.monotonic()
+        queue = [(now, i) for i in range(len(self.instances))]  # (время следующего решения, № экземпляра)
+        heapq.heapify(queue)
+        while queue and not self.stop_event.is_set():
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+            due, index = queue[0]
+            if due > now:
+                self.stop_event.wait((due if deadline is None else min(due, deadline)) - now)
+                continue
+            instance = self.instances[index]
+            try:
+                if instance.scalper.step(instance.symbol, instance.quantity) is not None:
+                    instance.orders += 1
+            except Exception as e:  # Ошибка одной стратегии не останавливает остальные
+                instance.errors += 1
+                print(f"Ошибка стратегии {instance.name}: {e}")
+            instance.steps += 1
+            heapq.heapreplace(queue, (max(due + instance.interval, now), index))
+
+    def stop(self) -> None:
+        """Запрос остановки (из обработчика сигнала или другого потока)."""
+        self.stop_event.set()
+
+    def shutdown(self) -> Dict[str, List[Dict]]:
+        """Отмена открытых ордеров по всем парам, закрытие WebSocket и пула соединений."""
+        self.stop()
+        reports = {}
+        if self.cancel_on_exit:
+            for symbol, instances in self.by_symbol.items():
+                try:
+                    reports[symbol] = instances[0].scalper.cancel_all_orders(symbol)
+                except Exception as e:
+                    print(f"Не удалось отменить ордера {symbol}: {e}")
+        self.api.stop_websocket()
+        if self.api.recorder is not None:
+            self.api.recorder.close()  # Дозапись событий, оставшихся в очереди
+        self.api.close()
+        self.api.metrics.stop_dump()  # Финальный снимок задержек
+        self.risk_manager.ledger.close()  # Финальный снимок позиций
+        return reports
+
+    def stats(self) -> List[Dict]:
+        """Счётчики по экземплярам и PnL пары (позиция общая для стратегий одной пары)."""
+        return [{"name": i.name, "symbol": i.symbol, "steps": i.steps, "orders": i.orders, "errors": i.errors,
+                 "pnl": i.scalper.calculate_profit(i.symbol)} for i in self.instances]
+
+def load_config(path: str) -> Dict:
+    """Чтение конфигурации запуска из JSON.
+
+    {"api": {"base_url": ..., "ws_url": ..., "rate_limits": {"order": [10, 20], "read": [20, 40]}},
+     "risk": {"max_position": 0.1, "min_spread": 0.001, "max_loss": 0.05},
+     "ledger": {"path": "ledger.jsonl", "method": "fifo", "snapshot_interval": 60},
+     "latency": {"path": "latency.jsonl", "interval": 60},
+     "record": {"path": "ticks", "flush_interval": 1.0},
+     "duration": 3600,
+     "strategies": [{"symbol": "BTCUSDT", "quantity": 0.001, "interval": 5, "rsi_buy": 30,
+                     "timeframe": "1m", ...}]}
+    """
+    with open(path) as f:
+        config = json.load(f)
+    if not config.get("strategies"):
+        raise ValueError(f"В {path} не заданы стратегии")
+    for strategy in config["strategies"]:
+        if "symbol" not in strategy or "quantity" not in strategy:
+            raise ValueError(f"У стратегии нет symbol или quantity: {strategy}")
+        unknown = set(strategy) - {"symbol", "quantity", "interval", "name"} - set(STRATEGY_PARAMS)
+        if unknown:
+            raise ValueError(f"Неизвестные параметры стратегии: {', '.join(sorted(unknown))}")
+    return config
+
+def build_runner(config: Dict, api_key: str, api_secret: str) -> StrategyRunner:
+    """Клиент API, риск-менеджер и экземпляры стратегий по конфигурации."""
+    api = BitcioAPI(api_key, api_secret, **config.get("api", {}))
+    settings = config.get("ledger", {})
+    ledger = Ledger(settings.get("method", FIFO), books=api.orderbooks)
+    if settings.get("path"):  # Позиции восстанавливаются из журнала прошлого запуска
+        ledger.open(settings["path"], settings.get("snapshot_interval", 60.0))
+    latency = config.get("latency", {})
+    if latency.get("path"):  # Гистограммы задержек по этапам - в файл по строке JSON на снимок
+        api.metrics.start_dump(latency["path"], latency.get("interval", 60.0), latency.get("reset", False))
+    record = config.get("record", {})
+    if record.get("path"):  # Рыночные данные потока - в {path}/{пара}/{тип}/{день}.bin
+        from .recorder import TickRecorder
+        api.recorder = TickRecorder(record["path"], record.get("flush_interval", 1.0))
+    risk_manager = RiskManager(api, ledger=ledger, **config.get("risk", {}))
+    runner = StrategyRunner(api, risk_manager, cancel_on_exit=config.get("cancel_on_exit", True))
+    for strategy in config["strategies"]:
+        runner.add(**strategy)
+    return runner
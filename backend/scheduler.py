@@ -0,0 +1,245 @@
+"""Планировщик HTTP-запросов с учётом лимитов биржи.
+
+Запросы делятся на классы веса, у каждого свой маркерный бюджет. Очередь
+приоритетная: размещение и отмена ордеров всегда уходят раньше чтений,
+а одно место в пуле исполнителей держится свободным только для ордеров,
+чтобы медленная выгрузка истории не задерживала ордер. Одинаковые GET,
+уже находящиеся в работе, объединяются в один запрос. Заголовки лимитов
+в ответах биржи подстраивают бюджеты под её фактический остаток.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, List, Mapping, Optional, Tuple
+import heapq
+import itertools
+import threading
+import time
+from .latency import LatencyRecorder
+
+ORDER = 0    # Размещение и отмена ордеров
+ACCOUNT = 1  # Балансы, открытые ордера, стакан
+HISTORY = 2  # Выгрузка истории сделок
+
+# Класс веса -> (маркеров в секунду, ёмкость); None - без ограничения
+DEFAULT_RATE_LIMITS: Dict[str, Optional[Tuple[float, float]]] = {
+    "order": (10.0, 20.0),
+    "read": (20.0, 40.0),
+}
+
+class TokenBucket:
+    """Маркерная корзина: rate маркеров в секунду, не больше capacity в запасе."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0  # Пауза по ответу 429 или исчерпанному лимиту биржи
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, weight: float, now: float) -> float:
+        """Сколько ждать, пока хватит маркеров на запрос (0 - можно сейчас)."""
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        weight = min(weight, self.capacity)  # Тяжёлый запрос не должен ждать вечно
+        return 0.0 if self.tokens >= weight else (weight - self.tokens) / self.rate
+
+    def take(self, weight: float) -> None:
+        self.tokens -= min(weight, self.capacity)
+
+    def limit(self, tokens: float) -> None:
+        """Не больше tokens маркеров в запасе (по остатку, который сообщила биржа)."""
+        self.tokens = min(self.tokens, tokens)
+
+    def pause(self, until: float) -> None:
+        self.paused_until = max(self.paused_until, until)
+
+class Job:
+    """Запрос в очереди планировщика."""
+    __slots__ = ('func', 'bucket', 'weight', 'priority', 'key', 'future', 'queued_ns')
+
+    def __init__(self, func: Callable, bucket: str, weight: float, priority: int, key: Optional[Hashable]):
+        self.func = func
+        self.bucket = bucket
+        self.weight = weight
+        self.priority = priority
+        self.key = key
+        self.future = Future()
+        self.queued_ns = time.perf_counter_ns()
+
+class RequestScheduler:
+    """Очередь HTTP-запросов по приоритетам с бюджетами по классам веса.
+
+    Поток-диспетчер берёт из очереди самый приоритетный запрос, ждёт маркеры
+    его класса и передаёт его исполнителю. Пока запрос ждёт маркеры, новый
+    ордер обгоняет его. Время в очереди пишется в metrics этапом
+    "sched {класс}".
+    """
+
+    def __init__(self, workers: int = 10, rate_limits: Optional[Mapping[str, Optional[Tuple[float, float]]]] = None,
+                 order_slots: int = 1, order_reserve: float = 0.2, metrics: Optional[LatencyRecorder] = None):
+        limits = {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}
+        self.buckets: Dict[str, Optional[TokenBucket]] = {
+            name: TokenBucket(*limit) if limit is not None else None for name, limit in limits.items()}
+        self.workers = workers
+        self.read_slots = max(workers - order_slots, 1)  # Чтения не занимают места, оставленные ордерам
+        self.order_reserve = order_reserve  # Доля лимита биржи, которую чтения оставляют ордерам
+        self.metrics = metrics
+        self.queue: List[Tuple[int, int, Job]] = []
+        self.seq = itertools.count()
+        self.inflight: Dict[Hashable, Future] = {}  # Ключ GET -> общий результат
+        self.active = 0
+        self.active_reads = 0
+        self.coalesced = 0
+        self.throttled = 0  # Сколько раз запрос ждал маркеры
+        self.cond = threading.Condition()
+        self.running = True
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http")
+        self.thread = threading.Thread(target=self._dispatch, name="http-scheduler", daemon=True)
+        self.thread.start()
+
+    def submit(self, func: Callable, bucket: str = "read", weight: float = 1.0, priority: int = ACCOUNT,
+               key: Optional[Hashable] = None) -> Future:
+        """Постановка запроса; при заданном key одинаковые запросы в работе объединяются."""
+        with self.cond:
+            if not self.running:
+                raise RuntimeError("Планировщик запросов остановлен")
+            if key is not None:
+                future = self.inflight.get(key)
+                if future is not None:
+                    self.coalesced += 1
+                    return future
+            job = Job(func, bucket, weight, priority, key)
+            if key is not None:
+                self.inflight[key] = job.future
+            heapq.heappush(self.queue, (priority, next(self.seq), job))
+            self.cond.notify()
+        return job.future
+
+    def call(self, func: Callable, bucket: str = "read", weight: float = 1.0, priority: int = ACCOUNT,
+             key: Optional[Hashable] = None):
+        """Запрос с ожиданием результата (исключение запроса пробрасывается)."""
+        return self.submit(func, bucket, weight, priority, key).result()
+
+    def _dispatch(self) -> None:
+        while True:
+            with self.cond:
+                job, wait = self._next()
+                while job is None and self.running:
+                    self.cond.wait(wait)
+                    job, wait = self._next()
+                if not self.running:
+                    return
+                heapq.heappop(self.queue)
+                bucket = self.buckets.get(job.bucket)
+                if bucket is not None:
+                    bucket.take(job.weight)
+                self.active += 1
+                if job.priority != ORDER:
+                    self.active_reads += 1
+            if self.metrics is not None:
+                self.metrics.record_since(f"sched {job.bucket}", job.queued_ns)
+            self.executor.submit(self._run, job)
+
+    def _next(self) -> Tuple[Optional[Job], Optional[float]]:
+        """Запрос, который можно отправить сейчас, иначе (None, сколько ждать)."""
+        if not self.queue:
+            return None, None
+        job = self.queue[0][2]
+        if self.active >= self.workers or (job.priority != ORDER and self.active_reads >= self.read_slots):
+            return None, None  # Разбудит завершение запроса
+        bucket = self.buckets.get(job.bucket)
+        wait = bucket.wait_time(job.weight, time.monotonic()) if bucket is not None else 0.0
+        if wait > 0:
+            self.throttled += 1
+            return None, wait
+        return job, None
+
+    def _run(self, job: Job) -> None:
+        try:
+            result = job.func()
+        except BaseException as e:
+            error = e
+        else:
+            error = None
+        with self.cond:
+            self.active -= 1
+            if job.priority != ORDER:
+                self.active_reads -= 1
+            if job.key is not None:
+                self.inflight.pop(job.key, None)
+            self.cond.notify()
+        if error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(result)
+
+    def feedback(self, bucket: str, status: int, headers: Mapping[str, str]) -> None:
+        """Подстройка по ответу биржи: Retry-After и X-RateLimit-Remaining/Reset.
+
+        Остаток общего лимита биржи за вычетом запаса ордеров (не больше
+        order_reserve от X-RateLimit-Limit) ограничивает чтения; ордера
+        останавливаются только при нулевом остатке или 429 на ордер.
+        """
+        now = time.monotonic()
+        with self.cond:
+            reads = [b for name, b in self.buckets.items() if name != "order" and b is not None]
+            orders = self.buckets.get("order")
+            retry_after = _seconds(headers.get("Retry-After"))
+            if status == 429 or retry_after is not None:
+                until = now + (retry_after if retry_after is not None else 1.0)
+                for b in reads:
+                    b.pause(until)
+                if bucket == "order" and orders is not None:
+                    orders.pause(until)
+            remaining = _seconds(headers.get("X-RateLimit-Remaining"))
+            if remaining is not None:
+                reserve = orders.capacity if orders is not None else 0.0
+                limit = _seconds(headers.get("X-RateLimit-Limit"))
+                if limit is not None:
+                    reserve = min(reserve, limit * self.order_reserve)
+                reset = _seconds(headers.get("X-RateLimit-Reset"))
+                if reset is not None and reset > 1e9:
+                    reset -= time.time()  # Время сброса в секундах эпохи
+                until = now + max(reset if reset is not None else 1.0, 0.0)
+                available = remaining - reserve - self.active_reads  # Чтения в пути ещё потратят лимит
+                for b in reads:
+                    b.limit(available)
+                    if available <= 0:
+                        b.pause(until)
+                if remaining <= 0 and orders is not None:
+                    orders.pause(until)
+            self.cond.notify()
+
+    def stats(self) -> Dict[str, float]:
+        """Очередь, запросы в работе, объединённые GET, ожидания маркеров и остаток маркеров по классам."""
+        with self.cond:
+            stats = {"queued": len(self.queue), "active": self.active, "coalesced": self.coalesced,
+                     "throttled": self.throttled}
+            now = time.monotonic()
+            for name, bucket in self.buckets.items():
+                if bucket is not None:
+                    bucket._refill(now)
+                    stats[f"tokens {name}"] = bucket.tokens
+            return stats
+
+    def shutdown(self) -> None:
+        """Остановка диспетчера; запросы, не успевшие уйти, завершаются ошибкой."""
+        with self.cond:
+            self.running = False
+            pending = [job for _, _, job in self.queue]
+            self.queue.clear()
+            self.inflight.clear()
+            self.cond.notify()
+        for job in pending:
+            job.future.set_exception(RuntimeError("Планировщик запросов остановлен"))
+        self.executor.shutdown(wait=False)
+
+def _seconds(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
@@ -0,0 +1,200 @@
+"""Мультиплексирование подписок WebSocket на небольшое число соединений."""
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import json
+import random
+import threading
+import time
+import websocket
+
+Stream = Tuple[str, str]  # (канал, тикер), например ('ticker', 'BTCUSDT')
+
+class StreamConnection:
+    """Одно соединение WebSocket с набором подписок и переподключением с экспоненциальной задержкой."""
+
+    def __init__(self, manager: "StreamManager", index: int):
+        self.manager = manager
+        self.index = index
+        self.streams: Set[Stream] = set()
+        self.ws = None
+        self.connected = False
+        self.running = True
+        self.last_message = time.monotonic()
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name=f"ws-{index}", daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        manager = self.manager
+        delay = manager.reconnect_delay
+        while self.running:
+            self.ws = websocket.WebSocketApp(
+                manager.url,
+                header=manager.header,
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_error=manager.on_error,
+                on_close=self._on_close,
+            )
+            opened_at = time.monotonic()
+            self.ws.run_forever(ping_interval=manager.ping_interval, ping_timeout=manager.ping_timeout)
+            self.connected = False
+            if not self.running:
+                break
+            if manager.on_disconnect:
+                manager.on_disconnect(self)
+            if time.monotonic() - opened_at > manager.max_reconnect_delay:
+                delay = manager.reconnect_delay  # Соединение было стабильным, начинаем сначала
+            time.sleep(random.uniform(delay / 2, delay))
+            delay = min(delay * 2, manager.max_reconnect_delay)
+
+    def _on_open(self, ws) -> None:
+        """Восстановление всех подписок после (пере)подключения."""
+        self.last_message = time.monotonic()
+        with self.lock:
+            self.connected = True
+            streams = sorted(self.streams)
+        if streams:
+            ws.send(self.manager.subscribe_message(streams))
+        if self.manager.on_connect:
+            self.manager.on_connect(self)
+
+    def _on_message(self, ws, message) -> None:
+        self.last_message = time.monotonic()
+        self.manager.on_message(ws, message)
+
+    def _on_close(self, ws, close_status_code, close_msg) -> None:
+        self.connected = False
+        print(f"WebSocket {self.index} closed ({close_status_code}). Reconnecting...")
+
+    def send(self, message: str) -> None:
+        """Отправка, если соединение открыто (иначе подписки отправятся в _on_open)."""
+        if self.connected and self.ws is not None:
+            try:
+                self.ws.send(message)
+            except websocket.WebSocketException as e:
+                self.manager.on_error(self.ws, e)
+
+    def add(self, streams: List[Stream]) -> None:
+        with self.lock:
+            self.streams.update(streams)
+        self.send(self.manager.subscribe_message(streams))
+
+    def remove(self, streams: List[Stream]) -> None:
+        with self.lock:
+            self.streams.difference_update(streams)
+        self.send(self.manager.unsubscribe_message(streams))
+
+    def reconnect(self) -> None:
+        """Принудительный разрыв (например, при отсутствии данных); поток переподключится сам."""
+        if self.ws is not None:
+            self.ws.close()
+
+    def close(self) -> None:
+        self.running = False
+        if self.ws is not None:
+            self.ws.close()
+
+class StreamManager:
+    """Подписки на каналы (ticker, trade, depth) по многим тикерам через несколько соединений.
+
+    Подписки распределяются по соединениям не более max_streams на каждое,
+    после переподключения восстанавливаются, а соединение без сообщений
+    дольше stale_after секунд принудительно переподключается. Для потоков,
+    которые сервер шлёт без подписок (приватный поток счёта), есть connect().
+    """
+
+    def __init__(self, url: str, on_message: Callable, on_error: Optional[Callable] = None,
+                 on_disconnect: Optional[Callable] = None, max_streams: int = 100,
+                 ping_interval: float = 20, ping_timeout: float = 10, stale_after: float = 30,
+                 reconnect_delay: float = 1.0, max_reconnect_delay: float = 60.0,
+                 header: Optional[List[str]] = None, on_connect: Optional[Callable] = None):
+        self.url = url
+        self.on_message = on_message
+        self.on_error = on_error or (lambda ws, error: print(f"WebSocket error: {error}"))
+        self.on_disconnect = on_disconnect
+        self.on_connect = on_connect  # Вызывается после каждого (пере)подключения
+        self.header = header  # Заголовки рукопожатия, например ключ API
+        self.max_streams = max_streams
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.stale_after = stale_after
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connections: List[StreamConnection] = []
+        self.owner: Dict[Stream, StreamConnection] = {}
+        self.lock = threading.Lock()
+        self.running = True
+        self.watchdog = threading.Thread(target=self._watch, name="ws-watchdog", daemon=True)
+        self.watchdog.start()
+
+    @staticmethod
+    def subscribe_message(streams: Iterable[Stream]) -> str:
+        """Сообщение подписки в протоколе биржи."""
+        return json.dumps({"method": "subscribe", "params": [f"{channel}:{symbol}" for channel, symbol in streams]})
+
+    @staticmethod
+    def unsubscribe_message(streams: Iterable[Stream]) -> str:
+        """Сообщение отписки в протоколе биржи."""
+        return json.dumps({"method": "unsubscribe", "params": [f"{channel}:{symbol}" for channel, symbol in streams]})
+
+    def connect(self) -> StreamConnection:
+        """Соединение без подписок (сервер сам шлёт события); переподключается как остальные."""
+        with self.lock:
+            if not self.connections:
+                self.connections.append(StreamConnection(self, 0))
+            return self.connections[0]
+
+    def subscribe(self, symbol: str, channels: Iterable[str] = ("ticker", "trade", "depth")) -> None:
+        """Подписка на каналы тикера."""
+        with self.lock:
+            new = [(channel, symbol) for channel in channels if (channel, symbol) not in self.owner]
+            batches: Dict[StreamConnection, List[Stream]] = {}
+            for stream in new:
+                connection = next((c for c in self.connections if len(c.streams) + len(batches.get(c, []))
+                                   < self.max_streams), None)
+                if connection is None:
+                    connection = StreamConnection(self, len(self.connections))
+                    self.connections.append(connection)
+                batches.setdefault(connection, []).append(stream)
+                self.owner[stream] = connection
+        for connection, streams in batches.items():
+            connection.add(streams)
+
+    def unsubscribe(self, symbol: str, channels: Iterable[str] = ("ticker", "trade", "depth")) -> None:
+        """Отписка от каналов тикера."""
+        with self.lock:
+            batches: Dict[StreamConnection, List[Stream]] = {}
+            for channel in channels:
+                connection = self.owner.pop((channel, symbol), None)
+                if connection is not None:
+                    batches.setdefault(connection, []).append((channel, symbol))
+        for connection, streams in batches.items():
+            connection.remove(streams)
+
+    def is_subscribed(self, symbol: str, channel: str) -> bool:
+        """Есть ли подписка на канал тикера."""
+        return (channel, symbol) in self.owner
+
+    def subscriptions(self) -> List[Stream]:
+        """Текущие подписки."""
+        with self.lock:
+            return sorted(self.owner)
+
+    def _watch(self) -> None:
+        """Контроль «зависших» соединений: нет сообщений дольше stale_after."""
+        while self.running:
+            time.sleep(1)
+            now = time.monotonic()
+            for connection in list(self.connections):
+                if connection.connected and connection.streams and now - connection.last_message > self.stale_after:
+                    print(f"WebSocket {connection.index}: нет данных {self.stale_after} с, переподключение")
+                    connection.last_message = now
+                    connection.reconnect()
+
+    def close(self) -> None:
+        """Закрытие всех соединений."""
+        self.running = False
+        for connection in self.connections:
+            connection.close()
+        self.connections.clear()
+        self.owner.clear()
@@ -1,80 +1,188 @@
 from .api import BitcioAPI
-from .indicators import calculate_rsi, calculate_sma
+from .candles import CandleAggregator
+from .indicators import RSI, SMA
 from .risk_manager import RiskManager
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+import threading
 import time
 
 class Scalper:
-    def __init__(self, api: BitcioAPI, risk_manager: RiskManager):
+    def __init__(self, api: BitcioAPI, risk_manager: RiskManager, rsi_buy: float = 30, rsi_sell: float = 70,
+                 rsi_period: int = 14, sma_period: int = 20, candles: Optional[CandleAggregator] = None,
+                 timeframe: Optional[str] = None):
         self.api = api
         self.risk_manager = risk_manager
-        self.profit = 0.0
-        self.trades = []
+        self.rsi_buy = rsi_buy        # Порог перепроданности
+        self.rsi_sell = rsi_sell      # Порог перекупленности
+        self.rsi_period = rsi_period
+        self.sma_period = sma_period
+        self.candles = candles        # Свечи по потоку сделок (общие для стратегий)
+        self.timeframe = timeframe    # Индикаторы по закрытиям свечей; None - по каждой сделке
+        if timeframe is not None and candles is None:
+            raise ValueError("Для индикаторов по свечам нужен CandleAggregator")
+        self.ledger = risk_manager.ledger  # Позиции и PnL по исполнениям
+        self.indicators: Dict[str, Dict] = {}
+        self.metrics = self.api.metrics
+        self.last_tick_ns: Dict[str, int] = {}  # Момент приёма последней сделки по паре
+        if self.api.trade_history_callback is None:
+            self.api.trade_history_callback = self.on_trade
 
     def buy(self, symbol: str, quantity: float) -> Dict:
         """Ручная покупка по лучшей цене."""
-        if not self.risk_manager.can_trade(symbol, quantity, "buy"):
+        if not self._allowed(symbol, quantity, "buy"):
             return {"status": "rejected", "reason": "Risk limits exceeded"}
-        orderbook = self.api.get_orderbook(symbol)
-        best_ask = float(orderbook['asks'][0][0])
-        order = self.api.place_order(symbol, "buy", quantity, price=best_ask)
-        if order.get("status") == "filled":
-            self.profit -= best_ask * quantity
-            self.trades.append({"side": "buy", "price": best_ask, "quantity": quantity})
-        return order
+        return self._place(symbol, "buy", quantity, self.api.get_best_price(symbol, "buy"))
 
     def sell(self, symbol: str, quantity: float) -> Dict:
         """Ручная продажа по лучшей цене."""
-        if not self.risk_manager.can_trade(symbol, quantity, "sell"):
+        if not self._allowed(symbol, quantity, "sell"):
             return {"status": "rejected", "reason": "Risk limits exceeded"}
-        orderbook = self.api.get_orderbook(symbol)
-        best_bid = float(orderbook['bids'][0][0])
-        order = self.api.place_order(symbol, "sell", quantity, price=best_bid)
-        if order.get("status") == "filled":
-            self.profit += best_bid * quantity
-            self.trades.append({"side": "sell", "price": best_bid, "quantity": quantity})
+        return self._place(symbol, "sell", quantity, self.api.get_best_price(symbol, "sell"))
+
+    def _allowed(self, symbol: str, quantity: float, side: str) -> bool:
+        with self.metrics.measure("risk"):
+            return self.risk_manager.can_trade(symbol, quantity, side)
+
+    def _place(self, symbol: str, side: str, quantity: float, price: float) -> Dict:
+        """Лимитный ордер по уже проверенным рискам и учёт его исполнений."""
+        with self.metrics.measure("order"):
+            order = self.api.place_order(symbol, side, quantity, price=price)
+        self._record_tick_to_ack(symbol)
+        self.ledger.on_order(order)  # Исполнения, ещё не пришедшие из потока счёта
+        if order.get("status") in ("filled", "partially_filled"):
+            self.risk_manager.invalidate_balances()
         return order
 
-    def auto_scalp(self, symbol: str, base_quantity: float, duration: int = 3600) -> None:
-        """Автоматический скальпинг с использованием индикаторов."""
+    def auto_scalp(self, symbol: str, base_quantity: float, duration: int = 3600,
+                   stop_event: Optional[threading.Event] = None) -> None:
+        """Автоматический скальпинг с использованием индикаторов (stop_event прерывает цикл)."""
+        stop_event = stop_event or threading.Event()
+        # Индикаторы и окно волатильности дальше обновляет только поток сделок пары;
+        # подписка до прогрева, чтобы не потерять сделки между историей и потоком
+        self.api.start_websocket(symbol)
+        self.get_indicators(symbol)
         start_time = time.time()
-        while time.time() - start_time < duration:
-            if not self.risk_manager.can_trade(symbol, base_quantity, "buy"):
-                time.sleep(5)
-                continue
-
-            orderbook = self.api.get_orderbook(symbol)
-            best_bid = float(orderbook['bids'][0][0])
-            best_ask = float(orderbook['asks'][0][0])
-            spread = (best_bid - best_ask) / best_ask
-
-            # Получение индикаторов
-            trades = self.api.get_historical_trades(symbol)
-            prices = [float(trade['price']) for trade in trades]
-            rsi = calculate_rsi(prices, period=14)
-            sma = calculate_sma(prices, period=20)
-
-            if spread >= self.risk_manager.min_spread and rsi < 30:  # Покупка при перепроданности
-                balance = self.api.get_balance(symbol.split("USDT")[0])
-                quantity = min(base_quantity, balance * self.risk_manager.max_position / best_ask)
-                if quantity > 0:
-                    self.buy(symbol, quantity)
-                    time.sleep(1)
-                    if rsi > 70:  # Продажа при перекупленности
-                        self.sell(symbol, quantity)
-            time.sleep(5)
-
-    def calculate_profit(self) -> float:
-        """Расчёт текущей прибыли."""
-        return self.profit
+        while time.time() - start_time < duration and not stop_event.is_set():
+            self.step(symbol, base_quantity)
+            stop_event.wait(5)
+
+    def step(self, symbol: str, base_quantity: float) -> Optional[Dict]:
+        """Один цикл решения стратегии без ожидания; возвращает ордер, если он был отправлен."""
+        if self.timeframe is not None:
+            # Свечи закрываются и без новых сделок; у симулятора бэктеста свои часы (now)
+            self.candles.close_due(getattr(self.api, 'now', None))
+        best_bid = self.api.get_best_price(symbol, "sell")
+        best_ask = self.api.get_best_price(symbol, "buy")
+        # Индикаторы обновляются потоком сделок, здесь только чтение
+        decision = self.signal(best_bid, best_ask, self.get_indicators(symbol), self.risk_manager.min_spread,
+                               self.rsi_buy, self.rsi_sell)
+        if decision is None:
+            return None
+        side, price = decision
+        balance = self.risk_manager.get_balance(symbol.split("USDT")[0])
+        quantity = min(base_quantity, balance * self.risk_manager.max_position / price)
+        if quantity <= 0 or not self._allowed(symbol, quantity, side):
+            return None
+        return self._place(symbol, side, quantity, price)  # Риски уже проверены по цене этого решения
+
+    @staticmethod
+    def signal(best_bid: float, best_ask: float, indicators: Dict, min_spread: float,
+               rsi_buy: float, rsi_sell: float) -> Optional[Tuple[str, float]]:
+        """Решение стратегии по лучшим ценам и индикаторам: (сторона, цена) или None.
+
+        Общее для Scalper и AsyncScalper: покупка при перепроданности ниже
+        средней, продажа при перекупленности выше неё, если спред не меньше
+        min_spread.
+        """
+        if (best_ask - best_bid) / best_bid < min_spread:
+            return None
+        rsi = indicators['rsi'].value
+        sma = indicators['sma']
+        if not sma.window:
+            return None  # Средней ещё нет, сигнал не подтвердить
+        if rsi < rsi_buy and best_ask < sma.value:
+            return "buy", best_ask
+        if rsi > rsi_sell and best_bid > sma.value:
+            return "sell", best_bid
+        return None
+
+    def get_indicators(self, symbol: str, history: Optional[List[Dict]] = None) -> Dict:
+        """Потоковые индикаторы по паре; прогрев из истории сделок выполняется один раз.
+
+        history - уже полученные сделки (общие для нескольких стратегий по паре).
+        При заданном timeframe индикаторы считаются по закрытиям свечей.
+        """
+        indicators = self.indicators.get(symbol)
+        if indicators is None:
+            indicators = {'rsi': RSI(period=self.rsi_period), 'sma': SMA(period=self.sma_period)}
+            self.indicators[symbol] = indicators
+            if self.timeframe is not None:
+                self._warm_from_candles(symbol, history)
+                return indicators
+            for trade in history if history is not None else self.api.get_historical_trades(symbol):
+                price = float(trade['price'])
+                for indicator in indicators.values():
+                    indicator.update(price)
+        return indicators
+
+    def _warm_from_candles(self, symbol: str, history: Optional[List[Dict]]) -> None:
+        """Прогрев по уже закрытым свечам; если их нет - свечи строятся из истории сделок."""
+        series = self.candles.get(symbol, self.timeframe)
+        closes = self.candles.closes(symbol, self.timeframe).tolist()
+        self.candles.subscribe(symbol, self.timeframe, self.on_bar)
+        if closes or series.start is not None:
+            for close in closes:
+                self.on_bar({'symbol': symbol, 'close': close})
+        else:
+            self.candles.load_trades(symbol, history if history is not None else self.api.get_historical_trades(symbol))
+
+    def on_bar(self, bar: Dict) -> None:
+        """Закрытие свечи: обновление индикаторов по цене закрытия."""
+        indicators = self.indicators.get(bar['symbol'])
+        if indicators is not None:
+            close = float(bar['close'])
+            for indicator in indicators.values():
+                indicator.update(close)
+
+    def on_trade(self, data: Dict) -> None:
+        """Обновление индикаторов и окна волатильности по сделке из WebSocket."""
+        self.risk_manager.on_trade(data)
+        if self.candles is not None:
+            self.candles.on_trade(data)
+        self.update_indicators(data)
+
+    def update_indicators(self, data: Dict) -> None:
+        """Обновление индикаторов стратегии по сделке (без окна волатильности риск-менеджера)."""
+        start = time.perf_counter_ns()
+        indicators = self.indicators.get(data.get('symbol'))
+        if indicators is not None and self.timeframe is None:
+            price = float(data['price'])
+            for indicator in indicators.values():
+                indicator.update(price)
+        received = data.get('recv_ns')
+        if received is not None:  # Только живой поток: в записях бэктеста момента приёма нет
+            self.last_tick_ns[data['symbol']] = received
+            self.metrics.record_since("indicators", start)
+
+    def _record_tick_to_ack(self, symbol: str) -> None:
+        """Задержка от приёма последней сделки до ответа биржи на ордер."""
+        received = self.last_tick_ns.get(symbol)
+        if received is not None:
+            self.metrics.record_since("tick_to_ack", received)
+
+    def calculate_profit(self, symbol: Optional[str] = None) -> float:
+        """Чистый PnL (реализованный, нереализованный, за вычетом комиссий) по паре или по счёту."""
+        return (self.ledger.pnl(symbol) if symbol is not None else self.ledger.total())["net"]
 
     def get_open_positions(self, symbol: str) -> List[Dict]:
-        """Получение открытых позиций."""
-        orders = self.api.get_order_history(symbol)
-        return [order for order in orders if order.get("status") == "open"]
-
-    def cancel_all_orders(self, symbol: str) -> None:
-        """Отмена всех открытых ордеров."""
-        open_orders = self.get_open_positions(symbol)
-        for order in open_orders:
-            self.api.cancel_order(order["order_id"], symbol)
\ No newline at end of file
+        """Открытые лоты позиции по паре из журнала позиций (без запросов к бирже)."""
+        return self.ledger.lots(symbol)
+
+    def get_open_orders(self, symbol: str) -> List[Dict]:
+        """Открытые ордера по паре (локальная таблица потока счёта, REST - только при рассинхронизации)."""
+        return self.api.get_open_orders(symbol)
+
+    def cancel_all_orders(self, symbol: str) -> List[Dict]:
+        """Отмена всех открытых ордеров; возвращает отчёт по каждому."""
+        open_orders = self.get_open_orders(symbol)
+        return self.api.cancel_orders([{"order_id": order["order_id"], "symbol": symbol} for order in open_orders])
\ No newline at end of file
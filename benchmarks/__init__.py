@@ -0,0 +1 @@
+"""Воспроизводимые замеры производительности (python -m benchmarks)."""
@@ -0,0 +1,40 @@
+"""Запуск замеров: python -m benchmarks [-o results.json] [--compare baseline.json]."""
+import argparse
+import json
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")  # График рисуется без дисплея
+
+from . import suites  # noqa: E402,F401 - регистрация замеров
+from .harness import compare, environment, load, run, save  # noqa: E402
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Замеры горячих путей BitcioTrader")
+    parser.add_argument("names", nargs="*", help="подстроки имён замеров (по умолчанию все)")
+    parser.add_argument("-o", "--output", help="файл JSON с результатами")
+    parser.add_argument("--compare", help="файл JSON прошлого запуска для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.1, help="допустимое замедление (0.1 = 10%%)")
+    parser.add_argument("--repeat", type=int, default=7, help="число серий на замер")
+    parser.add_argument("--min-time", type=float, default=0.05, help="мин. длительность серии, сек")
+    parser.add_argument("--quick", action="store_true", help="только малые размеры входа")
+    args = parser.parse_args()
+
+    results = run(args.names, repeat=args.repeat, min_time=args.min_time, quick=args.quick)
+    if args.output:
+        save(args.output, results)
+    else:
+        json.dump({"environment": environment(), "results": results}, sys.stdout, indent=2, sort_keys=True)
+        print()
+    if args.compare:
+        rows = compare(results, load(args.compare), args.threshold)
+        for row in rows:
+            mark = "РЕГРЕССИЯ" if row["regression"] else ""
+            print(f"{row['name']:<45} {row['baseline']:>12.1f} -> {row['current']:>12.1f} ns/op "
+                  f"x{row['ratio']:.2f} {mark}", file=sys.stderr)
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
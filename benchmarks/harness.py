@@ -0,0 +1,120 @@
+"""Замер времени, сведения об окружении и сравнение результатов между запусками."""
+from typing import Callable, Dict, List, Optional
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+BENCHMARKS: List = []  # (имя, функция-фабрика) в порядке регистрации
+
+def benchmark(name: str):
+    """Регистрация фабрики замера.
+
+    Фабрика возвращает (функция, число операций за вызов) или генератор таких
+    пар для нескольких размеров входа; setup выполняется в фабрике и в замер
+    не входит.
+    """
+    def register(factory: Callable):
+        BENCHMARKS.append((name, factory))
+        return factory
+    return register
+
+def measure(func: Callable[[], object], ops: int = 1, repeat: int = 7,
+            min_time: float = 0.05, warmup: int = 1) -> Dict[str, float]:
+    """Время одной операции в наносекундах по repeat сериям.
+
+    Число вызовов в серии подбирается так, чтобы серия длилась не меньше
+    min_time: короткие замеры иначе тонут в шуме таймера.
+    """
+    for _ in range(warmup):
+        func()
+    number = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= min_time * 1e9:
+            break
+        number *= 10 if elapsed < min_time * 1e8 else 2
+    samples = [elapsed / (number * ops)]
+    for _ in range(repeat - 1):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter_ns() - start) / (number * ops))
+    median = statistics.median(samples)
+    return {
+        "ns_per_op": median,
+        "min": min(samples),
+        "max": max(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "ops_per_sec": 1e9 / median if median else 0.0,
+        "calls": number * repeat,
+        "ops": ops,
+    }
+
+def environment() -> Dict[str, object]:
+    """Сведения для сопоставимости запусков: версии, платформа, коммит."""
+    info = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "time": time.time(),
+    }
+    for module in ("numpy", "matplotlib", "requests", "orjson"):
+        try:
+            info[module] = __import__(module).__version__
+        except ImportError:
+            info[module] = None
+    try:
+        info["commit"] = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                        timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        info["commit"] = None
+    return info
+
+def run(names: Optional[List[str]] = None, repeat: int = 7, min_time: float = 0.05,
+        quick: bool = False) -> Dict[str, Dict]:
+    """Прогон зарегистрированных замеров (names - подстроки имён для фильтра)."""
+    results = {}
+    for name, factory in BENCHMARKS:
+        if names and not any(part in name for part in names):
+            continue
+        try:
+            cases = factory(quick)
+            if isinstance(cases, tuple):
+                cases = [(None, *cases)]
+            for case in cases:
+                label, func, ops = case
+                key = f"{name}[{label}]" if label is not None else name
+                results[key] = measure(func, ops, repeat=repeat, min_time=min_time)
+                print(f"{key:<45} {results[key]['ns_per_op']:>14.1f} ns/op", file=sys.stderr)
+        except Exception as e:  # Замер без окружения (нет Qt, занят порт) не должен срывать остальные
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+            print(f"{name:<45} ошибка: {e}", file=sys.stderr)
+    return results
+
+def compare(current: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float = 0.1) -> List[Dict]:
+    """Сравнение с прошлым запуском: ratio > 1 + threshold - регрессия."""
+    rows = []
+    for name, stats in current.items():
+        base = baseline.get(name)
+        if not base or "ns_per_op" not in stats or "ns_per_op" not in base:
+            continue
+        ratio = stats["ns_per_op"] / base["ns_per_op"] if base["ns_per_op"] else float("inf")
+        rows.append({"name": name, "baseline": base["ns_per_op"], "current": stats["ns_per_op"],
+                     "ratio": ratio, "regression": ratio > 1 + threshold})
+    return rows
+
+def save(path: str, results: Dict[str, Dict]) -> None:
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2, sort_keys=True)
+
+def load(path: str) -> Dict[str, Dict]:
+    with open(path) as f:
+        return json.load(f)["results"]
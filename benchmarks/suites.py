@@ -0,0 +1,212 @@
+"""Замеры горячих путей: индикаторы, стакан, разбор WebSocket, отрисовка графика, торговый цикл, ордер под нагрузкой чтений.
+
+Фабрика замера получает флаг quick и возвращает (функция, операций за вызов)
+либо генератор троек (размер, функция, операций за вызов). Код генератора
+после последнего yield выполняется после замеров и служит для очистки.
+"""
+import json
+import random
+import time
+import numpy as np
+from backend import batch_indicators
+from backend.indicators import EMA, RSI, SMA, StdDev, calculate_ema, calculate_rsi, calculate_sma
+from backend.orderbook import OrderBook
+from .harness import benchmark
+
+SEED = 42
+SYMBOL = "BTCUSDT"
+
+def sizes(quick: bool):
+    return (1000, 10000) if quick else (1000, 10000, 100000)
+
+def random_walk(n: int, seed: int = SEED) -> np.ndarray:
+    """Воспроизводимый ряд цен."""
+    rng = np.random.default_rng(seed)
+    return 30000 * np.exp(np.cumsum(rng.normal(0, 1e-4, n)))
+
+@benchmark("indicators.calculate")
+def calculate(quick):
+    for n in sizes(quick):
+        prices = random_walk(n).tolist()
+        for name, func in (("rsi", calculate_rsi), ("sma", calculate_sma), ("ema", calculate_ema)):
+            yield f"{name},{n}", lambda func=func, prices=prices: func(prices), 1
+
+@benchmark("indicators.stream")
+def stream(quick):
+    prices = random_walk(10000).tolist()
+    for name, cls in (("rsi", RSI), ("sma", SMA), ("ema", EMA), ("stdev", StdDev)):
+        def run(cls=cls):
+            indicator = cls(14)
+            update = indicator.update
+            for price in prices:
+                update(price)
+        yield name, run, len(prices)
+
+@benchmark("indicators.batch")
+def batch(quick):
+    for n in sizes(quick):
+        prices = random_walk(n)
+        for name in ("sma_series", "ema_series", "rsi_series", "stdev_series"):
+            func = getattr(batch_indicators, name)
+            yield f"{name},{n}", lambda func=func, prices=prices: func(prices), n
+
+def book_deltas(n: int, levels: int, seed: int = SEED):
+    """Дельты около вершины стакана: изменения объёма, новые и удалённые уровни."""
+    rng = random.Random(seed)
+    deltas = []
+    for _ in range(n):
+        bid = 29999.5 - rng.randrange(levels) * 0.5
+        ask = 30000.5 + rng.randrange(levels) * 0.5
+        deltas.append({'bids': [[bid, 0.0 if rng.random() < 0.1 else rng.uniform(0.1, 2)]],
+                       'asks': [[ask, 0.0 if rng.random() < 0.1 else rng.uniform(0.1, 2)]]})
+    return deltas
+
+@benchmark("orderbook")
+def orderbook(quick):
+    for levels in (50, 1000):
+        snapshot = {'bids': [[29999.5 - i * 0.5, 1.0] for i in range(levels)],
+                    'asks': [[30000.5 + i * 0.5, 1.0] for i in range(levels)]}
+        deltas = book_deltas(1000, levels)
+        book = OrderBook(SYMBOL)
+
+        def apply():
+            book.apply_snapshot(snapshot)
+            for delta in deltas:
+                book.apply_delta(delta)
+        yield f"apply_delta,{levels}", apply, len(deltas)
+
+        def best():
+            for _ in range(1000):
+                book.best_bid()
+                book.best_ask()
+        yield f"best_bid_ask,{levels}", best, 1000
+
+@benchmark("ws.on_ws_message")
+def on_ws_message(quick):
+    from backend.api import BitcioAPI
+    api = BitcioAPI("key", "secret")
+    book = api.orderbooks[SYMBOL] = OrderBook(SYMBOL)
+    book.apply_snapshot({'bids': [[29999.5 - i * 0.5, 1.0] for i in range(100)],
+                         'asks': [[30000.5 + i * 0.5, 1.0] for i in range(100)]})
+    prices = random_walk(1000).tolist()
+    messages = {
+        "trade": [json.dumps({"type": "trade", "symbol": SYMBOL, "price": p, "qty": 0.01, "side": "buy"})
+                  for p in prices],
+        "ticker": [json.dumps({"type": "ticker", "symbol": SYMBOL, "price": p}) for p in prices],
+        "depth": [json.dumps({"type": "depth", "symbol": SYMBOL, **delta}) for delta in book_deltas(1000, 100)],
+        "ignored": [json.dumps({"type": "heartbeat", "time": i}) for i in range(1000)],
+    }
+    for kind, batch in messages.items():
+        def run(batch=batch):
+            for message in batch:
+                api.on_ws_message(None, message)
+        yield kind, run, len(batch)
+    api.stop_websocket()
+    api.close()
+
+@benchmark("chart.update_plot")
+def chart(quick):
+    from PyQt5.QtWidgets import QApplication
+    from frontend.chart_widget import ChartWidget
+    app = QApplication.instance() or QApplication([])
+    widget = ChartWidget(refresh_interval=10 ** 6)  # Кадры вызываются вручную, таймер не мешает
+    widget.resize(600, 400)
+    widget.show()
+    app.processEvents()
+    now = time.time()
+    for i, price in enumerate(random_walk(10000).tolist()):
+        widget.series.append(now + i * 0.01, price)
+        widget.rsi_indicator.update(price)
+        widget.sma_indicator.update(price)
+        widget.indicator_series.append(now + i * 0.01, widget.rsi_indicator.value, widget.sma_indicator.value)
+    widget.dirty = True
+    widget.update_plot()
+
+    def blit():
+        widget.dirty = True
+        widget.update_plot()
+    yield "blit", blit, 1
+
+    def redraw():
+        widget.ax.set_xlim(0, 1)  # Смена масштаба: полная перерисовка
+        widget.dirty = True
+        widget.update_plot()
+    yield "redraw", redraw, 1
+    widget.timer.stop()
+    widget.close()
+
+class _Fixed:
+    """Индикатор с заданным значением (поток сделок его не меняет)."""
+
+    def __init__(self):
+        self.value = 50.0
+        self.window = (self.value,)
+
+    def update(self, price: float) -> float:
+        return self.value
+
+@benchmark("trading.step")
+def trading_step(quick):
+    """Полный цикл решения auto_scalp (риск, стакан, индикаторы, покупка и продажа) через симулятор биржи."""
+    from backend.api import BitcioAPI
+    from backend.risk_manager import RiskManager
+    from backend.trader import Scalper
+    from simulator import ExchangeServer
+    exchange = ExchangeServer(port=0, tick_rate=1000, balances={"BTC": 100.0, "USDT": 1e7}, seed=SEED).start()
+    # Бюджеты запросов сняты: замеряется цикл решения, а не ожидание маркеров
+    api = BitcioAPI("key", "secret", base_url=exchange.base_url, ws_url=exchange.ws_url,
+                    rate_limits={"order": None, "read": None})
+    try:
+        risk = RiskManager(api, max_position=1.0, min_spread=-1.0, max_loss=1e9)
+        scalper = Scalper(api, risk)
+        api.start_websocket(SYMBOL)
+        scalper.get_indicators(SYMBOL)
+        deadline = time.monotonic() + 5
+        while "indicators" not in api.metrics.snapshot() and time.monotonic() < deadline:
+            time.sleep(0.01)  # Ждём первые сделки из WebSocket
+        # Сигнал задаётся вручную, чтобы каждый цикл отправлял ордер; стороны чередуются, позиция не растёт
+        rsi, sma = _Fixed(), _Fixed()
+        scalper.indicators[SYMBOL] = {'rsi': rsi, 'sma': sma}
+
+        def step():
+            buy = rsi.value != 0.0
+            rsi.value, sma.value = (0.0, float('inf')) if buy else (100.0, float('-inf'))
+            scalper.step(SYMBOL, 0.001)
+        yield "buy/sell", step, 1
+    finally:
+        api.stop_websocket()
+        api.close()
+        exchange.stop()
+
+@benchmark("http.order_under_load")
+def order_under_load(quick):
+    """Задержка ордера через планировщик запросов при фоновом потоке чтений (балансы, стакан, история)."""
+    import threading
+    from backend.api import BitcioAPI
+    from simulator import ExchangeServer
+    exchange = ExchangeServer(port=0, tick_rate=100, balances={"BTC": 100.0, "USDT": 1e7}, seed=SEED).start()
+    # Ордера без бюджета, чтобы замер не упирался в лимит ордеров; чтения - с бюджетом по умолчанию
+    api = BitcioAPI("key", "secret", base_url=exchange.base_url, ws_url=exchange.ws_url,
+                    rate_limits={"order": None})
+    stop = threading.Event()
+
+    def reader(call):
+        while not stop.is_set():
+            call()
+
+    readers = [threading.Thread(target=reader, args=(call,), daemon=True) for call in (
+        lambda: api.get_balance("BTC"), lambda: api.get_orderbook(SYMBOL),
+        lambda: api.get_historical_trades(SYMBOL), lambda: api.get_order_history(SYMBOL, limit=1000))
+        for _ in range(4)]
+    try:
+        yield "place_order,idle", lambda: api.place_order(SYMBOL, "buy", 0.001), 1
+        for thread in readers:
+            thread.start()
+        yield "place_order,reads", lambda: api.place_order(SYMBOL, "buy", 0.001), 1
+    finally:
+        stop.set()
+        for thread in readers:
+            if thread.is_alive():
+                thread.join()
+        api.close()
+        exchange.stop()
@@ -1,3 +1,12 @@
 import os
 API_KEY = os.getenv('BITCIO_API_KEY', 'your_api_key')
-API_SECRET = os.getenv('BITCIO_API_SECRET', 'your_api_secret')
\ No newline at end of file
+API_SECRET = os.getenv('BITCIO_API_SECRET', 'your_api_secret')
+BASE_URL = os.getenv('BITCIO_BASE_URL', 'https://api.bitcio.com')
+WS_URL = os.getenv('BITCIO_WS_URL', 'wss://ws.bitcio.com')
+MAX_POSITION = float(os.getenv('BITCIO_MAX_POSITION', 0.1))      # Макс. доля баланса на сделку
+MIN_SPREAD = float(os.getenv('BITCIO_MIN_SPREAD', 0.001))        # Мин. спред
+MAX_LOSS = float(os.getenv('BITCIO_MAX_LOSS', 0.05))             # Макс. убыток (доля баланса)
+AUTO_SCALP_DURATION = int(os.getenv('BITCIO_AUTO_SCALP_DURATION', 3600))
+LEDGER_PATH = os.getenv('BITCIO_LEDGER_PATH', 'ledger.jsonl')  # Журнал позиций; пусто - без сохранения
+LATENCY_PATH = os.getenv('BITCIO_LATENCY_PATH', '')  # Снимки гистограмм задержек; пусто - без записи
+LATENCY_INTERVAL = float(os.getenv('BITCIO_LATENCY_INTERVAL', 60))  # Период снимков задержек, сек
@@ -0,0 +1,68 @@
+from typing import Sequence
+
+class BlitManager:
+    """Инкрементальная отрисовка графика через кэшированный фон (blitting).
+
+    Статичные элементы (оси, сетка, легенда, подписи) рисуются один раз в фон;
+    на каждом кадре восстанавливается фон и перерисовываются только
+    анимированные линии. Полная перерисовка нужна лишь при смене масштаба.
+    """
+
+    def __init__(self, canvas, artists: Sequence = ()):
+        self.canvas = canvas
+        self.background = None
+        self.artists = []
+        for artist in artists:
+            self.add_artist(artist)
+        self.cid = canvas.mpl_connect('draw_event', self.on_draw)
+
+    def add_artist(self, artist) -> None:
+        """Регистрация анимированного элемента."""
+        artist.set_animated(True)
+        self.artists.append(artist)
+
+    def on_draw(self, event) -> None:
+        """Сохранение фона после полной перерисовки (в т.ч. при изменении размера окна)."""
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self) -> None:
+        figure = self.canvas.figure
+        for artist in self.artists:
+            figure.draw_artist(artist)
+
+    def redraw(self) -> None:
+        """Полная перерисовка: фон будет пересохранён в on_draw."""
+        self.canvas.draw()
+
+    def update(self) -> None:
+        """Перерисовка только анимированных элементов поверх сохранённого фона."""
+        if self.background is None:
+            self.redraw()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_animated()
+        self.canvas.blit(self.canvas.figure.bbox)
+
+def fit_limits(ax, x, y, margin: float = 0.1) -> bool:
+    """Расширение пределов осей под данные с запасом.
+
+    Возвращает True, если пределы изменились и нужна полная перерисовка.
+    Запас по времени позволяет нескольким следующим тикам обойтись без неё.
+    """
+    if len(x) == 0:
+        return False
+    changed = False
+    x_min, x_max = float(x[0]), float(x[-1])
+    cur_min, cur_max = ax.get_xlim()
+    span = max(x_max - x_min, 1.0)
+    if x_min < cur_min or x_max > cur_max or x_min > cur_min + span * margin:
+        ax.set_xlim(x_min, x_max + span * margin)
+        changed = True
+    y_min, y_max = float(y.min()), float(y.max())
+    cur_min, cur_max = ax.get_ylim()
+    y_span = max(y_max - y_min, abs(y_max) * 1e-6, 1e-9)
+    if y_min < cur_min or y_max > cur_max or (cur_max - cur_min) > y_span * (1 + 2 * margin) * 4:
+        ax.set_ylim(y_min - y_span * margin, y_max + y_span * margin)
+        changed = True
+    return changed
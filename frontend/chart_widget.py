@@ -1,21 +1,30 @@
-from PyQt5.QtWidgets import QWidget
+from PyQt5.QtWidgets import QWidget, QVBoxLayout
+from PyQt5.QtCore import QTimer
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 import matplotlib.pyplot as plt
 import time
+from backend.indicators import RSI, SMA
+from backend.ring_buffer import RingBuffer
+from frontend.blit import BlitManager, fit_limits
 from typing import Dict
 
 class ChartWidget(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, window: int = 100000, refresh_interval: int = 100):
         super().__init__(parent)
-        self.prices = []
-        self.times = []
-        self.rsi = []
-        self.sma = []
+        self.series = RingBuffer(window, ('time', 'price'))
+        self.indicator_series = RingBuffer(window, ('time', 'rsi', 'sma'))
+        self.rsi_indicator = RSI(period=14)
+        self.sma_indicator = SMA(period=20)
         self.figure = plt.Figure()
         self.canvas = FigureCanvas(self.figure)
         self.ax = self.figure.add_subplot(211)
         self.ax_rsi = self.figure.add_subplot(212, sharex=self.ax)
+        self.dirty = False  # Есть новые данные с прошлого кадра
         self.init_ui()
+        # Тики накапливаются между кадрами: не больше одной отрисовки за интервал
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.update_plot)
+        self.timer.start(refresh_interval)
 
     def init_ui(self):
         self.ax.set_title("Цена и SMA")
@@ -23,7 +32,18 @@ class ChartWidget(QWidget):
         self.ax.set_ylabel("Цена")
         self.ax_rsi.set_title("RSI")
         self.ax_rsi.set_ylabel("RSI")
+        self.ax_rsi.set_ylim(0, 100)
+        self.price_line, = self.ax.plot([], [], 'b-', label='Цена')
+        self.sma_line, = self.ax.plot([], [], 'r-', label='SMA')
+        self.rsi_line, = self.ax_rsi.plot([], [], 'g-', label='RSI')
+        self.ax_rsi.axhline(70, color='red', linestyle='--')
+        self.ax_rsi.axhline(30, color='green', linestyle='--')
+        self.ax.legend()
+        self.ax_rsi.legend()
+        self.ax.grid(True)
+        self.ax_rsi.grid(True)
         self.figure.tight_layout()
+        self.blit = BlitManager(self.canvas, [self.price_line, self.sma_line, self.rsi_line])
         layout = QVBoxLayout()
         layout.addWidget(self.canvas)
         self.setLayout(layout)
@@ -31,38 +51,29 @@ class ChartWidget(QWidget):
     def update_price(self, data: Dict):
         """Обновление цены."""
         price = float(data.get('price', 0))
-        self.prices.append(price)
-        self.times.append(time.time())
-        if len(self.prices) > 100:
-            self.prices.pop(0)
-            self.times.pop(0)
-        self.update_plot()
+        self.series.append(time.time(), price)
+        self.rsi_indicator.update(price)
+        self.sma_indicator.update(price)
+        self.dirty = True
 
     def update_indicators(self, data: Dict):
         """Обновление индикаторов."""
-        from backend.indicators import calculate_rsi, calculate_sma
-        trades = self.prices[-100:]  # Последние 100 цен
-        if len(trades) >= 14:
-            self.rsi.append(calculate_rsi(trades, period=14))
-            self.sma.append(calculate_sma(trades, period=20))
-            if len(self.rsi) > 100:
-                self.rsi.pop(0)
-                self.sma.pop(0)
-        self.update_plot()
+        if self.series.count >= 14:
+            self.indicator_series.append(self.series.last('time'), self.rsi_indicator.value,
+                                         self.sma_indicator.value)
+            self.dirty = True
 
     def update_plot(self):
-        """Обновление графика."""
-        self.ax.clear()
-        self.ax_rsi.clear()
-        self.ax.plot(self.times, self.prices, 'b-', label='Цена')
-        if self.sma:
-            self.ax.plot(self.times[-len(self.sma):], self.sma, 'r-', label='SMA')
-        self.ax.legend()
-        self.ax.grid(True)
-        if self.rsi:
-            self.ax_rsi.plot(self.times[-len(self.rsi):], self.rsi, 'g-', label='RSI')
-            self.ax_rsi.axhline(70, color='red', linestyle='--')
-            self.ax_rsi.axhline(30, color='green', linestyle='--')
-            self.ax_rsi.legend()
-        self.ax_rsi.grid(True)
-        self.canvas.draw()
\ No newline at end of file
+        """Обновление графика: перерисовываются только линии, если масштаб не изменился."""
+        if not self.dirty:
+            return
+        self.dirty = False
+        prices = self.series.snapshot()
+        indicators = self.indicator_series.snapshot()
+        self.price_line.set_data(prices['time'], prices['price'])
+        self.sma_line.set_data(indicators['time'], indicators['sma'])
+        self.rsi_line.set_data(indicators['time'], indicators['rsi'])
+        if fit_limits(self.ax, prices['time'], prices['price']):
+            self.blit.redraw()
+        else:
+            self.blit.update()
@@ -0,0 +1,49 @@
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem
+from PyQt5.QtCore import QTimer
+
+COLUMNS = ("count", "mean", "p50", "p99", "p999", "max")
+
+class LatencyPanel(QWidget):
+    """Таблица задержек по этапам (мкс): от приёма тика до подтверждения ордера."""
+
+    def __init__(self, metrics, refresh_interval: int = 1000, parent=None):
+        super().__init__(parent)
+        self.metrics = metrics
+        self.setWindowTitle("Задержки")
+        self.init_ui()
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(refresh_interval)
+        self.refresh()
+
+    def init_ui(self):
+        self.table = QTableWidget(0, len(COLUMNS), self)
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        reset_button = QPushButton("Сбросить", self)
+        reset_button.clicked.connect(self.reset)
+
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(QLabel("Время в микросекундах"))
+        button_layout.addWidget(reset_button)
+
+        layout = QVBoxLayout()
+        layout.addLayout(button_layout)
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+        self.resize(600, 300)
+
+    def refresh(self):
+        """Обновление таблицы из текущего снимка гистограмм."""
+        snapshot = self.metrics.snapshot()
+        stages = sorted(snapshot)
+        self.table.setRowCount(len(stages))
+        self.table.setVerticalHeaderLabels(stages)
+        for row, stage in enumerate(stages):
+            stats = snapshot[stage]
+            for column, name in enumerate(COLUMNS):
+                text = str(stats[name]) if name == "count" else f"{stats[name]:.1f}"
+                self.table.setItem(row, column, QTableWidgetItem(text))
+
+    def reset(self):
+        self.metrics.reset()
+        self.refresh()
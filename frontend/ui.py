@@ -4,13 +4,20 @@ from PyQt5.QtCore import QTimer
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 import time
+from backend.ring_buffer import RingBuffer
+from frontend.blit import BlitManager, fit_limits
+from frontend.workers import TradingExecutor
+from frontend.latency_panel import LatencyPanel
 
 class ScalpingApp(QWidget):
-    def __init__(self, scalper):
+    def __init__(self, scalper, window: int = 100000, refresh_interval: int = 1000):
         super().__init__()
         self.scalper = scalper
-        self.prices = []
-        self.times = []
+        self.series = RingBuffer(window, ('time', 'price'))  # Пишет поток WebSocket, читает поток Qt
+        self.refresh_interval = refresh_interval
+        self.rendered_count = 0
+        self.executor = TradingExecutor()  # HTTP и стратегии не блокируют поток GUI
+        self.latency_panel = None
         self.init_ui()
 
     def init_ui(self):
@@ -23,12 +30,22 @@ class ScalpingApp(QWidget):
         self.quantity_input.setText("0.001")
         self.strategy_combo = QComboBox(self)
         self.strategy_combo.addItems(["Ручная торговля", "Авто-скальпинг"])
+        self.timeframe_combo = QComboBox(self)
+        self.timeframe_combo.addItem("Тики")
+        if self.scalper.candles is not None:
+            self.timeframe_combo.addItems(self.scalper.candles.timeframes)
+        self.timeframe_combo.currentTextChanged.connect(lambda _: self.reset_plot())
 
         # Кнопки
         self.buy_button = QPushButton('Купить', self)
         self.sell_button = QPushButton('Продать', self)
         self.start_auto_button = QPushButton('Запустить авто', self)
+        self.stop_auto_button = QPushButton('Остановить авто', self)
         self.cancel_all_button = QPushButton('Отменить все ордера', self)
+        self.latency_button = QPushButton('Задержки', self)
+
+        # Позиция и PnL по текущему тикеру
+        self.pnl_label = QLabel(self)
 
         # Лог
         self.log_text = QTextEdit(self)
@@ -41,6 +58,9 @@ class ScalpingApp(QWidget):
         self.ax.set_title("Цена в реальном времени")
         self.ax.set_xlabel("Время")
         self.ax.set_ylabel("Цена")
+        self.ax.grid(True)
+        self.price_line, = self.ax.plot([], [], 'b-')
+        self.blit = BlitManager(self.canvas, [self.price_line])
 
         # Макет
         input_layout = QHBoxLayout()
@@ -50,16 +70,21 @@ class ScalpingApp(QWidget):
         input_layout.addWidget(self.quantity_input)
         input_layout.addWidget(QLabel('Стратегия:'))
         input_layout.addWidget(self.strategy_combo)
+        input_layout.addWidget(QLabel('График:'))
+        input_layout.addWidget(self.timeframe_combo)
 
         button_layout = QHBoxLayout()
         button_layout.addWidget(self.buy_button)
         button_layout.addWidget(self.sell_button)
         button_layout.addWidget(self.start_auto_button)
+        button_layout.addWidget(self.stop_auto_button)
         button_layout.addWidget(self.cancel_all_button)
+        button_layout.addWidget(self.latency_button)
 
         main_layout = QVBoxLayout()
         main_layout.addLayout(input_layout)
         main_layout.addLayout(button_layout)
+        main_layout.addWidget(self.pnl_label)
         main_layout.addWidget(self.canvas)
         main_layout.addWidget(QLabel('Лог транзакций:'))
         main_layout.addWidget(self.log_text)
@@ -71,83 +96,152 @@ class ScalpingApp(QWidget):
         self.buy_button.clicked.connect(self.buy)
         self.sell_button.clicked.connect(self.sell)
         self.start_auto_button.clicked.connect(self.start_auto)
+        self.stop_auto_button.clicked.connect(self.stop_auto)
         self.cancel_all_button.clicked.connect(self.cancel_all)
+        self.latency_button.clicked.connect(self.show_latency)
 
         # Таймер для обновления графика
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_plot)
-        self.timer.start(1000)  # Обновление каждую секунду
+        self.timer.start(self.refresh_interval)  # Не больше одного кадра за интервал
 
         # Запуск WebSocket
-        self.scalper.api.start_websocket(self.symbol_input.text(), self.update_price)
+        self.chart_symbol = self.symbol_input.text()  # Автоскальпинг других пар подписывает их тикеры тоже
+        self.scalper.api.start_websocket(self.chart_symbol, self.update_price)
         self.show()
 
     def update_price(self, data):
         """Обновление цены с WebSocket."""
-        price = float(data.get('price', 0))
-        self.prices.append(price)
-        self.times.append(time.time())
-        if len(self.prices) > 100:  # Ограничение длины графика
-            self.prices.pop(0)
-            self.times.pop(0)
+        if data.get('symbol', self.chart_symbol) != self.chart_symbol:
+            return
+        self.series.append(time.time(), float(data.get('price', 0)))
+
+    def reset_plot(self):
+        """Смена источника графика: следующий кадр перерисуется целиком."""
+        self.rendered_count = -1
+
+    def plot_source(self):
+        """Буфер и колонка цены для графика: тики или закрытия свечей выбранного таймфрейма."""
+        timeframe = self.timeframe_combo.currentText()
+        if timeframe == "Тики":
+            return self.series, 'price'
+        return self.scalper.candles.get(self.symbol_input.text(), timeframe).history, 'close'
+
+    def update_pnl(self):
+        """Позиция и PnL из журнала позиций (без запросов к бирже)."""
+        pnl = self.scalper.ledger.pnl(self.symbol_input.text())
+        self.pnl_label.setText(f"Позиция: {pnl['quantity']:.6f} по {pnl['avg_price']:.2f} | "
+                               f"Реализованный: {pnl['realized']:.2f} | Нереализованный: {pnl['unrealized']:.2f} | "
+                               f"Комиссии: {pnl['fees']:.2f} | Итого: {pnl['net']:.2f}")
 
     def update_plot(self):
-        """Обновление графика цен."""
-        self.ax.clear()
-        self.ax.plot(self.times, self.prices, 'b-')
-        self.ax.set_title(f"Цена {self.symbol_input.text()}")
-        self.ax.grid(True)
-        self.canvas.draw()
+        """Обновление графика цен и строки PnL."""
+        self.update_pnl()
+        buffer, field = self.plot_source()
+        if buffer.count == self.rendered_count:
+            return  # Новых данных нет, буфер не читается
+        # Линия копирует данные сама, поэтому ей отдаются представления буфера без промежуточной копии
+        self.rendered_count = buffer.read(lambda data: self.price_line.set_data(data['time'], data[field]))
+        times, prices = self.price_line.get_data()
+        title = f"Цена {self.symbol_input.text()}"
+        changed = title != self.ax.get_title()
+        if changed:
+            self.ax.set_title(title)
+        if fit_limits(self.ax, times, prices) or changed:
+            self.blit.redraw()
+        else:
+            self.blit.update()
+
+    def on_order_result(self, title: str, label: str, res):
+        """Результат ордера из фонового потока."""
+        self.log_text.append(f"{label}: {res}")
+        QMessageBox.information(self, title, str(res))
+
+    def on_error(self, label: str, error: str):
+        """Ошибка из фонового потока."""
+        self.log_text.append(f"{label}: {error}")
+        QMessageBox.critical(self, 'Ошибка', error)
 
     def buy(self):
         """Обработка покупки."""
         try:
             symbol = self.symbol_input.text()
             quantity = float(self.quantity_input.text())
-            res = self.scalper.buy(symbol, quantity)
-            self.log_text.append(f"Покупка: {res}")
-            QMessageBox.information(self, 'Купить', str(res))
+            self.executor.submit(self.scalper.buy, symbol, quantity,
+                                 on_result=lambda res: self.on_order_result('Купить', 'Покупка', res),
+                                 on_error=lambda e: self.on_error('Ошибка покупки', e))
         except Exception as e:
-            self.log_text.append(f"Ошибка покупки: {e}")
-            QMessageBox.critical(self, 'Ошибка', str(e))
+            self.on_error('Ошибка покупки', str(e))
 
     def sell(self):
         """Обработка продажи."""
         try:
             symbol = self.symbol_input.text()
             quantity = float(self.quantity_input.text())
-            res = self.scalper.sell(symbol, quantity)
-            self.log_text.append(f"Продажа: {res}")
-            QMessageBox.information(self, 'Продать', str(res))
+            self.executor.submit(self.scalper.sell, symbol, quantity,
+                                 on_result=lambda res: self.on_order_result('Продать', 'Продажа', res),
+                                 on_error=lambda e: self.on_error('Ошибка продажи', e))
         except Exception as e:
-            self.log_text.append(f"Ошибка продажи: {e}")
-            QMessageBox.critical(self, 'Ошибка', str(e))
+            self.on_error('Ошибка продажи', str(e))
 
     def start_auto(self):
-        """Запуск автоматического скальпинга."""
+        """Запуск автоматического скальпинга в фоне (по одному на тикер)."""
         try:
             symbol = self.symbol_input.text()
             quantity = float(self.quantity_input.text())
-            if self.strategy_combo.currentText() == "Авто-скальпинг":
-                self.log_text.append(f"Запуск авто-скальпинга для {symbol}...")
-                self.scalper.auto_scalp(symbol, quantity)
-                self.log_text.append("Авто-скальпинг завершён")
+            strategy = self.strategy_combo.currentText()
+            if strategy == "Авто-скальпинг":
+                started = self.executor.start_strategy(
+                    strategy, symbol, self.scalper.auto_scalp, symbol, quantity,
+                    on_finished=lambda: self.log_text.append(f"Авто-скальпинг {symbol} завершён"),
+                    on_error=lambda e: self.on_error('Ошибка авто-скальпинга', e))
+                if started:
+                    self.log_text.append(f"Запуск авто-скальпинга для {symbol}...")
+                else:
+                    self.log_text.append(f"Авто-скальпинг для {symbol} уже запущен")
         except Exception as e:
-            self.log_text.append(f"Ошибка авто-скальпинга: {e}")
-            QMessageBox.critical(self, 'Ошибка', str(e))
+            self.on_error('Ошибка авто-скальпинга', str(e))
+
+    def stop_auto(self):
+        """Остановка автоматического скальпинга по текущему тикеру."""
+        symbol = self.symbol_input.text()
+        if self.executor.stop_strategy(self.strategy_combo.currentText(), symbol):
+            self.log_text.append(f"Остановка авто-скальпинга для {symbol}...")
 
     def cancel_all(self):
         """Отмена всех ордеров."""
-        try:
-            symbol = self.symbol_input.text()
-            self.scalper.cancel_all_orders(symbol)
-            self.log_text.append(f"Все ордера для {symbol} отменены")
-            QMessageBox.information(self, 'Отмена', "Все ордера отменены")
-        except Exception as e:
-            self.log_text.append(f"Ошибка отмены: {e}")
-            QMessageBox.critical(self, 'Ошибка', str(e))
+        symbol = self.symbol_input.text()
+
+        def done(reports):
+            errors = [report for report in reports if report.get("status") == "error"]
+            for report in errors:
+                self.log_text.append(f"Ошибка отмены {report['order_id']}: {report['reason']}")
+            if errors:
+                message = f"Отменено {len(reports) - len(errors)} из {len(reports)}, ошибок: {len(errors)}"
+                self.log_text.append(f"{symbol}: {message}")
+                QMessageBox.warning(self, 'Отмена', message)
+            else:
+                self.log_text.append(f"Все ордера для {symbol} отменены ({len(reports)})")
+                QMessageBox.information(self, 'Отмена', "Все ордера отменены")
+
+        self.executor.submit(self.scalper.cancel_all_orders, symbol, on_result=done,
+                             on_error=lambda e: self.on_error('Ошибка отмены', e))
+
+    def show_latency(self):
+        """Окно с гистограммами задержек по этапам."""
+        if self.latency_panel is None:
+            self.latency_panel = LatencyPanel(self.scalper.api.metrics)
+        self.latency_panel.show()
+        self.latency_panel.raise_()
 
     def closeEvent(self, event):
-        """Остановка WebSocket при закрытии."""
+        """Остановка стратегий и WebSocket при закрытии."""
+        self.executor.shutdown()
         self.scalper.api.stop_websocket()
+        if self.scalper.api.recorder is not None:
+            self.scalper.api.recorder.close()
+        self.scalper.ledger.close()  # Финальный снимок позиций
+        self.scalper.api.metrics.stop_dump()
+        if self.latency_panel is not None:
+            self.latency_panel.close()
         event.accept()
\ No newline at end of file
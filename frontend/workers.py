@@ -0,0 +1,85 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from typing import Callable, Dict, Tuple
+import threading
+
+class WorkerSignals(QObject):
+    """Сигналы фоновой задачи; обработчики выполняются в потоке GUI."""
+    result = pyqtSignal(object)
+    error = pyqtSignal(str)
+    finished = pyqtSignal()
+
+class Worker(QRunnable):
+    """Фоновая задача для QThreadPool."""
+
+    def __init__(self, fn: Callable, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
+
+class TradingExecutor:
+    """Исполнение торговых операций вне потока GUI.
+
+    Ордера и стратегии работают в разных пулах, чтобы долгие стратегии
+    не занимали потоки, нужные для ручных ордеров.
+    """
+
+    def __init__(self, order_threads: int = 4, max_strategies: int = 16):
+        self.order_pool = QThreadPool()
+        self.order_pool.setMaxThreadCount(order_threads)
+        self.strategy_pool = QThreadPool()
+        self.strategy_pool.setMaxThreadCount(max_strategies)
+        self.strategies: Dict[Tuple[str, str], threading.Event] = {}  # (стратегия, тикер) -> сигнал остановки
+
+    def submit(self, fn: Callable, *args, on_result=None, on_error=None, **kwargs) -> Worker:
+        """Запуск короткой операции (ордер, отмена) в пуле ордеров."""
+        worker = Worker(fn, *args, **kwargs)
+        if on_result:
+            worker.signals.result.connect(on_result)
+        if on_error:
+            worker.signals.error.connect(on_error)
+        self.order_pool.start(worker)
+        return worker
+
+    def start_strategy(self, name: str, symbol: str, fn: Callable, *args,
+                       on_finished=None, on_error=None, **kwargs) -> bool:
+        """Запуск стратегии; fn получает stop_event. False, если уже запущена для тикера."""
+        key = (name, symbol)
+        if key in self.strategies:
+            return False
+        stop_event = threading.Event()
+        self.strategies[key] = stop_event
+        worker = Worker(fn, *args, stop_event=stop_event, **kwargs)
+        worker.signals.finished.connect(lambda: self.strategies.pop(key, None))
+        if on_finished:
+            worker.signals.finished.connect(on_finished)
+        if on_error:
+            worker.signals.error.connect(on_error)
+        self.strategy_pool.start(worker)
+        return True
+
+    def stop_strategy(self, name: str, symbol: str) -> bool:
+        """Остановка стратегии по тикеру."""
+        stop_event = self.strategies.get((name, symbol))
+        if stop_event is None:
+            return False
+        stop_event.set()
+        return True
+
+    def shutdown(self, timeout_ms: int = 5000) -> None:
+        """Остановка всех стратегий и ожидание завершения задач."""
+        for stop_event in self.strategies.values():
+            stop_event.set()
+        self.strategy_pool.waitForDone(timeout_ms)
+        self.order_pool.waitForDone(timeout_ms)
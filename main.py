@@ -1,14 +1,71 @@
 from backend.api import BitcioAPI
-from backend.trader import Scalper
-from frontend.ui import ScalpingApp
-from config import API_KEY, API_SECRET
+from backend.ledger import Ledger
+from backend.risk_manager import RiskManager
+import config
+import argparse
+from typing import Optional
+import signal
 import sys
-from PyQt5.QtWidgets import QApplication
 
-if __name__ == '__main__':
-    api = BitcioAPI(API_KEY, API_SECRET)
-    scalper = Scalper(api)
+def run_gui(api: BitcioAPI, risk_manager: RiskManager) -> int:
+    """Графический интерфейс (PyQt и matplotlib загружаются только здесь)."""
+    from PyQt5.QtWidgets import QApplication
+    from backend.candles import CandleAggregator
+    from backend.trader import Scalper
+    from frontend.ui import ScalpingApp
 
+    scalper = Scalper(api, risk_manager, candles=CandleAggregator())
+    api.start_account_stream()
     app = QApplication(sys.argv)
     gui = ScalpingApp(scalper)
-    sys.exit(app.exec_())
\ No newline at end of file
+    return app.exec_()
+
+def run_headless(path: str, record: Optional[str] = None) -> int:
+    """Стратегии из файла конфигурации без интерфейса; SIGINT/SIGTERM останавливают с отменой ордеров."""
+    from backend.runner import build_runner, load_config
+
+    settings = load_config(path)
+    if record:
+        settings["record"] = {**settings.get("record", {}), "path": record}
+    settings.setdefault("api", {}).setdefault("base_url", config.BASE_URL)
+    settings["api"].setdefault("ws_url", config.WS_URL)
+    settings.setdefault("risk", {"max_position": config.MAX_POSITION, "min_spread": config.MIN_SPREAD,
+                                 "max_loss": config.MAX_LOSS})
+    settings.setdefault("ledger", {"path": config.LEDGER_PATH})
+    settings.setdefault("latency", {"path": config.LATENCY_PATH, "interval": config.LATENCY_INTERVAL})
+    runner = build_runner(settings, config.API_KEY, config.API_SECRET)
+    signal.signal(signal.SIGTERM, lambda signum, frame: runner.stop())
+    print(f"Запуск {len(runner.instances)} стратегий: {', '.join(i.name for i in runner.instances)}")
+    try:
+        runner.start()
+        runner.run(settings.get("duration"))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("Остановка: отмена открытых ордеров...")
+        for symbol, reports in runner.shutdown().items():
+            errors = [r for r in reports if r.get("status") == "error"]
+            print(f"{symbol}: отменено {len(reports) - len(errors)}, ошибок {len(errors)}")
+        for row in runner.stats():
+            print(row)
+    return 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="BitcioTrader")
+    parser.add_argument("--headless", metavar="CONFIG", help="запуск стратегий из JSON-файла без интерфейса")
+    parser.add_argument("--record", metavar="PATH", help="запись рыночных данных WebSocket в каталог PATH")
+    args = parser.parse_args()
+    if args.headless:
+        sys.exit(run_headless(args.headless, args.record))
+    api = BitcioAPI(config.API_KEY, config.API_SECRET, base_url=config.BASE_URL, ws_url=config.WS_URL)
+    if args.record:
+        from backend.recorder import TickRecorder
+        api.recorder = TickRecorder(args.record)
+    ledger = Ledger(books=api.orderbooks)
+    if config.LEDGER_PATH:
+        ledger.open(config.LEDGER_PATH)
+    if config.LATENCY_PATH:
+        api.metrics.start_dump(config.LATENCY_PATH, config.LATENCY_INTERVAL)
+    risk_manager = RiskManager(api, max_position=config.MAX_POSITION, min_spread=config.MIN_SPREAD,
+                               max_loss=config.MAX_LOSS, ledger=ledger)
+    sys.exit(run_gui(api, risk_manager))
@@ -0,0 +1,3 @@
+"""Локальный симулятор биржи Bitcio (REST + WebSocket) для нагрузочных тестов."""
+from .engine import MatchingEngine
+from .server import ExchangeServer
@@ -0,0 +1,37 @@
+"""Запуск симулятора: python -m simulator --port 8080 --tick-rate 1000."""
+import argparse
+from .server import ExchangeServer
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Локальный симулятор биржи Bitcio")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--symbols", default="BTCUSDT,ETHUSDT", help="пары через запятую")
+    parser.add_argument("--tick-rate", type=float, default=100.0, help="шагов рынка в секунду")
+    parser.add_argument("--levels", type=int, default=20, help="уровней котировок с каждой стороны")
+    parser.add_argument("--volatility", type=float, default=1e-4, help="стандартное отклонение цены за секунду")
+    parser.add_argument("--fee-rate", type=float, default=0.001)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка REST, сек")
+    parser.add_argument("--jitter", type=float, default=0.0, help="случайная добавка к задержке REST, сек")
+    parser.add_argument("--ws-latency", type=float, default=0.0, help="задержка сообщений WebSocket, сек")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля REST-ответов 503")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="доля потерянных сообщений WebSocket")
+    parser.add_argument("--disconnect-interval", type=float, default=0.0,
+                        help="среднее время между разрывами WebSocket, сек (0 - без разрывов)")
+    parser.add_argument("--rate-limit", type=int, default=0, help="REST-запросов в секунду, сверх - 429 (0 - без лимита)")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    server = ExchangeServer(
+        symbols=args.symbols.split(","), host=args.host, port=args.port, tick_rate=args.tick_rate,
+        levels=args.levels, volatility=args.volatility, fee_rate=args.fee_rate, latency=args.latency,
+        jitter=args.jitter, ws_latency=args.ws_latency, error_rate=args.error_rate, drop_rate=args.drop_rate,
+        disconnect_interval=args.disconnect_interval, rate_limit=args.rate_limit, seed=args.seed)
+    print(f"BITCIO_BASE_URL={server.base_url} BITCIO_WS_URL={server.ws_url}")
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
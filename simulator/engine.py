@@ -0,0 +1,257 @@
+"""Движок сопоставления ордеров с приоритетом цена-время."""
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+import itertools
+import time
+
+USER = "user"  # Ордера клиента: учитываются в балансах и истории
+SYNTHETIC = "synthetic"  # Заявки генератора рынка: ликвидность и встречные сделки
+
+class Book:
+    """Заявки одной пары: очереди по ценовым уровням и отсортированные цены."""
+
+    def __init__(self, symbol: str, history: int = 1000):
+        self.symbol = symbol
+        self.bids: Dict[float, Deque[Dict]] = {}
+        self.asks: Dict[float, Deque[Dict]] = {}
+        self.bid_prices: List[float] = []  # По возрастанию, лучший бид в конце
+        self.ask_prices: List[float] = []  # По возрастанию, лучший аск в начале
+        self.seq = 0
+        self.changed: Dict[Tuple[str, float], None] = {}  # Изменённые уровни с последней дельты
+        self.trades: Deque[Dict] = deque(maxlen=history)
+        self.last_price: Optional[float] = None
+
+    def best_bid(self) -> Optional[float]:
+        return self.bid_prices[-1] if self.bid_prices else None
+
+    def best_ask(self) -> Optional[float]:
+        return self.ask_prices[0] if self.ask_prices else None
+
+    def level_qty(self, side: str, price: float) -> float:
+        orders = (self.bids if side == "buy" else self.asks).get(price)
+        return sum(o["quantity"] - o["filled"] for o in orders) if orders else 0.0
+
+    def add(self, order: Dict) -> None:
+        """Постановка остатка ордера в очередь уровня."""
+        side, price = order["side"], order["price"]
+        levels, prices = (self.bids, self.bid_prices) if side == "buy" else (self.asks, self.ask_prices)
+        queue = levels.get(price)
+        if queue is None:
+            queue = levels[price] = deque()
+            insort(prices, price)
+        queue.append(order)
+        self.changed[(side, price)] = None
+
+    def remove(self, order: Dict) -> None:
+        """Снятие ордера из очереди уровня."""
+        side, price = order["side"], order["price"]
+        levels, prices = (self.bids, self.bid_prices) if side == "buy" else (self.asks, self.ask_prices)
+        queue = levels.get(price)
+        if queue is None:
+            return
+        try:
+            queue.remove(order)
+        except ValueError:
+            return
+        if not queue:
+            del levels[price]
+            del prices[bisect_left(prices, price)]
+        self.changed[(side, price)] = None
+
+    def depth(self, limit: int = 100) -> Dict:
+        """Снимок верхних уровней с номером последовательности."""
+        bids = [[p, self.level_qty("buy", p)] for p in reversed(self.bid_prices[-limit:])]
+        asks = [[p, self.level_qty("sell", p)] for p in self.ask_prices[:limit]]
+        return {"symbol": self.symbol, "bids": bids, "asks": asks, "seq": self.seq}
+
+    def delta(self) -> Optional[Dict]:
+        """Дельта по изменённым уровням (None, если изменений не было)."""
+        if not self.changed:
+            return None
+        self.seq += 1
+        bids, asks = [], []
+        for side, price in self.changed:
+            (bids if side == "buy" else asks).append([price, self.level_qty(side, price)])
+        self.changed = {}
+        return {"type": "depth", "symbol": self.symbol, "bids": bids, "asks": asks, "seq": self.seq}
+
+class MatchingEngine:
+    """Биржа с одним счётом клиента: лимитные и рыночные ордера, комиссии, балансы.
+
+    Каждое действие возвращает события для рассылки (сделки, балансы, а для
+    ордеров клиента - их состояние и исполнения); дельты стакана копятся по
+    парам и забираются через deltas().
+    """
+
+    def __init__(self, balances: Dict[str, float], fee_rate: float = 0.001, history: int = 1000):
+        self.balances = dict(balances)
+        self.fee_rate = fee_rate
+        self.history = history
+        self.books: Dict[str, Book] = {}
+        self.orders: Dict[str, Dict] = {}  # Ордера клиента по id
+        self.order_log: Dict[str, Deque[Dict]] = {}  # История ордеров клиента по паре
+        self.ids = itertools.count(1)
+
+    def book(self, symbol: str) -> Book:
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = Book(symbol, self.history)
+            self.order_log[symbol] = deque(maxlen=self.history)
+        return book
+
+    def submit(self, symbol: str, side: str, quantity: float, price: Optional[float] = None,
+               owner: str = USER) -> Tuple[Dict, List[Dict]]:
+        """Приём ордера: исполнение против встречных заявок, остаток лимитного - в стакан."""
+        book = self.book(symbol)
+        order = {
+            "order_id": str(next(self.ids)),
+            "symbol": symbol,
+            "side": side,
+            "quantity": float(quantity),
+            "filled": 0.0,
+            "price": float(price) if price else None,
+            "type": "limit" if price else "market",
+            "status": "new",
+            "time": time.time(),
+            "owner": owner,
+        }
+        if owner == USER:
+            self.orders[order["order_id"]] = order
+            self.order_log[symbol].append(order)
+            reason = self._check_funds(book, order)
+            if reason:
+                order["status"] = "rejected"
+                order["reason"] = reason
+                return order, [self.order_event(order)]
+        events = self._match(book, order)
+        remaining = order["quantity"] - order["filled"]
+        if remaining <= 1e-12:
+            order["status"] = "filled"
+        elif order["type"] == "limit":
+            order["status"] = "open" if order["filled"] == 0 else "partially_filled"
+            book.add(order)
+        else:
+            order["status"] = "cancelled" if order["filled"] == 0 else "partially_filled"
+        if owner == USER:
+            events.append(self.order_event(order))
+        return order, events
+
+    def cancel(self, order_id: str) -> Optional[Dict]:
+        """Снятие ордера (None, если не найден или уже неактивен)."""
+        order = self.orders.get(order_id)
+        if order is None or order["status"] not in ("open", "partially_filled"):
+            return None
+        self.book(order["symbol"]).remove(order)
+        order["status"] = "cancelled"
+        return order
+
+    def cancel_owned(self, order: Dict) -> None:
+        """Снятие заявки генератора рынка (без учёта в истории)."""
+        if order["status"] in ("open", "partially_filled"):
+            self.book(order["symbol"]).remove(order)
+            order["status"] = "cancelled"
+
+    @staticmethod
+    def order_event(order: Dict) -> Dict:
+        """Событие приватного потока с текущим состоянием ордера клиента."""
+        return {"type": "order", "symbol": order["symbol"],
+                "order": {**{k: v for k, v in order.items() if k != "owner"}, "fills": list(order.get("fills", ()))}}
+
+    def history_for(self, symbol: str, limit: int = 100, status: Optional[str] = None) -> List[Dict]:
+        orders = [o for o in self.order_log.get(symbol, ()) if status is None or o["status"] == status]
+        return orders[-limit:]
+
+    def deltas(self) -> List[Dict]:
+        """Дельты стакана по всем парам с изменениями."""
+        return [delta for delta in (book.delta() for book in self.books.values()) if delta is not None]
+
+    def _check_funds(self, book: Book, order: Dict) -> Optional[str]:
+        base = order["symbol"].split("USDT")[0]
+        if order["side"] == "sell":
+            return None if self.balances.get(base, 0.0) >= order["quantity"] else "Insufficient balance"
+        price = order["price"] or book.best_ask()
+        if price is None:
+            return "No liquidity"
+        cost = order["quantity"] * price * (1 + self.fee_rate)
+        return None if self.balances.get("USDT", 0.0) >= cost else "Insufficient balance"
+
+    def _match(self, book: Book, order: Dict) -> List[Dict]:
+        """Исполнение по встречным уровням, пока цена проходит по лимиту."""
+        events = []
+        buy = order["side"] == "buy"
+        levels, prices = (book.asks, book.ask_prices) if buy else (book.bids, book.bid_prices)
+        limit = order["price"]
+        while prices and order["quantity"] - order["filled"] > 1e-12:
+            price = prices[0] if buy else prices[-1]
+            if limit is not None and (price > limit if buy else price < limit):
+                break
+            queue = levels[price]
+            while queue and order["quantity"] - order["filled"] > 1e-12:
+                resting = queue[0]
+                qty = min(order["quantity"] - order["filled"], resting["quantity"] - resting["filled"])
+                if not self._funded(order, qty, price):
+                    return events  # Клиенту не хватило средств: исполнение прекращается
+                if not self._funded(resting, qty, price):
+                    queue.popleft()  # Стоящий ордер клиента больше не обеспечен
+                    resting["status"] = "cancelled"
+                    resting["reason"] = "Insufficient balance"
+                    events.append(self.order_event(resting))
+                    continue
+                fills = [self._settle(order, qty, price), self._settle(resting, qty, price)]
+                events.extend(self._trade_events(book, order, resting, qty, price))
+                events.extend(fill for fill in fills if fill is not None)
+                if resting["quantity"] - resting["filled"] <= 1e-12:
+                    resting["status"] = "filled"
+                    queue.popleft()
+                else:
+                    resting["status"] = "partially_filled"
+                if resting["owner"] == USER:
+                    events.append(self.order_event(resting))  # Стоящий ордер клиента исполнен позже
+            book.changed[("sell" if buy else "buy", price)] = None
+            if not queue:
+                del levels[price]
+                del prices[0 if buy else -1]
+        return events
+
+    def _funded(self, order: Dict, qty: float, price: float) -> bool:
+        """Хватает ли средств клиента на исполнение (заявки генератора не проверяются)."""
+        if order["owner"] != USER:
+            return True
+        if order["side"] == "buy":
+            return self.balances.get("USDT", 0.0) >= qty * price * (1 + self.fee_rate)
+        return self.balances.get(order["symbol"].split("USDT")[0], 0.0) >= qty
+
+    def _settle(self, order: Dict, qty: float, price: float) -> Optional[Dict]:
+        """Учёт исполнения; для ордеров клиента - списание и зачисление с комиссией и событие fill."""
+        order["filled"] += qty
+        if order["owner"] != USER:
+            return None
+        base = order["symbol"].split("USDT")[0]
+        notional = qty * price
+        fee = notional * self.fee_rate
+        if order["side"] == "buy":
+            self.balances["USDT"] = self.balances.get("USDT", 0.0) - notional - fee
+            self.balances[base] = self.balances.get(base, 0.0) + qty
+        else:
+            self.balances[base] = self.balances.get(base, 0.0) - qty
+            self.balances["USDT"] = self.balances.get("USDT", 0.0) + notional - fee
+        fills = order.setdefault("fills", [])
+        fills.append({"price": price, "quantity": qty, "fee": fee})
+        # filled - исполненный объём ордера с учётом этого исполнения: по нему клиент отбрасывает повторы
+        return {"type": "fill", "symbol": order["symbol"], "order_id": order["order_id"], "side": order["side"],
+                "price": price, "quantity": qty, "fee": fee, "filled": order["filled"], "fill": len(fills),
+                "time": time.time()}
+
+    def _trade_events(self, book: Book, taker: Dict, maker: Dict, qty: float, price: float) -> List[Dict]:
+        now = time.time()
+        book.last_price = price
+        trade = {"type": "trade", "symbol": book.symbol, "price": price, "qty": qty,
+                 "side": taker["side"], "time": now}
+        book.trades.append(trade)
+        events = [trade]
+        base = book.symbol.split("USDT")[0]
+        if USER in (taker["owner"], maker["owner"]):
+            for asset in (base, "USDT"):
+                events.append({"type": "balance", "asset": asset, "balance": self.balances.get(asset, 0.0)})
+        return events
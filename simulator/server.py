@@ -0,0 +1,410 @@
+"""Локальный сервер REST и WebSocket с интерфейсом API Bitcio поверх движка сопоставления."""
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set
+import asyncio
+import itertools
+import json
+import math
+import random
+import threading
+from aiohttp import WSCloseCode, web
+from .engine import SYNTHETIC, MatchingEngine
+
+DEFAULT_BALANCES = {"BTC": 1.0, "ETH": 10.0, "USDT": 100000.0}
+DEFAULT_PRICES = {"BTCUSDT": 30000.0, "ETHUSDT": 2000.0}
+ACCOUNT_EVENTS = {"order", "fill", "balance"}  # События счёта: сквозной номер seq для контроля пропусков
+
+class Market:
+    """Состояние генератора рынка по паре: средняя цена и собственные котировки."""
+
+    def __init__(self, symbol: str, price: float):
+        self.symbol = symbol
+        self.mid = price
+        self.tick = 10 ** math.floor(math.log10(price) - 4)  # Шаг цены ~0.01% от цены
+        self.anchor = None  # Лучший бид котировок в шагах цены
+        self.quotes: Dict[int, Dict] = {}  # Цена в шагах -> заявка генератора
+        self.dirty = True  # Заявки могли быть исполнены, нужна перестановка
+
+class Subscriber:
+    """Соединение WebSocket: каналы, очередь исходящих сообщений и задача отправки."""
+
+    def __init__(self, ws: web.WebSocketResponse, channels: Iterable[str] = (), account: bool = True,
+                 private: bool = False):
+        self.ws = ws
+        self.channels: Set[str] = set(channels)
+        self.account = account  # Получает события баланса (счёт у сервера один)
+        self.private = private  # Приватный поток счёта: ордера, исполнения, балансы
+        self.queue: Deque = deque()
+        self.wake = asyncio.Event()
+
+class ExchangeServer:
+    """Симулятор биржи для нагрузочных тестов и проверки переподключений без реальной биржи.
+
+    REST: /orderbook, /balance, /order (POST, DELETE), /orders, /trades.
+    WebSocket: /stream (подписки {"method": "subscribe", "params": ["trade:BTCUSDT"]}),
+    /ticker/{symbol} (все каналы пары) и /account (приватный поток с заголовком
+    X-API-KEY: события order, fill и balance со сквозным номером seq). Генератор рынка делает tick_rate
+    шагов в секунду: сдвиг цены, перестановка котировок, случайная встречная
+    сделка; каждый шаг даёт сообщения ticker, depth и trade. Задержки REST
+    (latency, jitter) и WebSocket (ws_latency), ошибки 503 (error_rate),
+    потеря сообщений (drop_rate) и разрывы соединений (disconnect_interval)
+    внедряются по заданным параметрам. При rate_limit > 0 REST-ответы несут
+    заголовки X-RateLimit-* (окно в секунду), сверх лимита - 429 с Retry-After.
+    """
+
+    def __init__(self, symbols: Iterable[str] = ("BTCUSDT",), host: str = "127.0.0.1", port: int = 8080,
+                 balances: Optional[Dict[str, float]] = None, prices: Optional[Dict[str, float]] = None,
+                 tick_rate: float = 100.0, levels: int = 20, quote_qty: float = 1.0, volatility: float = 1e-4,
+                 trade_probability: float = 0.5, fee_rate: float = 0.001, latency: float = 0.0,
+                 jitter: float = 0.0, ws_latency: float = 0.0, error_rate: float = 0.0, drop_rate: float = 0.0,
+                 disconnect_interval: float = 0.0, max_queue: int = 100000, warmup: int = 1000,
+                 rate_limit: int = 0, seed: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.tick_rate = tick_rate
+        self.levels = levels
+        self.quote_qty = quote_qty
+        self.volatility = volatility  # Стандартное отклонение цены за секунду (доля)
+        self.trade_probability = trade_probability
+        self.latency = latency
+        self.jitter = jitter
+        self.ws_latency = ws_latency
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.disconnect_interval = disconnect_interval  # Среднее время между разрывами, сек (0 - без разрывов)
+        self.max_queue = max_queue  # Отставшего клиента отключаем, как настоящая биржа
+        self.rate_limit = rate_limit  # REST-запросов в секунду (0 - без лимита)
+        self.window = (0, 0)  # (номер секунды, запросов в ней)
+        self.throttled = 0
+        self.step_volatility = volatility / math.sqrt(max(tick_rate, 1.0))
+        self.rng = random.Random(seed)
+        self.engine = MatchingEngine(balances or DEFAULT_BALANCES, fee_rate=fee_rate)
+        prices = {**DEFAULT_PRICES, **(prices or {})}
+        self.markets = {symbol: Market(symbol, prices.get(symbol, 100.0)) for symbol in symbols}
+        self.symbols = list(self.markets)
+        self.subscribers: Set[Subscriber] = set()
+        self.account_seq = itertools.count(1)
+        self.sent = 0
+        self.loop = None
+        self.runner = None
+        self.tasks: List[asyncio.Task] = []
+        self.thread = None
+        self.started = threading.Event()
+        for _ in range(warmup):  # История сделок для прогрева индикаторов клиента
+            self._step(publish=False)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    # --- Генератор рынка ---
+
+    def _requote(self, market: Market) -> List[Dict]:
+        """Котировки генератора: levels уровней с каждой стороны вокруг средней цены."""
+        anchor = math.floor(market.mid / market.tick - 0.5)
+        if anchor == market.anchor and not market.dirty:
+            return []
+        market.anchor = anchor
+        market.dirty = False
+        low, high = anchor - self.levels, anchor + self.levels  # Биды (low, anchor], аски (anchor, high]
+        quotes = market.quotes
+        for k, order in list(quotes.items()):
+            if order["status"] not in ("open", "partially_filled") or not low < k <= high \
+                    or (k <= anchor) != (order["side"] == "buy"):
+                self.engine.cancel_owned(order)
+                del quotes[k]
+        events = []
+        if len(quotes) == 2 * self.levels:
+            return events
+        for k in range(low + 1, high + 1):
+            if k not in quotes:
+                side = "buy" if k <= anchor else "sell"
+                order, fills = self.engine.submit(market.symbol, side, self.quote_qty, round(k * market.tick, 8),
+                                                  owner=SYNTHETIC)
+                events.extend(fills)  # Котировка могла исполнить стоящий ордер клиента
+                if order["status"] in ("open", "partially_filled"):
+                    quotes[k] = order
+        return events
+
+    def _step(self, publish: bool = True) -> None:
+        """Один шаг рынка по случайной паре."""
+        market = self.markets[self.rng.choice(self.symbols)] if len(self.symbols) > 1 else self.markets[self.symbols[0]]
+        market.mid *= math.exp(self.rng.gauss(0, self.step_volatility))
+        events = self._requote(market)
+        if self.rng.random() < self.trade_probability:
+            side = "buy" if self.rng.random() < 0.5 else "sell"
+            qty = self.rng.expovariate(2 / self.quote_qty)
+            book = self.engine.book(market.symbol)
+            levels = len(book.bid_prices) + len(book.ask_prices)
+            _, fills = self.engine.submit(market.symbol, side, qty, owner=SYNTHETIC)
+            events.extend(fills)
+            if len(book.bid_prices) + len(book.ask_prices) != levels:
+                market.dirty = True  # Уровень съеден целиком, котировку нужно восстановить
+        if not publish:
+            self.engine.deltas()
+            return
+        events.extend(self.engine.deltas())
+        book = self.engine.book(market.symbol)
+        events.append({"type": "ticker", "symbol": market.symbol, "price": book.last_price or market.mid,
+                       "bid": book.best_bid(), "ask": book.best_ask()})
+        self.publish(events)
+
+    async def _ticker(self) -> None:
+        """Шаги рынка с частотой tick_rate; при высокой частоте - пачками за одно пробуждение."""
+        loop = asyncio.get_running_loop()
+        last = loop.time()
+        budget = 0.0
+        while True:
+            await asyncio.sleep(max(1 / self.tick_rate, 0.001))
+            now = loop.time()
+            budget = min(budget + (now - last) * self.tick_rate, self.tick_rate)  # Не догоняем больше секунды
+            last = now
+            for _ in range(int(budget)):
+                self._step()
+            budget -= int(budget)
+
+    # --- Рассылка WebSocket ---
+
+    def publish(self, events: List[Dict]) -> None:
+        """Постановка событий в очереди подписчиков по каналам."""
+        if not self.subscribers:
+            return
+        now = self.loop.time()
+        for event in events:
+            kind = event["type"]
+            message = None
+            channel = f"{kind}:{event.get('symbol')}"
+            if kind in ACCOUNT_EVENTS:
+                event["seq"] = next(self.account_seq)
+            for subscriber in self.subscribers:
+                if kind == "balance":
+                    if not (subscriber.account or subscriber.private):
+                        continue
+                elif kind in ACCOUNT_EVENTS:
+                    if not subscriber.private:
+                        continue
+                elif channel not in subscriber.channels:
+                    continue
+                if self.drop_rate and self.rng.random() < self.drop_rate:
+                    continue
+                if len(subscriber.queue) >= self.max_queue:
+                    asyncio.ensure_future(subscriber.ws.close(code=WSCloseCode.TRY_AGAIN_LATER,
+                                                              message=b"Slow consumer"))
+                    continue
+                if message is None:
+                    message = json.dumps(event)
+                subscriber.queue.append((now, message))
+                subscriber.wake.set()
+
+    async def _writer(self, subscriber: Subscriber) -> None:
+        """Отправка очереди подписчика (с задержкой ws_latency от момента события)."""
+        loop = asyncio.get_running_loop()
+        ws = subscriber.ws
+        while not ws.closed:
+            await subscriber.wake.wait()
+            subscriber.wake.clear()
+            while subscriber.queue and not ws.closed:
+                created, message = subscriber.queue[0]
+                delay = created + self.ws_latency - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                subscriber.queue.popleft()
+                try:
+                    await ws.send_str(message)
+                except ConnectionError:
+                    return
+                self.sent += 1
+
+    async def _serve(self, request, subscriber: Subscriber) -> web.WebSocketResponse:
+        ws = subscriber.ws
+        await ws.prepare(request)
+        self.subscribers.add(subscriber)
+        writer = asyncio.ensure_future(self._writer(subscriber))
+        try:
+            async for msg in ws:
+                if msg.type != web.WSMsgType.TEXT:
+                    continue
+                try:
+                    data = json.loads(msg.data)
+                except ValueError:
+                    continue
+                params = set(data.get("params", []))
+                if data.get("method") == "subscribe":
+                    subscriber.channels |= params
+                elif data.get("method") == "unsubscribe":
+                    subscriber.channels -= params
+        finally:
+            self.subscribers.discard(subscriber)
+            subscriber.wake.set()
+            writer.cancel()
+        return ws
+
+    async def stream(self, request):
+        """Мультиплексированный поток с подписками (как у StreamManager)."""
+        return await self._serve(request, Subscriber(web.WebSocketResponse()))
+
+    async def ticker_stream(self, request):
+        """Все каналы одной пары (как у AsyncBitcioAPI.stream)."""
+        symbol = request.match_info["symbol"]
+        channels = [f"{kind}:{symbol}" for kind in ("ticker", "trade", "depth")]
+        return await self._serve(request, Subscriber(web.WebSocketResponse(), channels))
+
+    async def account_stream(self, request):
+        """Приватный поток счёта (нужен заголовок X-API-KEY)."""
+        if not request.headers.get("X-API-KEY"):
+            raise web.HTTPUnauthorized(text=json.dumps({"error": "API key required"}), content_type="application/json")
+        return await self._serve(request, Subscriber(web.WebSocketResponse(), account=False, private=True))
+
+    async def _disconnector(self) -> None:
+        """Случайные разрывы всех соединений со средним интервалом disconnect_interval."""
+        while True:
+            await asyncio.sleep(self.rng.expovariate(1 / self.disconnect_interval))
+            await self._disconnect()
+
+    async def _disconnect(self) -> None:
+        for subscriber in list(self.subscribers):
+            await subscriber.ws.close(code=WSCloseCode.SERVICE_RESTART, message=b"Injected disconnect")
+
+    def disconnect(self) -> None:
+        """Немедленный разрыв всех соединений WebSocket (из любого потока)."""
+        asyncio.run_coroutine_threadsafe(self._disconnect(), self.loop).result(5)
+
+    # --- REST ---
+
+    @web.middleware
+    async def _inject(self, request, handler):
+        """Задержка и ошибки для REST-запросов."""
+        if request.path in ("/stream", "/account") or request.path.startswith("/ticker/"):
+            return await handler(request)
+        delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            return web.json_response({"error": "Injected error"}, status=503)
+        if not self.rate_limit:
+            return await handler(request)
+        now = self.loop.time()
+        second, used = self.window
+        if int(now) != second:
+            second, used = int(now), 0
+        used += 1
+        self.window = (second, used)
+        reset = f"{second + 1 - now:.3f}"
+        headers = {"X-RateLimit-Limit": str(self.rate_limit),
+                   "X-RateLimit-Remaining": str(max(self.rate_limit - used, 0)), "X-RateLimit-Reset": reset}
+        if used > self.rate_limit:
+            self.throttled += 1
+            return web.json_response({"error": "Too many requests"}, status=429,
+                                     headers={**headers, "Retry-After": reset})
+        response = await handler(request)
+        response.headers.update(headers)
+        return response
+
+    def _market(self, request, symbol: Optional[str] = None):
+        symbol = symbol or request.query.get("symbol")
+        if symbol not in self.markets:
+            raise web.HTTPBadRequest(text=json.dumps({"error": f"Unknown symbol {symbol}"}),
+                                     content_type="application/json")
+        return symbol
+
+    @staticmethod
+    def _public(order: Dict) -> Dict:
+        return {k: v for k, v in order.items() if k != "owner"}
+
+    async def orderbook(self, request):
+        symbol = self._market(request)
+        return web.json_response(self.engine.book(symbol).depth(int(request.query.get("limit", 100))))
+
+    async def balance(self, request):
+        asset = request.query.get("asset")
+        return web.json_response({"asset": asset, "balance": self.engine.balances.get(asset, 0.0)})
+
+    async def place_order(self, request):
+        data = await request.json()
+        symbol = self._market(request, data.get("symbol"))
+        if data.get("side") not in ("buy", "sell") or float(data.get("quantity") or 0) <= 0:
+            return web.json_response({"status": "rejected", "reason": "Invalid order"}, status=400)
+        order, events = self.engine.submit(symbol, data["side"], float(data["quantity"]), data.get("price"))
+        self.markets[symbol].dirty = True
+        self.publish(events + self.engine.deltas())
+        return web.json_response(self._public(order))
+
+    async def cancel_order(self, request):
+        data = await request.json()
+        order = self.engine.cancel(str(data.get("order_id")))
+        if order is None:
+            return web.json_response({"order_id": data.get("order_id"), "status": "rejected",
+                                      "reason": "Order not found"})
+        self.publish([self.engine.order_event(order)] + self.engine.deltas())
+        return web.json_response(self._public(order))
+
+    async def orders(self, request):
+        symbol = self._market(request)
+        orders = self.engine.history_for(symbol, int(request.query.get("limit", 100)), request.query.get("status"))
+        return web.json_response([self._public(o) for o in orders])
+
+    async def trades(self, request):
+        symbol = self._market(request)
+        limit = int(request.query.get("limit", 1000))
+        return web.json_response(list(self.engine.book(symbol).trades)[-limit:])
+
+    # --- Запуск ---
+
+    async def _start(self) -> None:
+        app = web.Application(middlewares=[self._inject])
+        app.router.add_get("/orderbook", self.orderbook)
+        app.router.add_get("/balance", self.balance)
+        app.router.add_post("/order", self.place_order)
+        app.router.add_delete("/order", self.cancel_order)
+        app.router.add_get("/orders", self.orders)
+        app.router.add_get("/trades", self.trades)
+        app.router.add_get("/stream", self.stream)
+        app.router.add_get("/ticker/{symbol}", self.ticker_stream)
+        app.router.add_get("/account", self.account_stream)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]  # Фактический порт при port=0
+        if self.tick_rate > 0:
+            self.tasks.append(asyncio.ensure_future(self._ticker()))
+        if self.disconnect_interval > 0:
+            self.tasks.append(asyncio.ensure_future(self._disconnector()))
+
+    def run(self) -> None:
+        """Запуск в текущем потоке до остановки."""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._start())
+        self.started.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.run_until_complete(self._shutdown())
+            self.loop.close()
+
+    def start(self, timeout: float = 5.0) -> "ExchangeServer":
+        """Запуск в фоновом потоке (для тестов, замеров и запуска вместе с клиентом)."""
+        self.thread = threading.Thread(target=self.run, name="exchange-server", daemon=True)
+        self.thread.start()
+        if not self.started.wait(timeout):
+            raise RuntimeError("Симулятор биржи не запустился")
+        return self
+
+    async def _shutdown(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await self._disconnect()
+        await self.runner.cleanup()
+
+    def stop(self) -> None:
+        """Остановка сервера, запущенного через start()."""
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread is not None:
+            self.thread.join(5)
+            self.thread = None
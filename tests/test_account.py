@@ -0,0 +1,46 @@
+"""Таблица открытых ордеров и сверка с REST после разрыва потока счёта."""
+import pytest
+from backend.account import OpenOrders
+from backend.api import BitcioAPI
+from backend.ledger import Ledger
+
+def order(order_id, status, filled=0.0, symbol="BTCUSDT"):
+    return {"order_id": order_id, "symbol": symbol, "side": "buy", "quantity": 1.0, "filled": filled,
+            "price": 100.0, "status": status}
+
+def test_snapshot_keeps_orders_changed_after_it_started():
+    orders = OpenOrders()
+    orders.apply(order("1", "open"))
+    since = orders.version
+    orders.apply(order("2", "open"))  # Пришло из потока во время загрузки снимка
+    orders.replace("BTCUSDT", [], since)
+    assert [o["order_id"] for o in orders.for_symbol("BTCUSDT")] == ["2"]
+    assert orders.is_synced("BTCUSDT")
+
+def test_closed_order_is_not_resurrected_or_rolled_back():
+    orders = OpenOrders()
+    orders.apply(order("1", "partially_filled", filled=0.5))
+    assert not orders.apply(order("1", "open", filled=0.0))
+    orders.apply(order("1", "filled", filled=1.0))
+    orders.replace("BTCUSDT", [order("1", "open")], orders.version - 1)
+    assert orders.for_symbol("BTCUSDT") == []
+
+@pytest.fixture
+def api():
+    api = BitcioAPI("key", "secret", base_url="http://127.0.0.1:9")
+    yield api
+    api.close()
+
+def test_resync_replays_only_tracked_orders(api):
+    ledger = Ledger()
+    api.order_callback, api.order_known = ledger.on_order, ledger.knows
+    history = [order(str(i), "filled", filled=1.0) for i in range(50)]
+    api.get_order_history = lambda symbol, limit=100, status=None: history
+    api.resync_orders("BTCUSDT")
+    assert ledger.pnl("BTCUSDT")["quantity"] == 0.0  # Старая история - не новые позиции
+
+    api.open_orders.apply(order("50", "open"))
+    history = history + [order("50", "filled", filled=1.0)]  # Исполнен за время разрыва
+    api.resync_orders("BTCUSDT")
+    assert ledger.pnl("BTCUSDT")["quantity"] == pytest.approx(1.0)
+    assert api.open_orders.for_symbol("BTCUSDT") == []
@@ -0,0 +1,30 @@
+"""Бэктест: сделки с параметрами по умолчанию и PnL стратегии без переоценки начальных балансов."""
+import random
+import pytest
+from backend.backtest import Backtester
+
+BALANCES = {"BTC": 1000.0, "USDT": 1000000.0}
+
+def random_walk(n=5000, seed=1, drift=0.0):
+    rng = random.Random(seed)
+    price = 30000.0
+    for i in range(n):
+        price += drift + rng.gauss(0, 15)
+        yield {"type": "trade", "symbol": "BTCUSDT", "time": float(i), "price": price}
+
+def test_default_parameters_trade_and_pnl_comes_from_fills():
+    backtester = Backtester("BTCUSDT", BALANCES)
+    result = backtester.run(random_walk())
+    assert result["trades"] > 0
+    assert {fill["side"] for fill in result["fills"]} == {"buy", "sell"}
+    ledger = backtester.risk_manager.ledger.pnl("BTCUSDT")
+    assert result["pnl"] == pytest.approx(ledger["net"])
+    assert ledger["fees"] == pytest.approx(result["fees"])
+    assert result["equity_pnl"] == pytest.approx(result["pnl"] + result["drift"])
+
+def test_no_trades_means_zero_pnl_despite_price_drift():
+    backtester = Backtester("BTCUSDT", BALANCES, risk_params={"min_spread": 1.0})
+    result = backtester.run(random_walk(drift=1.0))
+    assert result["trades"] == 0
+    assert result["pnl"] == 0.0 and result["max_drawdown"] == 0.0
+    assert result["drift"] > 0  # Рост цены начального BTC - не заслуга стратегии
@@ -0,0 +1,16 @@
+"""Векторные ряды индикаторов совпадают с потоковыми значениями."""
+import random
+import pytest
+from backend.batch_indicators import stdev_series
+from backend.indicators import StdDev
+
+@pytest.mark.parametrize("period", [1, 2, 20, 100])
+def test_stdev_series_matches_streaming(period):
+    rng = random.Random(1)
+    prices, price = [], 30000.0
+    for _ in range(5000):
+        price += rng.gauss(0, 15)
+        prices.append(price)
+    stdev = StdDev(period)
+    expected = [stdev.update(p) for p in prices]
+    assert stdev_series(prices, period, chunk=700).tolist() == pytest.approx(expected, abs=1e-6)
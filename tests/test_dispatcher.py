@@ -0,0 +1,27 @@
+"""Быстрое определение типа сообщения WebSocket."""
+import backend.api
+from backend.api import BitcioAPI
+from backend.dispatcher import sniff_type
+
+def test_sniff_type_str_and_bytes():
+    assert sniff_type('{"type": "trade", "symbol": "BTCUSDT", "price": 1}') == "trade"
+    assert sniff_type(b' {"type":"depth","symbol":"BTCUSDT"}') == "depth"
+    assert sniff_type('{"type": "heartbeat", "time": 1}') == "heartbeat"
+
+def test_nested_type_key_falls_back_to_full_parse():
+    assert sniff_type('{"order": {"order_id": "1", "type": "limit"}, "type": "order"}') is None
+    assert sniff_type(b'{"bids": [[1, 2]], "type": "depth"}') is None
+
+def test_unknown_frames_are_dropped_without_parsing(monkeypatch):
+    parsed = []
+    monkeypatch.setattr(backend.api, "loads", lambda message: parsed.append(message) or {})
+    api = BitcioAPI("key", "secret", base_url="http://127.0.0.1:9")
+    try:
+        api.on_ws_message(None, '{"type": "heartbeat", "time": 1}')
+        api.on_ws_message(None, b'{"type":"subscribed","params":["ticker:BTCUSDT"]}')
+        assert parsed == []
+        api.on_ws_message(None, '{"symbol": "BTCUSDT", "type": "ticker"}')  # type не первым - разбор целиком
+        assert len(parsed) == 1
+    finally:
+        api.stop_websocket()
+        api.close()
@@ -0,0 +1,95 @@
+"""Журнал позиций: учёт лотов, повторы исполнений и восстановление из файла."""
+import json
+import pytest
+from backend.ledger import AVERAGE, FIFO, Ledger, Position
+
+def test_fifo_closes_oldest_lot_first():
+    position = Position("BTCUSDT", FIFO)
+    position.apply("buy", 1.0, 100.0)
+    position.apply("buy", 1.0, 110.0)
+    realized = position.apply("sell", 1.5, 120.0)
+    assert realized == pytest.approx(20.0 + 5.0)
+    assert position.quantity == pytest.approx(0.5)
+    assert [(lot.quantity, lot.price) for lot in position.lots] == [(pytest.approx(0.5), 110.0)]
+
+def test_average_closes_at_average_price():
+    position = Position("BTCUSDT", AVERAGE)
+    position.apply("buy", 1.0, 100.0)
+    position.apply("buy", 1.0, 110.0)
+    realized = position.apply("sell", 1.5, 120.0)
+    assert realized == pytest.approx(1.5 * 15.0)
+    assert position.quantity == pytest.approx(0.5)
+    assert position.avg_price == pytest.approx(105.0)
+
+@pytest.mark.parametrize("method", [FIFO, AVERAGE])
+def test_flip_opens_opposite_position_with_remainder(method):
+    position = Position("BTCUSDT", method)
+    position.apply("buy", 1.0, 100.0)
+    assert position.apply("sell", 3.0, 90.0) == pytest.approx(-10.0)
+    assert position.quantity == pytest.approx(-2.0)
+    assert position.avg_price == pytest.approx(90.0)
+    assert position.unrealized(85.0) == pytest.approx(10.0)
+    assert position.apply("buy", 2.0, 80.0) == pytest.approx(20.0)
+    assert position.quantity == 0.0 and not position.lots
+    assert position.realized == pytest.approx(10.0)
+
+def test_net_pnl_includes_fees_and_mark():
+    ledger = Ledger()
+    ledger.on_fill("BTCUSDT", "buy", 2.0, 100.0, fee=0.5)
+    ledger.on_trade({"symbol": "BTCUSDT", "price": 101.0})
+    pnl = ledger.pnl("BTCUSDT")
+    assert pnl["unrealized"] == pytest.approx(2.0)
+    assert pnl["net"] == pytest.approx(1.5)
+
+def fill_event(order_id, quantity, price, filled, fee=0.0):
+    return {"order_id": order_id, "symbol": "BTCUSDT", "side": "buy", "quantity": quantity, "price": price,
+            "fee": fee, "filled": filled}
+
+def test_rest_state_then_fill_events_are_not_counted_twice():
+    ledger = Ledger()
+    assert ledger.on_order({"order_id": "1", "symbol": "BTCUSDT", "side": "buy", "filled": 2.0, "price": 100.0}) == 1
+    ledger.on_fill_event(fill_event("1", 1.0, 100.0, 1.0))
+    ledger.on_fill_event(fill_event("1", 1.0, 100.0, 2.0))
+    assert ledger.pnl("BTCUSDT")["quantity"] == pytest.approx(2.0)
+
+def test_fill_events_then_order_state_book_only_the_rest():
+    ledger = Ledger()
+    ledger.on_fill_event(fill_event("1", 1.0, 100.0, 1.0, fee=0.1))
+    order = {"order_id": "1", "symbol": "BTCUSDT", "side": "buy", "filled": 3.0,
+             "fills": [{"quantity": 1.0, "price": 100.0, "fee": 0.1}, {"quantity": 2.0, "price": 103.0, "fee": 0.2}]}
+    assert ledger.on_order(order) == 1
+    assert ledger.on_order(order) == 0
+    ledger.on_fill_event(fill_event("1", 2.0, 103.0, 3.0, fee=0.2))
+    pnl = ledger.pnl("BTCUSDT")
+    assert pnl["quantity"] == pytest.approx(3.0)
+    assert pnl["avg_price"] == pytest.approx(102.0)
+    assert pnl["fees"] == pytest.approx(0.3)
+
+def test_fill_event_without_filled_waits_for_order_state():
+    ledger = Ledger()
+    ledger.on_fill_event({"order_id": "1", "symbol": "BTCUSDT", "side": "buy", "quantity": 1.0, "price": 100.0})
+    assert ledger.pnl("BTCUSDT")["quantity"] == 0.0
+    assert not ledger.knows("1")
+
+def test_restore_uses_snapshot_and_later_fills(tmp_path):
+    path = str(tmp_path / "ledger.jsonl")
+    ledger = Ledger()
+    ledger.open(path, snapshot_interval=None)
+    ledger.on_order({"order_id": "1", "symbol": "BTCUSDT", "side": "buy", "filled": 1.0, "price": 100.0, "fee": 0.1})
+    ledger.snapshot()
+    ledger.on_order({"order_id": "2", "symbol": "BTCUSDT", "side": "sell", "filled": 0.4, "price": 110.0})
+    ledger.on_fill("ETHUSDT", "buy", 2.0, 10.0)
+    expected = {symbol: ledger.pnl(symbol) for symbol in ("BTCUSDT", "ETHUSDT")}
+    ledger.journal.write('{"type": "fill", "symbol"')  # Недописанная строка при аварийной остановке
+    ledger.journal.flush()
+    with open(path) as f:  # Снимок заменил журнал: исполнения до него не хранятся
+        assert [json.loads(line)["type"] for line in f.readlines()[:-1]] == ["snapshot", "fill", "fill"]
+
+    restored = Ledger()
+    restored.restore(path)
+    for symbol, pnl in expected.items():
+        assert restored.pnl(symbol) == pytest.approx(pnl)
+    # Уже учтённые ордера после восстановления не учитываются повторно
+    assert restored.on_order({"order_id": "1", "symbol": "BTCUSDT", "side": "buy", "filled": 1.0,
+                              "price": 100.0}) == 0
+    assert restored.knows("2")
@@ -0,0 +1,51 @@
+"""Локальный стакан: снимок, дельты, разрыв последовательности и подписка на depth."""
+from backend.api import BitcioAPI
+from backend.orderbook import OrderBook
+from backend.stream import StreamConnection
+
+def synced_book():
+    book = OrderBook("BTCUSDT")
+    book.apply_snapshot({"bids": [[99.0, 1.0], [98.0, 2.0]], "asks": [[101.0, 1.0], [102.0, 2.0]], "seq": 10})
+    return book
+
+def test_delta_updates_and_removes_levels():
+    book = synced_book()
+    assert book.apply_delta({"seq": 11, "bids": [[100.0, 0.5], [99.0, 0.0]], "asks": [[101.0, 0.0]]})
+    assert book.best_bid() == (100.0, 0.5)
+    assert book.best_ask() == (102.0, 2.0)
+    assert book.top(depth=5)["bids"] == [[100.0, 0.5], [98.0, 2.0]]
+
+def test_stale_delta_is_ignored():
+    book = synced_book()
+    assert book.apply_delta({"seq": 10, "bids": [[100.0, 5.0]]})
+    assert book.best_bid() == (99.0, 1.0)
+    assert book.synced and book.last_seq == 10
+
+def test_gap_marks_book_unsynced_until_snapshot():
+    book = synced_book()
+    assert not book.apply_delta({"seq": 12, "bids": [[100.0, 5.0]]})
+    assert not book.synced
+    assert book.best_bid() == (99.0, 1.0)
+    assert not book.apply_delta({"seq": 13, "bids": [[100.0, 5.0]]})
+    book.apply_snapshot({"bids": [[100.0, 5.0]], "asks": [[101.0, 1.0]], "seq": 13})
+    assert book.synced
+    assert book.apply_delta({"seq": 14, "asks": [[100.5, 1.0]]})
+    assert book.best_ask() == (100.5, 1.0)
+
+def test_first_book_request_subscribes_depth(monkeypatch):
+    monkeypatch.setattr(StreamConnection, "_run", lambda self: None)  # Без соединения и его разрывов
+    api = BitcioAPI("key", "secret", base_url="http://127.0.0.1:9", ws_url="ws://127.0.0.1:9")
+    snapshots = []
+    api.get_orderbook = lambda symbol: snapshots.append(symbol) or {"bids": [[99.0, 1.0]], "asks": [[101.0, 1.0]],
+                                                                    "seq": 1}
+    try:
+        assert api.get_best_price("BTCUSDT", "buy") == 101.0
+        assert api.stream.is_subscribed("BTCUSDT", "depth")
+        api.get_best_price("BTCUSDT", "sell")
+        assert snapshots == ["BTCUSDT"]  # Дальше стакан ведут дельты
+        api.unsubscribe("BTCUSDT", ("depth",))
+        api.get_best_price("BTCUSDT", "sell")
+        assert len(snapshots) == 2  # Без дельт - снимок при каждом обращении
+    finally:
+        api.stop_websocket()
+        api.close()
@@ -0,0 +1,13 @@
+"""Кольцевой буфер: окно без копии после переполнения."""
+import numpy as np
+from backend.ring_buffer import RingBuffer
+
+def test_read_passes_contiguous_views_of_the_window():
+    buffer = RingBuffer(4, ('time', 'price'))
+    for i in range(6):
+        buffer.append(float(i), 100.0 + i)
+    seen = {}
+    assert buffer.read(seen.update) == 6
+    assert seen['price'].tolist() == [102.0, 103.0, 104.0, 105.0]
+    assert np.shares_memory(seen['price'], buffer.data['price'])  # Представление, не копия
+    assert buffer.read(seen.update, n=2) == 6 and seen['time'].tolist() == [4.0, 5.0]
@@ -0,0 +1,51 @@
+"""Общие проверки рисков RiskManager, их использование в AsyncScalper и стакан асинхронного клиента."""
+import asyncio
+import time
+from backend.async_trader import AsyncScalper
+from backend.indicators import SMA, StdDev
+from backend.risk_manager import RiskManager
+
+def test_pure_checks():
+    assert RiskManager.position_allowed(1.0, 100.0, 1000.0, 0.1)
+    assert not RiskManager.position_allowed(1.1, 100.0, 1000.0, 0.1)
+    assert RiskManager.loss_exceeded(-60.0, 1000.0, 0.05)
+    assert not RiskManager.loss_exceeded(-60.0, 0.0, 0.05)  # Баланс ещё не получен
+    stdev, mean = StdDev(4), SMA(4)
+    assert not RiskManager.volatility_exceeded(stdev, mean)
+    for price in (100.0, 120.0, 80.0, 100.0):
+        stdev.update(price)
+        mean.update(price)
+    assert RiskManager.volatility_exceeded(stdev, mean)
+
+class _Api:
+    orderbooks = {}
+
+    def __init__(self):
+        self.calls = 0
+
+    async def get_balance(self, asset):
+        self.calls += 1
+        return 10.0
+
+def test_async_scalper_caches_balance():
+    api = _Api()
+    scalper = AsyncScalper(api, balance_ttl=60.0)
+    assert asyncio.run(scalper.get_balance("BTC")) == 10.0
+    assert asyncio.run(scalper.get_balance("BTC")) == 10.0
+    assert api.calls == 1
+    scalper.balances["BTC"] = (10.0, time.monotonic() - 61.0)
+    asyncio.run(scalper.get_balance("BTC"))
+    assert api.calls == 2
+
+def test_async_book_without_stream_is_refetched():
+    from backend.async_api import AsyncBitcioAPI
+    api = AsyncBitcioAPI("key", "secret")
+    snapshots = [{"bids": [[99.0, 1.0]], "asks": [[101.0, 1.0]], "seq": 1},
+                 {"bids": [[98.0, 1.0]], "asks": [[100.0, 1.0]], "seq": 2}]
+
+    async def get_orderbook(symbol):
+        return snapshots.pop(0)
+    api.get_orderbook = get_orderbook
+    assert asyncio.run(api.get_best_price("BTCUSDT", "sell")) == 99.0
+    assert not api.orderbooks["BTCUSDT"].synced  # Дельт нет - стакан не считается актуальным
+    assert asyncio.run(api.get_best_price("BTCUSDT", "sell")) == 98.0
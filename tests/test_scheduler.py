@@ -0,0 +1,87 @@
+"""Планировщик HTTP-запросов: приоритет ордеров, объединение GET и лимиты."""
+import threading
+import pytest
+from backend.scheduler import ACCOUNT, HISTORY, ORDER, RequestScheduler, TokenBucket
+
+UNLIMITED = {"order": None, "read": None}
+
+@pytest.fixture
+def scheduler():
+    scheduler = RequestScheduler(workers=2, rate_limits=UNLIMITED, order_slots=1)
+    yield scheduler
+    scheduler.shutdown()
+
+def blocker(scheduler, **kwargs):
+    """Запрос, занимающий исполнителя до release.set()."""
+    started, release = threading.Event(), threading.Event()
+
+    def run():
+        started.set()
+        release.wait(5)
+    future = scheduler.submit(run, **kwargs)
+    assert started.wait(5)
+    return future, release
+
+def test_order_uses_reserved_slot_while_reads_wait(scheduler):
+    _, release = blocker(scheduler, priority=HISTORY)
+    read = scheduler.submit(lambda: "read", priority=ACCOUNT)
+    order = scheduler.submit(lambda: "order", bucket="order", priority=ORDER)
+    assert order.result(timeout=5) == "order"
+    assert not read.done()
+    release.set()
+    assert read.result(timeout=5) == "read"
+
+def test_queued_order_goes_before_earlier_reads():
+    scheduler = RequestScheduler(workers=1, rate_limits=UNLIMITED, order_slots=0)
+    try:
+        done = []
+        _, release = blocker(scheduler, priority=HISTORY)
+        futures = [scheduler.submit(lambda name=name: done.append(name), priority=ACCOUNT) for name in ("r1", "r2")]
+        futures.append(scheduler.submit(lambda: done.append("order"), bucket="order", priority=ORDER))
+        release.set()
+        for future in futures:
+            future.result(timeout=5)
+        assert done == ["order", "r1", "r2"]
+    finally:
+        scheduler.shutdown()
+
+def test_identical_gets_in_flight_are_coalesced(scheduler):
+    calls = []
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return "book"
+    first = scheduler.submit(fetch, key=("/orderbook", (("symbol", "BTCUSDT"),)))
+    second = scheduler.submit(fetch, key=("/orderbook", (("symbol", "BTCUSDT"),)))
+    assert second is first and scheduler.coalesced == 1
+    release.set()
+    assert first.result(timeout=5) == "book"
+    third = scheduler.submit(fetch, key=("/orderbook", (("symbol", "BTCUSDT"),)))
+    assert third is not first and third.result(timeout=5) == "book"
+    assert len(calls) == 2
+
+def test_error_is_shared_by_coalesced_callers(scheduler):
+    def fail():
+        raise ValueError("boom")
+    with pytest.raises(ValueError):
+        scheduler.call(fail, key="k")
+
+def test_token_bucket_wait_and_refill():
+    bucket = TokenBucket(rate=10.0, capacity=2.0)
+    now = bucket.updated
+    assert bucket.wait_time(1.0, now) == 0.0
+    bucket.take(2.0)
+    assert bucket.wait_time(1.0, now) == pytest.approx(0.1)
+    assert bucket.wait_time(5.0, now) == pytest.approx(0.2)  # Тяжелее ёмкости - ждёт полную корзину
+    assert bucket.wait_time(1.0, now + 0.11) == 0.0
+
+def test_feedback_429_pauses_reads_but_not_orders():
+    scheduler = RequestScheduler(workers=2)
+    try:
+        scheduler.feedback("read", 429, {"Retry-After": "30"})
+        assert scheduler.buckets["read"].wait_time(1.0, scheduler.buckets["read"].updated) > 25
+        assert scheduler.call(lambda: "order", bucket="order", priority=ORDER) == "order"
+    finally:
+        scheduler.shutdown()
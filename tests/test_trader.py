@@ -0,0 +1,50 @@
+"""Скальпер: решение по сигналу и автоскальпинг по паре, на которую ещё нет подписки."""
+from types import SimpleNamespace
+import threading
+import time
+import pytest
+from backend.api import BitcioAPI
+from backend.indicators import SMA
+from backend.risk_manager import RiskManager
+from backend.trader import Scalper
+from simulator import ExchangeServer
+
+@pytest.fixture
+def exchange():
+    exchange = ExchangeServer(symbols=("BTCUSDT", "ETHUSDT"), port=0, tick_rate=200, seed=3,
+                              balances={"BTC": 10.0, "ETH": 100.0, "USDT": 1e6}).start()
+    yield exchange
+    exchange.stop()
+
+def test_auto_scalp_subscribes_second_symbol(exchange):
+    api = BitcioAPI("key", "secret", base_url=exchange.base_url, ws_url=exchange.ws_url)
+    scalper = Scalper(api, RiskManager(api, min_spread=1.0))  # Без сделок: спред всегда меньше порога
+    api.start_websocket("BTCUSDT")
+    sma = scalper.get_indicators("ETHUSDT")["sma"]  # Прогрев из истории сделок
+    warmed = sma.updates
+    stop = threading.Event()
+    worker = threading.Thread(target=scalper.auto_scalp, args=("ETHUSDT", 0.001), kwargs={"stop_event": stop})
+    try:
+        worker.start()
+        deadline = time.monotonic() + 5
+        while sma.updates == warmed and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert sma.updates > warmed  # Индикаторы второй пары идут за потоком сделок
+    finally:
+        stop.set()
+        worker.join()
+        api.stop_websocket()
+        api.close()
+
+def test_signal_buys_below_and_sells_above_sma():
+    sma = SMA(period=3)
+    for price in (100.0, 100.0, 100.0):
+        sma.update(price)
+    rsi = SimpleNamespace(value=20.0)
+    indicators = {'rsi': rsi, 'sma': sma}
+    assert Scalper.signal(98.0, 99.0, indicators, 0.001, 30, 70) == ("buy", 99.0)
+    assert Scalper.signal(98.0, 98.01, indicators, 0.001, 30, 70) is None  # Узкий спред
+    assert Scalper.signal(101.0, 102.0, indicators, 0.001, 30, 70) is None  # Аск выше средней
+    rsi.value = 80.0
+    assert Scalper.signal(101.0, 102.0, indicators, 0.001, 30, 70) == ("sell", 101.0)
+    assert Scalper.signal(101.0, 102.0, indicators, 0.001, 30, 90) is None